@@ -0,0 +1,2 @@
+# Benchmark e percorsi di riferimento (fuori dal pacchetto fitness_app):
+#   python -m benchmarks.benchmark --test 1000 100000
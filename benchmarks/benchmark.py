@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from fitness_app.bilanciamento import MatriceBilanciamento
+from fitness_app.cache_arrow import leggi_snapshot, scrivi_snapshot
+from fitness_app.chiavi import ESERCIZI
+from fitness_app.classifiche import Classifiche
+from fitness_app.dati_sintetici import genera_dati
+from fitness_app.indice_wod import IndiceWod
+from fitness_app.livelli import calcola_livelli, costruisci_tabella_soglie
+from fitness_app.matrice_livelli import MatriceLivelli
+from fitness_app.preparazione import prepara_fogli
+from fitness_app.ultimi_test import costruisci_ultimi_test
+
+from . import percorsi_originali
+
+# --- BENCHMARK ---
+# Misura su dati sintetici (fitness_app/dati_sintetici.py) i percorsi di calcolo dell'app a scale
+# diverse e salva i tempi in JSON, così due esecuzioni si possono confrontare:
+#   python -m benchmarks.benchmark --test 1000 100000
+#   python -m benchmarks.benchmark --confronta benchmark_risultati/benchmark_20250630-120000.json
+
+SCALE = [100, 1_000, 10_000, 100_000]
+CARTELLA_RISULTATI = os.environ.get("FITNESS_BENCHMARK", "benchmark_risultati")
+ATLETI_CAMPIONE = 20  # radar ricalcolati da zero solo per un campione di atleti
+MAX_TEST_ORIGINALI = 10_000  # oltre, il radar generale originale (iterrows su tutti i test) dura minuti
+
+
+def cronometra(funzione, ripetizioni):
+    """Tempi (secondi) di `ripetizioni` chiamate di funzione()."""
+    tempi = []
+    for _ in range(ripetizioni):
+        inizio = time.perf_counter()
+        funzione()
+        tempi.append(time.perf_counter() - inizio)
+    return tempi
+
+
+def _copia_fogli(grezzi):
+    # prepara_fogli modifica i fogli sul posto: ogni ripetizione parte da una copia
+    return {nome: df.copy() for nome, df in grezzi.items()}
+
+
+def casi(grezzi):
+    """{nome caso: funzione senza argomenti} per i dati di una scala."""
+    pronti = prepara_fogli(_copia_fogli(grezzi))
+    test_df, esercizi_df, soglie_df = pronti["test_df"], pronti["esercizi_df"], pronti["soglie_df"]
+    benchmark_df = pronti["benchmark_df"]
+    matrice = MatriceLivelli.costruisci(test_df, esercizi_df, soglie_df)
+    classifiche = Classifiche.costruisci(test_df, esercizi_df)
+    indice_wod = IndiceWod.costruisci(test_df, esercizi_df)
+    bilanciamento = MatriceBilanciamento.costruisci(test_df, esercizi_df)
+    atleti = test_df["nome"].astype("object").drop_duplicates().tolist()
+    campione = atleti[:ATLETI_CAMPIONE]
+    wod = esercizi_df["esercizio"].tolist()
+    un_test = test_df.tail(1)
+    dal = pd.Timestamp(test_df["data"].max()) - pd.Timedelta(days=90)
+    cartella = tempfile.mkdtemp(prefix="fitness-bench-")
+    snapshot = os.path.join(cartella, "test.feather")
+    scrivi_snapshot(snapshot, grezzi["test"])
+
+    # Fogli grezzi per i percorsi originali (li modificano sul posto aggiungendo colonne, come facevano)
+    originali = _copia_fogli(grezzi)
+    originali_preparati = percorsi_originali.prepara_dati(*(originali[n].copy() for n in ("utenti", "esercizi", "test", "benchmark", "wod")))
+    wod_originali = [w for w in wod if w in set(originali["esercizi"]["esercizio"])]
+
+    def radar_originale():
+        # graficicoach.mostra_grafico_radar_coach com'era: un radar per atleta del campione
+        _, esercizi, test, benchmark, _ = originali_preparati
+        for nome in campione:
+            percorsi_originali.radar_coach(test, esercizi, benchmark, originali["utenti"], nome)
+
+    def bilanciamento_pivot():
+        # Il vecchio percorso della pagina Bilanciamento: dizionario esercizio -> categoria e pivot_table
+        esercizio2cat = esercizi_df.set_index("esercizio")["categoria"].to_dict()
+        pd.pivot_table(test_df.assign(macroarea=test_df["esercizio"].map(esercizio2cat)), index="nome",
+                       columns="macroarea", values="esercizio", aggfunc="count", fill_value=0, observed=True)
+
+    def classifiche_pagina():
+        for id_cat in classifiche.categorie:
+            classifiche.classifica(id_cat, tempo=False)
+            classifiche.classifica(id_cat, tempo=True)
+
+    def classifiche_ricostruite():
+        nuove = Classifiche.costruisci(test_df, esercizi_df)
+        for id_cat in nuove.categorie:
+            nuove.classifica(id_cat, tempo=False)
+            nuove.classifica(id_cat, tempo=True)
+
+    risultato = {
+        "caricamento.prepara_fogli": lambda: prepara_fogli(_copia_fogli(grezzi)),
+        "caricamento.snapshot_scrivi": lambda: scrivi_snapshot(snapshot, grezzi["test"]),
+        "caricamento.snapshot_leggi": lambda: leggi_snapshot(snapshot),
+        "livelli.tabella_soglie": lambda: costruisci_tabella_soglie(benchmark_df),
+        "livelli.calcola_livelli": lambda: calcola_livelli(test_df, soglie_df),
+        "livelli.ultimi_test": lambda: costruisci_ultimi_test(test_df, soglie_df),
+        "radar.matrice_costruisci": lambda: MatriceLivelli.costruisci(test_df, esercizi_df, soglie_df),
+        "radar.matrice_profili": lambda: [matrice.profilo(nome) for nome in atleti],
+        f"radar.matrice_{ATLETI_CAMPIONE}_atleti": lambda: [matrice.profilo(nome) for nome in campione],
+        "radar.matrice_generale": lambda: matrice.generale(livello_minimo=1),
+        f"radar.originale_{ATLETI_CAMPIONE}_atleti": radar_originale,
+        "classifiche.costruisci_e_ordina": classifiche_ricostruite,
+        "classifiche.pagina": classifiche_pagina,
+        "classifiche.aggiungi_test": lambda: classifiche.aggiungi(un_test),
+        "bilanciamento.costruisci": lambda: MatriceBilanciamento.costruisci(test_df, esercizi_df),
+        "bilanciamento.tabella": lambda: bilanciamento.copia().aggiungi(un_test).tabella(),
+        "bilanciamento.pivot_da_zero": bilanciamento_pivot,
+        "wod.indice_costruisci": lambda: IndiceWod.costruisci(test_df, esercizi_df),
+        "wod.classifica_storico": lambda: [indice_wod.classifica(ESERCIZI.id(w)) for w in wod],
+        "wod.classifica_90_giorni": lambda: [indice_wod.classifica(ESERCIZI.id(w), dal=dal) for w in wod],
+        "caricamento.prepara_originale": lambda: percorsi_originali.prepara_dati(
+            *(df.copy() for df in (grezzi["utenti"], grezzi["esercizi"], grezzi["test"], grezzi["benchmark"], grezzi["wod"]))),
+        "wod.classifica_originale": lambda: [
+            percorsi_originali.classifica_wod(originali["test"], w, originali["esercizi"]) for w in wod_originali],
+    }
+    if len(grezzi["test"]) <= MAX_TEST_ORIGINALI:
+        _, esercizi, test, benchmark, _ = originali_preparati
+        risultato["radar.generale_originale"] = lambda: percorsi_originali.radar_generale(
+            test, esercizi, benchmark, originali["utenti"])
+    return risultato
+
+
+def esegui(scale, ripetizioni, seme, filtro=None):
+    """Esegue tutti i casi a ogni scala; ritorna il dizionario da salvare."""
+    risultati = []
+    for n_test in scale:
+        grezzi = genera_dati(n_test, seme=seme)
+        for nome, funzione in casi(grezzi).items():
+            if filtro and filtro not in nome:
+                continue
+            tempi = cronometra(funzione, ripetizioni)
+            risultati.append({
+                "test": n_test,
+                "caso": nome,
+                "minimo": min(tempi),
+                "mediana": statistics.median(tempi),
+                "ripetizioni": ripetizioni,
+            })
+            print(f"{n_test:>9} {nome:<34} {min(tempi) * 1000:10.2f} ms")
+    return {
+        "creato": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "macchina": platform.platform(),
+        },
+        "seme": seme,
+        "risultati": risultati,
+    }
+
+
+def salva(risultato, cartella=CARTELLA_RISULTATI):
+    os.makedirs(cartella, exist_ok=True)
+    percorso = os.path.join(cartella, f"benchmark_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(percorso, "w", encoding="utf-8") as f:
+        json.dump(risultato, f, indent=2, ensure_ascii=False)
+    return percorso
+
+
+def confronta(risultato, precedente):
+    """Tabella dei tempi minimi rispetto a un'esecuzione precedente (rapporto < 1 = più veloce)."""
+    prima = {(r["test"], r["caso"]): r["minimo"] for r in precedente["risultati"]}
+    print(f"\n{'test':>9} {'caso':<34} {'prima':>10} {'ora':>10} {'rapporto':>9}")
+    for r in risultato["risultati"]:
+        vecchio = prima.get((r["test"], r["caso"]))
+        if vecchio is None:
+            continue
+        print(f"{r['test']:>9} {r['caso']:<34} {vecchio * 1000:8.2f}ms {r['minimo'] * 1000:8.2f}ms "
+              f"{r['minimo'] / vecchio if vecchio else float('nan'):9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dei calcoli dell'app su dati sintetici")
+    parser.add_argument("--test", type=int, nargs="+", default=SCALE, help="numero di test per ogni scala")
+    parser.add_argument("--ripetizioni", type=int, default=3)
+    parser.add_argument("--seme", type=int, default=0)
+    parser.add_argument("--solo", default=None, help="esegue solo i casi che contengono questo testo")
+    parser.add_argument("--cartella", default=CARTELLA_RISULTATI, help="dove salvare il JSON dei risultati")
+    parser.add_argument("--confronta", default=None, help="JSON di un'esecuzione precedente")
+    argomenti = parser.parse_args()
+
+    risultato = esegui(argomenti.test, argomenti.ripetizioni, argomenti.seme, argomenti.solo)
+    print(f"\nRisultati salvati in {salva(risultato, argomenti.cartella)}")
+    if argomenti.confronta:
+        with open(argomenti.confronta, encoding="utf-8") as f:
+            confronta(risultato, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import pandas as pd
+
+# --- PERCORSI ORIGINALI (solo per il benchmark) ---
+# I calcoli come erano prima delle ottimizzazioni, presi dalla prima versione dell'app
+# (graficicoach.py, classifica_workout.py e aggiorna_tutti_i_dati in ssg.py) togliendo
+# solo le chiamate a Streamlit e Plotly: servono come riferimento "prima" nel benchmark,
+# così il confronto misura il codice sostituito e non una sua riscrittura.
+# Fuori dal pacchetto fitness_app: non si distribuisce con l'app e l'app non lo importa.
+
+
+def normalize(s):
+    """Normalizza una stringa: lowercase, rimuove spazi e caratteri speciali (da graficicoach.py)."""
+    if pd.isnull(s): return ""
+    return str(s).strip().lower().replace(" ", "").replace("-", "").replace("_", "")
+
+
+def _normalize_ssg(s):
+    """La normalize di ssg.py (senza underscore)."""
+    return str(s).strip().lower().replace(" ", "").replace("-", "") if pd.notnull(s) else ""
+
+
+def _livello_riga(row, benchmark_df, livelli_val):
+    # Corpo del ciclo per test, identico nei due radar di graficicoach.py
+    benchmark = benchmark_df[
+        (benchmark_df['esercizio_norm'] == row['esercizio_norm']) &
+        (benchmark_df['genere'] == row['genere'])
+    ]
+    benchmark = benchmark.squeeze() if not benchmark.empty else None
+    livello_num = 0
+    if benchmark is not None and isinstance(benchmark, pd.Series):
+        tipo = benchmark['tipo_valore']
+        try:
+            peso_corporeo = float(row.get('peso_corporeo', 0) or row.get('peso', 0))
+        except Exception:
+            peso_corporeo = None
+        if tipo == 'kg_rel' and peso_corporeo and peso_corporeo != 0:
+            try:
+                val = float(row['valore']) / peso_corporeo
+            except Exception:
+                val = None
+        elif tipo == 'reps' or tipo == 'valore':
+            try:
+                val = float(row['valore'])
+            except Exception:
+                val = None
+        elif tipo == 'tempo':
+            try:
+                m, s = map(int, str(row['valore']).split(":"))
+                val = m * 60 + s
+                benchmark = benchmark[["base", "principiante", "intermedio", "buono", "elite"]].apply(
+                    lambda x: int(x.split(":")[0]) * 60 + int(x.split(":")[1]) if ":" in str(x) else float(x)
+                )
+            except Exception:
+                val = None
+        else:
+            try:
+                val = float(row['valore'])
+            except Exception:
+                val = None
+
+        if tipo == 'tempo':
+            livelli_ordine = list(reversed(livelli_val.keys()))
+            for livello_nome in livelli_ordine:
+                soglia = benchmark[livello_nome]
+                if isinstance(soglia, str) and ":" in soglia:
+                    m, s = map(int, soglia.split(":"))
+                    soglia = m * 60 + s
+                else:
+                    try:
+                        soglia = float(soglia)
+                    except Exception:
+                        continue
+                if val is not None and val <= soglia:
+                    livello_num = livelli_val[livello_nome]
+                    break
+        else:
+            for livello_nome in reversed(list(livelli_val.keys())):
+                soglia = benchmark[livello_nome]
+                try:
+                    soglia = float(soglia)
+                except Exception:
+                    continue
+                if val is not None and val >= soglia:
+                    livello_num = livelli_val[livello_nome]
+                    break
+    return livello_num
+
+
+def radar_coach(test_df, esercizi_df, benchmark_df, utenti_df, atleta_radar_vis):
+    """mostra_grafico_radar_coach: (etichette, valori) del radar di un atleta."""
+    # --- Normalizza colonne necessarie ---
+    esercizi_df['categoria_norm'] = esercizi_df['categoria'].apply(normalize)
+    esercizi_df['esercizio_norm'] = esercizi_df['esercizio'].apply(normalize)
+    test_df['esercizio_norm'] = test_df['esercizio'].apply(normalize)
+    benchmark_df['esercizio_norm'] = benchmark_df['esercizio'].apply(normalize)
+    utenti_df['nome_norm'] = utenti_df['nome'].apply(normalize)
+    test_df['nome_norm'] = test_df['nome'].apply(normalize)
+
+    livello_mapping = {"base": 1, "principiante": 2, "intermedio": 3, "buono": 4, "elite": 5}
+    livelli_val = livello_mapping
+
+    nomi_atleti = utenti_df[utenti_df['ruolo'] == 'atleta']['nome'].unique()
+    nomi_atleti_norm = [normalize(n) for n in nomi_atleti]  # inutilizzata, come nell'originale
+    atleta_radar = normalize(atleta_radar_vis)
+
+    test_atleta = test_df[test_df['nome_norm'] == atleta_radar]  # riga di debug dell'originale
+
+    tutte_categorie = esercizi_df["categoria"].unique()
+    radar_labels = []
+    radar_values = []
+
+    for categoria in tutte_categorie:
+        cat_norm = normalize(categoria)
+        esercizi_cat = esercizi_df[esercizi_df['categoria_norm'] == cat_norm]['esercizio_norm']
+        test_cat = test_df[(test_df['nome_norm'] == atleta_radar) & (test_df['esercizio_norm'].isin(esercizi_cat))]
+        livelli_cat = []
+        for _, row in test_cat.iterrows():
+            livelli_cat.append(_livello_riga(row, benchmark_df, livelli_val))
+        if livelli_cat:
+            radar_labels.append(categoria.capitalize())
+            radar_values.append(round(sum(livelli_cat) / len(livelli_cat), 2))
+    return radar_labels, radar_values
+
+
+def radar_generale(test_df, esercizi_df, benchmark_df, utenti_df):
+    """mostra_grafico_radar_generale: (etichette, valori) del radar del box intero."""
+    esercizi_df['categoria_norm'] = esercizi_df['categoria'].apply(normalize)
+    esercizi_df['esercizio_norm'] = esercizi_df['esercizio'].apply(normalize)
+    test_df['esercizio_norm'] = test_df['esercizio'].apply(normalize)
+    benchmark_df['esercizio_norm'] = benchmark_df['esercizio'].apply(normalize)
+
+    livello_mapping = {"base": 1, "principiante": 2, "intermedio": 3, "buono": 4, "elite": 5}
+    livelli_val = livello_mapping
+
+    tutte_categorie = esercizi_df["categoria"].unique()
+    radar_labels = []
+    radar_values = []
+
+    for categoria in tutte_categorie:
+        cat_norm = normalize(categoria)
+        esercizi_cat = esercizi_df[esercizi_df['categoria_norm'] == cat_norm]['esercizio_norm']
+        test_cat = test_df[test_df['esercizio_norm'].isin(esercizi_cat)]
+        livelli_cat = []
+        for _, row in test_cat.iterrows():
+            livelli_cat.append(_livello_riga(row, benchmark_df, livelli_val))
+        if livelli_cat:
+            radar_labels.append(categoria.capitalize())
+            radar_values.append(round(sum(livelli_cat) / len(livelli_cat), 2))
+    return radar_labels, radar_values
+
+
+def prepara_dati(utenti_df, esercizi_df, test_df, benchmark_df, wod_df):
+    """aggiorna_tutti_i_dati senza i caricamenti: normalizzazione e merge sui fogli già scaricati."""
+    esercizi_df["categoria_norm"] = esercizi_df["categoria"].astype(str).str.strip().str.lower().str.replace(" ", "")
+    esercizi_df["esercizio_norm"] = esercizi_df["esercizio"].astype(str).str.strip().str.lower().str.replace(" ", "")
+    test_df["esercizio_norm"] = test_df["esercizio"].astype(str).str.strip().str.lower().str.replace(" ", "")
+    benchmark_df["esercizio_norm"] = benchmark_df["esercizio"].astype(str).str.strip().str.lower().str.replace(" ", "")
+    benchmark_df["categoria_norm"] = benchmark_df["esercizio"].map(
+        lambda e: esercizi_df.set_index("esercizio")["categoria"].get(e, "") if e in esercizi_df["esercizio"].values else ""
+    ).astype(str).str.strip().str.lower().str.replace(" ", "")
+
+    # Normalizzazione colonne e valori
+    test_df.columns = [str(col).strip().lower() for col in test_df.columns]
+    esercizi_df.columns = [str(col).strip().lower() for col in esercizi_df.columns]
+    benchmark_df.columns = [str(col).strip().lower() for col in benchmark_df.columns]
+    # --- AGGIUNGI colonne normalizzate ---
+    if "esercizio" in benchmark_df.columns:
+        benchmark_df["esercizio_norm"] = benchmark_df["esercizio"].apply(_normalize_ssg)
+    if "categoria" in benchmark_df.columns:
+        benchmark_df["categoria_norm"] = benchmark_df["categoria"].apply(_normalize_ssg)
+    if "esercizio" in test_df.columns:
+        test_df["esercizio_norm"] = test_df["esercizio"].apply(_normalize_ssg)
+    if "categoria" in test_df.columns:
+        test_df["categoria_norm"] = test_df["categoria"].apply(_normalize_ssg)
+    if "esercizio" in esercizi_df.columns:
+        esercizi_df["esercizio_norm"] = esercizi_df["esercizio"].apply(_normalize_ssg)
+    if "categoria" in esercizi_df.columns:
+        esercizi_df["categoria_norm"] = esercizi_df["categoria"].apply(_normalize_ssg)
+
+    # --- RIMUOVI eventuali colonne duplicate PRIMA del merge! ---
+    colonne_da_rimuovere = ['categoria', 'categoria_norm']
+    for col in colonne_da_rimuovere:
+        if col in test_df.columns:
+            test_df = test_df.drop(columns=[col])
+
+    # --- merge su colonne normalizzate ---
+    test_df = test_df.merge(
+        esercizi_df[['esercizio_norm', 'categoria', 'categoria_norm']],
+        how='left',
+        left_on='esercizio_norm',
+        right_on='esercizio_norm'
+    )
+    return utenti_df, esercizi_df, test_df, benchmark_df, wod_df
+
+
+def classifica_wod(test_df, wod_selezionato, esercizi_df, genere_selezionato="Tutti"):
+    """mostra_classifica_wod: la tabella della classifica di un WOD."""
+    tipo_valore = esercizi_df[esercizi_df['esercizio'] == wod_selezionato]['tipo_valore'].values[0]
+    classifica = test_df[test_df['esercizio'] == wod_selezionato].copy()
+
+    if tipo_valore == 'tempo':
+        def tempo_to_sec(x):
+            try:
+                m, s = map(int, str(x).split(":"))
+                return m * 60 + s
+            except:
+                return None
+        classifica['valore_sec'] = classifica['valore'].apply(tempo_to_sec)
+        classifica = classifica.sort_values('valore_sec')
+    else:
+        classifica['valore_num'] = pd.to_numeric(classifica['valore'], errors='coerce')
+        classifica = classifica.sort_values('valore_num', ascending=False)
+
+    if genere_selezionato != "Tutti":
+        classifica = classifica[classifica['genere'] == genere_selezionato]
+
+    return classifica[['nome', 'valore', 'data', 'genere']].reset_index(drop=True)
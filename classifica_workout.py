@@ -1,27 +1,28 @@
 import streamlit as st
 import pandas as pd
+from fitness_app.chiavi import ESERCIZI
+from fitness_app.schema_dati import formatta_data
 
-def mostra_classifica_wod(test_df, wod_selezionato, esercizi_df):
-    st.header(f"Classifica: {wod_selezionato}")
-    tipo_valore = esercizi_df[esercizi_df['esercizio'] == wod_selezionato]['tipo_valore'].values[0]
-    classifica = test_df[test_df['esercizio'] == wod_selezionato].copy()
-
-    if tipo_valore == 'tempo':
-        def tempo_to_sec(x):
-            try:
-                m, s = map(int, str(x).split(":"))
-                return m * 60 + s
-            except:
-                return None
-        classifica['valore_sec'] = classifica['valore'].apply(tempo_to_sec)
-        classifica = classifica.sort_values('valore_sec')
-    else:
-        classifica['valore_num'] = pd.to_numeric(classifica['valore'], errors='coerce')
-        classifica = classifica.sort_values('valore_num', ascending=False)
+# Finestre temporali proposte: giorni all'indietro da oggi (None = tutto lo storico)
+FINESTRE = {"Sempre": None, "Ultimi 30 giorni": 30, "Ultimi 90 giorni": 90, "Ultimo anno": 365}
 
-    genere_selezionato = st.selectbox("Seleziona genere", ["Tutti", "Maschio", "Femmina"])
-    if genere_selezionato != "Tutti":
-        classifica = classifica[classifica['genere'] == genere_selezionato]
-
-    st.dataframe(classifica[['nome', 'valore', 'data', 'genere']].reset_index(drop=True))
+@st.fragment
+def mostra_classifica_wod(indice_wod, wod_selezionato):
+    """
+    Classifica del WOD (miglior risultato per atleta) letta dall'indice indice_wod.IndiceWod.
+    È un fragment: cambiare genere o periodo rigira solo questa classifica, non tutta l'app.
+    """
+    st.header(f"Classifica: {wod_selezionato}")
+    col_genere, col_finestra = st.columns(2)
+    genere_selezionato = col_genere.selectbox("Seleziona genere", ["Tutti", "Maschio", "Femmina"])
+    finestra = col_finestra.selectbox("Periodo", list(FINESTRE))
 
+    giorni = FINESTRE[finestra]
+    dal = None if giorni is None else pd.Timestamp.today().normalize() - pd.Timedelta(days=giorni)
+    classifica = indice_wod.classifica(
+        ESERCIZI.id(wod_selezionato),
+        genere=None if genere_selezionato == "Tutti" else genere_selezionato,
+        dal=dal,
+    )
+    classifica = classifica.assign(data=classifica["data"].map(formatta_data))
+    st.dataframe(classifica.set_index("posizione"))
@@ -1,83 +1,100 @@
 import streamlit as st
 import pandas as pd
-import gspread
-from google.oauth2 import service_account
+from fitness_app import archivio
+from fitness_app.chiavi import COLONNE_ID
+from fitness_app.dataset import DATASET, con_esercizi
+from fitness_app.righe import COLONNA_ID, assicura_id, nuovo_id, riga
 
-# --- CREDENZIALI GOOGLE ---
-SCOPE = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
-SERVICE_ACCOUNT_INFO = st.secrets["SERVICE_ACCOUNT_JSON"]
-creds = service_account.Credentials.from_service_account_info(
-    SERVICE_ACCOUNT_INFO,
-    scopes=SCOPE
-)
-client = gspread.authorize(creds)
-
-NOME_FILE = "esercizi"       # Cambia con il nome esatto del tuo file Google
 SHEET_NAME = "esercizi"      # Cambia con il nome esatto del foglio/tabella
+TIPI_VALORE = ["kg_rel", "reps", "tempo", "altro"]
+# Colonne calcolate al caricamento (id interi e chiavi normalizzate): non si mostrano
+COLONNE_DERIVATE = [col for col_id, col_norm, _ in COLONNE_ID.values() for col in (col_id, col_norm) if col]
 
+# L'archivio (Google Sheets, locale o sincronizzato) viene configurato da ssg.py all'avvio
 def carica_esercizi():
-    sh = client.open(NOME_FILE)
-    worksheet = sh.worksheet(SHEET_NAME)
-    data = worksheet.get_all_records()
-    return pd.DataFrame(data)
+    """
+    Catalogo dallo snapshot condiviso dei dati (nessuna lettura del foglio a ogni interazione);
+    solo se i dati non sono ancora stati caricati si legge dall'archivio.
+    """
+    dati = DATASET.corrente()
+    if dati is not None:
+        return dati.esercizi_df
+    # Ogni riga ha il suo id_riga: modifiche ed eliminazioni toccano solo quella riga
+    archivio_dati = archivio.get_archivio()
+    return assicura_id(archivio_dati, SHEET_NAME, archivio_dati.leggi(SHEET_NAME))
+
+# --- Azioni (callback dei pulsanti: girano prima del rerun, quindi la pagina si ridisegna
+# già con il catalogo aggiornato, senza st.rerun) ---
+def _aggiorna_catalogo(**modifiche):
+    if DATASET.corrente() is not None:
+        DATASET.aggiorna(con_esercizi(**modifiche))
+
+def _aggiungi():
+    nuovo = pd.DataFrame([{
+        "categoria": st.session_state["nuovo_categoria"],
+        "esercizio": st.session_state["nuovo_esercizio"],
+        "tipo_valore": st.session_state["nuovo_tipo_valore"],
+        COLONNA_ID: nuovo_id(),
+    }])
+    archivio.get_archivio().aggiungi(SHEET_NAME, nuovo)
+    _aggiorna_catalogo(aggiunti=nuovo)
+    st.session_state["esito_esercizi"] = ("success", "Esercizio aggiunto con successo!")
 
-def salva_esercizi(df):
-    sh = client.open(NOME_FILE)
-    worksheet = sh.worksheet(SHEET_NAME)
-    worksheet.clear()
-    worksheet.update([df.columns.values.tolist()] + df.fillna("").values.tolist())
+def _modifica(id_riga):
+    # Solo le tre celle della riga con quell'id
+    modifiche = pd.DataFrame([{
+        COLONNA_ID: id_riga,
+        "categoria": st.session_state[f"mod_categoria_{id_riga}"],
+        "esercizio": st.session_state[f"mod_esercizio_{id_riga}"],
+        "tipo_valore": st.session_state[f"mod_tipo_valore_{id_riga}"],
+    }])
+    archivio.get_archivio().aggiorna_righe(SHEET_NAME, modifiche)
+    _aggiorna_catalogo(modificati=modifiche)
+    st.session_state["esito_esercizi"] = ("success", "Esercizio modificato!")
+
+def _elimina(id_riga):
+    archivio.get_archivio().elimina_righe(SHEET_NAME, [id_riga])
+    _aggiorna_catalogo(eliminati=[id_riga])
+    st.session_state["esito_esercizi"] = ("warning", "Esercizio eliminato!")
 
 def mostra_gestione_esercizi():
     st.title("⚙️ Gestione Esercizi")
     df = carica_esercizi()
+    dati = DATASET.corrente()
+    if dati is not None:
+        st.caption(f"Catalogo dalla versione {dati.versione} dei dati")
+
+    esito = st.session_state.pop("esito_esercizi", None)
+    if esito:
+        getattr(st, esito[0])(esito[1])
 
     # --- Visualizza tabella esercizi ---
-    st.dataframe(df)
+    st.dataframe(df.drop(columns=[c for c in COLONNE_DERIVATE if c in df.columns]))
 
     # --- Aggiungi nuovo esercizio ---
     st.markdown("### ➕ Aggiungi nuovo esercizio")
     with st.form("aggiungi_esercizio"):
-        categoria = st.text_input("Categoria")
-        esercizio = st.text_input("Nome esercizio")
-        tipo_valore = st.selectbox("Tipo valore", ["kg_rel", "reps", "tempo", "altro"])
-        submitted = st.form_submit_button("Aggiungi")
-        if submitted:
-            nuovo = {
-                "categoria": categoria,
-                "esercizio": esercizio,
-                "tipo_valore": tipo_valore
-            }
-            df = pd.concat([df, pd.DataFrame([nuovo])], ignore_index=True)
-            salva_esercizi(df)
-            st.success("Esercizio aggiunto con successo!")
-            st.rerun()
+        st.text_input("Categoria", key="nuovo_categoria")
+        st.text_input("Nome esercizio", key="nuovo_esercizio")
+        st.selectbox("Tipo valore", TIPI_VALORE, key="nuovo_tipo_valore")
+        st.form_submit_button("Aggiungi", on_click=_aggiungi)
+
+    etichette = dict(zip(df[COLONNA_ID].astype(str), df["categoria"].astype(str) + " - " + df["esercizio"].astype(str))) if not df.empty else {}
 
     # --- Modifica esercizio ---
     st.markdown("### ✏️ Modifica esercizio")
-    if not df.empty:
-        idx = st.selectbox("Seleziona esercizio da modificare", df.index, format_func=lambda i: f"{df.loc[i, 'categoria']} - {df.loc[i, 'esercizio']}")
+    if etichette:
+        id_mod = st.selectbox("Seleziona esercizio da modificare", list(etichette), format_func=etichette.get)
+        row = riga(df, id_mod)
+        # Chiavi per riga: cambiando esercizio i campi ripartono dai suoi valori
         with st.form("modifica_esercizio"):
-            new_categoria = st.text_input("Categoria", value=df.loc[idx, "categoria"])
-            new_esercizio = st.text_input("Nome esercizio", value=df.loc[idx, "esercizio"])
-            new_tipo_valore = st.selectbox("Tipo valore", ["kg_rel", "reps", "tempo", "altro"], index=["kg_rel", "reps", "tempo", "altro"].index(df.loc[idx, "tipo_valore"]) if df.loc[idx, "tipo_valore"] in ["kg_rel", "reps", "tempo", "altro"] else 0)
-            submit_mod = st.form_submit_button("Modifica")
-            if submit_mod:
-                df.loc[idx, "categoria"] = new_categoria
-                df.loc[idx, "esercizio"] = new_esercizio
-                df.loc[idx, "tipo_valore"] = new_tipo_valore
-                salva_esercizi(df)
-                st.success("Esercizio modificato!")
-                st.rerun()
+            st.text_input("Categoria", value=row["categoria"], key=f"mod_categoria_{id_mod}")
+            st.text_input("Nome esercizio", value=row["esercizio"], key=f"mod_esercizio_{id_mod}")
+            st.selectbox("Tipo valore", TIPI_VALORE, index=TIPI_VALORE.index(row["tipo_valore"]) if row["tipo_valore"] in TIPI_VALORE else 0, key=f"mod_tipo_valore_{id_mod}")
+            st.form_submit_button("Modifica", on_click=_modifica, args=(id_mod,))
 
     # --- Elimina esercizio ---
     st.markdown("### 🗑️ Elimina esercizio")
-    if not df.empty:
-        idx_del = st.selectbox("Seleziona esercizio da eliminare", df.index, format_func=lambda i: f"{df.loc[i, 'categoria']} - {df.loc[i, 'esercizio']}", key="elimina")
-        if st.button("Elimina", key="delete_button"):
-            df = df.drop(idx_del).reset_index(drop=True)
-            salva_esercizi(df)
-            st.warning("Esercizio eliminato!")
-            st.rerun()
+    if etichette:
+        id_del = st.selectbox("Seleziona esercizio da eliminare", list(etichette), format_func=etichette.get, key="elimina")
+        st.button("Elimina", key="delete_button", on_click=_elimina, args=(id_del,))
@@ -0,0 +1,10 @@
+# --- NUCLEO DELL'APP (senza Streamlit) ---
+# Caricamento, normalizzazione, livelli e classifiche: importabile da script, benchmark
+# e processi di lavoro senza secrets né rete. Le pagine Streamlit (ssg.py, graficicoach.py,
+# classifica_workout.py, esercizi.py) sono viste sopra questi moduli.
+# I sottomoduli non si importano qui, così "import fitness_app" resta immediato:
+#
+#   from fitness_app import archivio, preparazione
+#   archivio_dati = archivio.configura("locale")
+#   dati, tempi, errori = preparazione.carica_dati(archivio_dati)
+#   pronti = preparazione.prepara_fogli(dati)
@@ -0,0 +1,881 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from . import cache_arrow
+from .caricamento import FOGLI
+from .coda_scritture import PERCORSO_CODA, CodaScritture
+from .connessione_google import PoolFogli
+from .diagnostica import span
+from .righe import COLONNA_ID, COLONNA_POSIZIONE, FOGLI_CON_ID, aggiorna_per_id, assegna_per_posizione, con_id, elimina_per_id
+
+# --- ARCHIVIO DATI ---
+# Ogni "foglio" (utenti, esercizi, test, benchmark, wod) è una tabella.
+# I backend espongono le stesse operazioni, così le pagine non sanno dove stanno i dati:
+# - ArchivioGoogleSheets: Google Sheets via gspread (comportamento storico)
+# - ArchivioDifferito: Google Sheets con le scritture nella coda persistente (coda_scritture)
+# - ArchivioLocale: file SQLite su disco, funziona anche offline
+# - ArchivioSincronizzato: legge/scrive in locale e replica su Google Sheets in background
+# - ArchivioInCache: cache in memoria + su disco davanti a uno qualsiasi dei precedenti
+
+MODALITA = ("sheets", "locale", "sincronizzato")
+PERCORSO_DB = os.environ.get("FITNESS_DB", "./dati/fitness.sqlite")
+CARTELLA_CACHE = os.environ.get("FITNESS_CACHE", "./cache")
+
+
+def df_in_stringhe(df):
+    """Converte tutto in stringhe e sostituisce NaN o None con "" (formato accettato da Sheets)."""
+    df = df.copy()
+    for col in df.columns:
+        df[col] = df[col].apply(lambda x: "" if pd.isna(x) or x is None or (isinstance(x, float) and np.isnan(x)) else str(x))
+
+    return df.fillna("").reset_index(drop=True)
+
+
+def applica_righe(df, righe_df, chiavi=None):
+    """
+    Ritorna df con righe_df applicate: senza chiavi le righe vengono accodate,
+    con chiavi sostituiscono le righe esistenti con la stessa chiave e le altre vengono accodate.
+    """
+    if righe_df.empty:
+        return df
+    if df.empty:
+        return righe_df.reset_index(drop=True)
+    if chiavi:
+        def chiave(d):
+            return d[chiavi].astype(str).apply(lambda c: c.str.strip()).apply(tuple, axis=1)
+        esistenti = dict(zip(chiave(df), df.index))
+        df = df.copy()
+        for col in righe_df.columns.difference(df.columns):
+            df[col] = None
+        nuove = []
+        for pos, k in enumerate(chiave(righe_df)):
+            if k in esistenti:
+                df.loc[esistenti[k], righe_df.columns] = righe_df.iloc[pos].values
+            else:
+                nuove.append(pos)
+        righe_df = righe_df.iloc[nuove]
+        if righe_df.empty:
+            return df
+    return pd.concat([df, righe_df], ignore_index=True)
+
+
+class Archivio:
+    """Interfaccia comune dei backend di archiviazione."""
+
+    nome_backend = "base"
+
+    def leggi(self, nome):
+        """Ritorna l'intera tabella come DataFrame."""
+        raise NotImplementedError
+
+    def scrivi(self, nome, df):
+        """Riscrive l'intera tabella."""
+        raise NotImplementedError
+
+    def aggiungi(self, nome, righe_df):
+        """Accoda solo le righe nuove."""
+        raise NotImplementedError
+
+    def upsert(self, nome, righe_df, chiavi):
+        """Aggiorna le righe con la stessa chiave e accoda le altre."""
+        raise NotImplementedError
+
+    def aggiorna_righe(self, nome, modifiche_df):
+        """Scrive solo le celle di modifiche_df (id_riga + colonne cambiate) nelle righe con quell'id."""
+        raise NotImplementedError
+
+    def elimina_righe(self, nome, id_righe):
+        """Elimina le righe con quegli id_riga."""
+        raise NotImplementedError
+
+    def assegna_id(self, nome, id_df):
+        """
+        Scrive gli id_riga di id_df (posizione + id, vedi righe.id_mancanti) solo nelle celle
+        id ancora vuote di quelle righe; il resto della tabella non si tocca.
+        """
+        raise NotImplementedError
+
+    def versione(self, nome):
+        """Identificativo della revisione corrente della tabella (None se non si sa)."""
+        return None
+
+
+# --- BACKEND GOOGLE SHEETS ---
+def _lettera(col):
+    """Lettera della colonna (1 -> A, 27 -> AA)."""
+    import gspread
+
+    return gspread.utils.rowcol_to_a1(1, col).rstrip("1")
+
+
+class ArchivioGoogleSheets(Archivio):
+    """Una tabella = file Google Sheets con lo stesso nome e worksheet omonimo."""
+
+    nome_backend = "sheets"
+
+    def __init__(self, client_factory):
+        # File e worksheet già aperti si riusano (vedi connessione_google.PoolFogli)
+        self.pool = PoolFogli(client_factory)
+        self._righe_id = {}  # {foglio: {id_riga: numero di riga sul foglio}}, vedi _numeri_riga
+        self._lock_righe = threading.Lock()
+
+    @contextmanager
+    def _maniglie_valide(self, nome):
+        """Se una chiamata fallisce le maniglie del file vengono scartate e riaperte la volta dopo."""
+        try:
+            yield
+        except Exception:
+            self.pool.invalida(nome)
+            raise
+
+    def _worksheet(self, nome, crea=True):
+        import gspread
+
+        try:
+            return self.pool.foglio(nome, nome)
+        except gspread.exceptions.WorksheetNotFound:
+            if not crea:
+                raise
+            worksheet = self.pool.file(nome).add_worksheet(title=nome, rows=100, cols=20)
+            self.pool.memorizza_foglio(nome, nome, worksheet)
+            return worksheet
+
+    def leggi(self, nome):
+        import gspread
+
+        with self._maniglie_valide(nome):
+            try:
+                worksheet = self.pool.foglio(nome, nome)
+            except gspread.exceptions.WorksheetNotFound:
+                # Come prima: si ripiega sulla prima worksheet del file
+                worksheet = self.pool.file(nome).get_worksheet(0)
+            return pd.DataFrame(worksheet.get_all_records())
+
+    def versione(self, nome):
+        # modifiedTime del file su Drive: una chiamata leggera al posto dello scaricamento completo
+        with self._maniglie_valide(nome):
+            return self.pool.file(nome).get_lastUpdateTime()
+
+    def scrivi(self, nome, df):
+        df = df_in_stringhe(df)
+        with self._maniglie_valide(nome):
+            worksheet = self._worksheet(nome)
+            worksheet.clear()
+            worksheet.update([df.columns.values.tolist()] + df.values.tolist())
+
+    def _allinea_intestazione(self, worksheet, colonne):
+        """Ritorna l'intestazione del foglio, aggiungendo in coda le colonne che mancano."""
+        intestazione = worksheet.row_values(1)
+        mancanti = [c for c in colonne if c not in intestazione]
+        if mancanti:
+            intestazione = intestazione + mancanti
+            if worksheet.col_count < len(intestazione):
+                worksheet.add_cols(len(intestazione) - worksheet.col_count)
+            worksheet.update([intestazione], "A1")
+        return intestazione
+
+    def aggiungi(self, nome, righe_df):
+        if righe_df.empty:
+            return
+        with self._maniglie_valide(nome):
+            worksheet = self._worksheet(nome)
+            intestazione = self._allinea_intestazione(worksheet, list(righe_df.columns))
+            valori = df_in_stringhe(righe_df).reindex(columns=intestazione, fill_value="")
+            # Un'unica append lato Google: due coach che salvano insieme non si sovrascrivono
+            worksheet.append_rows(valori.values.tolist(), value_input_option="RAW", table_range="A1")
+
+    def upsert(self, nome, righe_df, chiavi):
+        if righe_df.empty:
+            return
+        with self._maniglie_valide(nome):
+            self._upsert(self._worksheet(nome), righe_df, chiavi)
+
+    def _numeri_riga(self, nome, worksheet, colonna_id, id_righe):
+        """
+        {id_riga: numero di riga sul foglio}. La mappa resta in memoria e per confermarla
+        si leggono solo le celle id delle righe cercate; la colonna id intera si rilegge
+        solo se manca un id o una cella non torna (righe spostate da altri).
+        """
+        with self._lock_righe:
+            mappa = self._righe_id.get(nome)
+        if mappa is not None and all(i in mappa for i in id_righe):
+            celle = worksheet.batch_get([f"{colonna_id}{mappa[i]}" for i in id_righe])
+            if all(c and c[0] and str(c[0][0]).strip() == i for c, i in zip(celle, id_righe)):
+                return mappa
+        valori = worksheet.batch_get([f"{colonna_id}2:{colonna_id}"])[0]
+        mappa = {str(v[0]).strip(): n for n, v in enumerate(valori, start=2) if v and str(v[0]).strip()}
+        with self._lock_righe:
+            self._righe_id[nome] = mappa
+        return mappa
+
+    def aggiorna_righe(self, nome, modifiche_df):
+        if modifiche_df.empty:
+            return
+        with self._maniglie_valide(nome):
+            worksheet = self._worksheet(nome, crea=False)
+            intestazione = self._allinea_intestazione(worksheet, list(modifiche_df.columns))
+            valori = df_in_stringhe(modifiche_df)
+            id_righe = valori[COLONNA_ID].str.strip().tolist()
+            mappa = self._numeri_riga(nome, worksheet, _lettera(intestazione.index(COLONNA_ID) + 1), id_righe)
+            colonne = [c for c in valori.columns if c != COLONNA_ID]
+            celle = [
+                {"range": f"{_lettera(intestazione.index(c) + 1)}{mappa[i]}", "values": [[v]]}
+                for i, riga in zip(id_righe, valori[colonne].values.tolist()) if i in mappa
+                for c, v in zip(colonne, riga)
+            ]
+            # Un'unica chiamata con le sole celle cambiate
+            if celle:
+                worksheet.batch_update(celle, value_input_option="RAW")
+
+    def elimina_righe(self, nome, id_righe):
+        id_righe = [str(i).strip() for i in id_righe]
+        if not id_righe:
+            return
+        with self._maniglie_valide(nome):
+            worksheet = self._worksheet(nome, crea=False)
+            intestazione = worksheet.row_values(1)
+            if COLONNA_ID not in intestazione:
+                return
+            mappa = self._numeri_riga(nome, worksheet, _lettera(intestazione.index(COLONNA_ID) + 1), id_righe)
+            numeri = sorted({mappa[i] for i in id_righe if i in mappa}, reverse=True)
+            if not numeri:
+                return
+            # Dal basso verso l'alto, tutte nella stessa batch_update: le righe sopra non si spostano
+            worksheet.spreadsheet.batch_update({"requests": [
+                {"deleteDimension": {"range": {
+                    "sheetId": worksheet.id, "dimension": "ROWS", "startIndex": n - 1, "endIndex": n,
+                }}}
+                for n in numeri
+            ]})
+            with self._lock_righe:
+                # Le righe sotto quelle eliminate salgono: si riallinea la mappa in memoria
+                self._righe_id[nome] = {
+                    i: n - sum(1 for e in numeri if e < n)
+                    for i, n in mappa.items() if n not in numeri
+                }
+
+    def assegna_id(self, nome, id_df):
+        if id_df.empty:
+            return
+        with self._maniglie_valide(nome):
+            worksheet = self._worksheet(nome, crea=False)
+            intestazione = self._allinea_intestazione(worksheet, [COLONNA_ID])
+            lettera = _lettera(intestazione.index(COLONNA_ID) + 1)
+            # Si rilegge solo la colonna id: una cella già piena (riga scritta da altri) non si sovrascrive
+            valori = worksheet.batch_get([f"{lettera}2:{lettera}"])[0]
+            celle = [
+                {"range": f"{lettera}{posizione + 2}", "values": [[id_riga]]}
+                for posizione, id_riga in zip(id_df[COLONNA_POSIZIONE].tolist(), id_df[COLONNA_ID].tolist())
+                if not (posizione < len(valori) and valori[posizione] and str(valori[posizione][0]).strip())
+            ]
+            if celle:
+                worksheet.batch_update(celle, value_input_option="RAW")
+
+    def _upsert(self, worksheet, righe_df, chiavi):
+        intestazione = self._allinea_intestazione(worksheet, list(righe_df.columns))
+        valori = df_in_stringhe(righe_df).reindex(columns=intestazione, fill_value="")
+        lettera = _lettera
+
+        # Dal foglio si leggono solo le colonne chiave
+        intervalli = [f"{lettera(intestazione.index(c) + 1)}2:{lettera(intestazione.index(c) + 1)}" for c in chiavi]
+        colonne_chiave = worksheet.batch_get(intervalli)
+        n_righe = max((len(c) for c in colonne_chiave), default=0)
+        righe_foglio = {}
+        for i in range(n_righe):
+            chiave = tuple(
+                str(c[i][0]).strip() if i < len(c) and c[i] else ""
+                for c in colonne_chiave
+            )
+            righe_foglio.setdefault(chiave, i + 2)
+
+        ultima_colonna = lettera(len(intestazione))
+        modifiche, nuove = [], []
+        for riga in valori.values.tolist():
+            chiave = tuple(str(riga[intestazione.index(c)]).strip() for c in chiavi)
+            if chiave in righe_foglio:
+                n = righe_foglio[chiave]
+                modifiche.append({"range": f"A{n}:{ultima_colonna}{n}", "values": [riga]})
+            else:
+                nuove.append(riga)
+        if modifiche:
+            worksheet.batch_update(modifiche, value_input_option="RAW")
+        if nuove:
+            worksheet.append_rows(nuove, value_input_option="RAW", table_range="A1")
+
+
+# --- BACKEND LOCALE (SQLite) ---
+def _valore_sql(x):
+    """Valore Python adatto a SQLite: NaN/None diventano "" come su Sheets."""
+    if x is None or (isinstance(x, float) and np.isnan(x)) or x is pd.NaT:
+        return ""
+    if isinstance(x, np.generic):
+        return x.item()
+    if isinstance(x, (int, float, str)):
+        return x
+    return str(x)
+
+
+class ArchivioLocale(Archivio):
+    """
+    Tabelle in un file SQLite. Le colonne non hanno tipo dichiarato, quindi ogni cella
+    torna indietro con il suo tipo (int, float, str) proprio come get_all_records.
+    """
+
+    nome_backend = "locale"
+
+    def __init__(self, percorso=PERCORSO_DB):
+        self.percorso = percorso
+        cartella = os.path.dirname(percorso)
+        if cartella:
+            os.makedirs(cartella, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _connetti(self):
+        return sqlite3.connect(self.percorso, timeout=30)
+
+    def _nuova_versione(self, conn, nome):
+        """Ogni scrittura incrementa il contatore della tabella (vedi versione())."""
+        conn.execute("CREATE TABLE IF NOT EXISTS _versioni (nome TEXT PRIMARY KEY, versione INTEGER)")
+        conn.execute(
+            "INSERT INTO _versioni (nome, versione) VALUES (?, 1) "
+            "ON CONFLICT(nome) DO UPDATE SET versione = versione + 1", (nome,)
+        )
+
+    def versione(self, nome):
+        with self._connetti() as conn:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='_versioni'").fetchone():
+                return None
+            riga = conn.execute("SELECT versione FROM _versioni WHERE nome = ?", (nome,)).fetchone()
+        return riga[0] if riga else None
+
+    @staticmethod
+    def _q(nome):
+        return '"' + str(nome).replace('"', '""') + '"'
+
+    def esiste(self, nome):
+        with self._connetti() as conn:
+            riga = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (nome,)).fetchone()
+        return riga is not None
+
+    def _colonne(self, conn, nome):
+        return [r[1] for r in conn.execute(f"PRAGMA table_info({self._q(nome)})")]
+
+    def _assicura_colonne(self, conn, nome, colonne):
+        esistenti = self._colonne(conn, nome)
+        if not esistenti:
+            definizioni = ", ".join(f"{self._q(c)} DEFAULT ''" for c in colonne)
+            conn.execute(f"CREATE TABLE {self._q(nome)} ({definizioni})")
+            return list(colonne)
+        for col in colonne:
+            if col not in esistenti:
+                conn.execute(f"ALTER TABLE {self._q(nome)} ADD COLUMN {self._q(col)} DEFAULT ''")
+                esistenti.append(col)
+        return esistenti
+
+    def _inserisci(self, conn, nome, righe_df):
+        colonne = [str(c) for c in righe_df.columns]
+        segnaposto = ", ".join("?" for _ in colonne)
+        conn.executemany(
+            f"INSERT INTO {self._q(nome)} ({', '.join(self._q(c) for c in colonne)}) VALUES ({segnaposto})",
+            [[_valore_sql(v) for v in riga] for riga in righe_df.itertuples(index=False, name=None)],
+        )
+
+    def leggi(self, nome):
+        if not self.esiste(nome):
+            return pd.DataFrame()
+        with self._connetti() as conn:
+            return pd.read_sql_query(f"SELECT * FROM {self._q(nome)} ORDER BY rowid", conn)
+
+    def scrivi(self, nome, df):
+        with self._lock, self._connetti() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {self._q(nome)}")
+            self._assicura_colonne(conn, nome, [str(c) for c in df.columns])
+            self._inserisci(conn, nome, df)
+            self._nuova_versione(conn, nome)
+
+    def aggiungi(self, nome, righe_df):
+        if righe_df.empty:
+            return
+        with self._lock, self._connetti() as conn:
+            self._assicura_colonne(conn, nome, [str(c) for c in righe_df.columns])
+            self._inserisci(conn, nome, righe_df)
+            self._nuova_versione(conn, nome)
+
+    def upsert(self, nome, righe_df, chiavi):
+        if righe_df.empty:
+            return
+        with self._lock, self._connetti() as conn:
+            self._assicura_colonne(conn, nome, [str(c) for c in righe_df.columns])
+            colonne = [str(c) for c in righe_df.columns]
+            assegna = ", ".join(f"{self._q(c)} = ?" for c in colonne)
+            filtro = " AND ".join(f"trim(CAST({self._q(k)} AS TEXT)) = ?" for k in chiavi)
+            nuove = []
+            for pos, riga in enumerate(righe_df.itertuples(index=False, name=None)):
+                valori = [_valore_sql(v) for v in riga]
+                chiave = [str(righe_df.iloc[pos][k]).strip() for k in chiavi]
+                cur = conn.execute(f"UPDATE {self._q(nome)} SET {assegna} WHERE {filtro}", valori + chiave)
+                if cur.rowcount == 0:
+                    nuove.append(pos)
+            if nuove:
+                self._inserisci(conn, nome, righe_df.iloc[nuove])
+            self._nuova_versione(conn, nome)
+
+    def _indice_id(self, conn, nome):
+        # Indice SQLite su id_riga: modifiche ed eliminazioni trovano la riga senza scorrere la tabella
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {self._q('idx_' + nome + '_' + COLONNA_ID)} "
+                     f"ON {self._q(nome)} ({self._q(COLONNA_ID)})")
+
+    def aggiorna_righe(self, nome, modifiche_df):
+        colonne = [str(c) for c in modifiche_df.columns if c != COLONNA_ID]
+        if modifiche_df.empty or not colonne or not self.esiste(nome):
+            return
+        with self._lock, self._connetti() as conn:
+            self._assicura_colonne(conn, nome, [str(c) for c in modifiche_df.columns])
+            self._indice_id(conn, nome)
+            assegna = ", ".join(f"{self._q(c)} = ?" for c in colonne)
+            conn.executemany(
+                f"UPDATE {self._q(nome)} SET {assegna} WHERE {self._q(COLONNA_ID)} = ?",
+                [
+                    [_valore_sql(v) for v in valori] + [str(id_riga).strip()]
+                    for id_riga, valori in zip(modifiche_df[COLONNA_ID], modifiche_df[colonne].itertuples(index=False, name=None))
+                ],
+            )
+            self._nuova_versione(conn, nome)
+
+    def elimina_righe(self, nome, id_righe):
+        id_righe = [str(i).strip() for i in id_righe]
+        if not id_righe or not self.esiste(nome):
+            return
+        with self._lock, self._connetti() as conn:
+            if COLONNA_ID not in self._colonne(conn, nome):
+                return
+            self._indice_id(conn, nome)
+            conn.executemany(
+                f"DELETE FROM {self._q(nome)} WHERE {self._q(COLONNA_ID)} = ?",
+                [(i,) for i in id_righe],
+            )
+            self._nuova_versione(conn, nome)
+
+    def assegna_id(self, nome, id_df):
+        if id_df.empty or not self.esiste(nome):
+            return
+        with self._lock, self._connetti() as conn:
+            self._assicura_colonne(conn, nome, [COLONNA_ID])
+            # Posizione = ordine di leggi() (ORDER BY rowid)
+            rowid = [r[0] for r in conn.execute(f"SELECT rowid FROM {self._q(nome)} ORDER BY rowid")]
+            conn.executemany(
+                f"UPDATE {self._q(nome)} SET {self._q(COLONNA_ID)} = ? "
+                f"WHERE rowid = ? AND coalesce(trim(CAST({self._q(COLONNA_ID)} AS TEXT)), '') = ''",
+                [
+                    (id_riga, rowid[posizione])
+                    for posizione, id_riga in zip(id_df[COLONNA_POSIZIONE].tolist(), id_df[COLONNA_ID].tolist())
+                    if posizione < len(rowid)
+                ],
+            )
+            self._nuova_versione(conn, nome)
+
+
+# --- BACKEND CON CODA DI SCRITTURA (Google Sheets in differita) ---
+class ArchivioDifferito(Archivio):
+    """
+    Letture da Google Sheets, scritture nella coda persistente (vedi coda_scritture):
+    la pagina non aspetta la rete e chi legge vede subito anche le scritture non ancora inviate.
+    """
+
+    nome_backend = "sheets"
+
+    def __init__(self, remoto, coda):
+        self.remoto = remoto
+        self.coda = coda
+
+    def in_attesa(self, nome=None):
+        """Numero di scritture non ancora inviate al remoto (per un foglio o in totale)."""
+        return self.coda.in_attesa(nome)
+
+    def stato_coda(self):
+        return self.coda.stato()
+
+    def ricarica(self, nome):
+        return self.leggi(nome)
+
+    def versione(self, nome):
+        # Cambia sia quando cambia il foglio remoto sia quando cambiano le scritture in attesa
+        return f"{self.remoto.versione(nome)}|{self.coda.firma(nome)}"
+
+    def leggi(self, nome):
+        return self.coda.applica_pendenti(nome, self.remoto.leggi(nome))
+
+    def scrivi(self, nome, df):
+        self.coda.accoda(nome, "scrivi", df)
+
+    def aggiungi(self, nome, righe_df):
+        self.coda.accoda(nome, "aggiungi", righe_df)
+
+    def upsert(self, nome, righe_df, chiavi):
+        self.coda.accoda(nome, "upsert", righe_df, chiavi)
+
+    def aggiorna_righe(self, nome, modifiche_df):
+        self.coda.accoda(nome, "aggiorna_righe", modifiche_df)
+
+    def elimina_righe(self, nome, id_righe):
+        self.coda.accoda(nome, "elimina_righe", pd.DataFrame({COLONNA_ID: [str(i) for i in id_righe]}))
+
+    def assegna_id(self, nome, id_df):
+        self.coda.accoda(nome, "assegna_id", id_df)
+
+
+# --- BACKEND SINCRONIZZATO (locale + Google Sheets in background) ---
+class ArchivioSincronizzato(ArchivioDifferito):
+    """
+    Letture e scritture sul backend locale; ogni scrittura viene poi replicata sul remoto
+    dalla coda persistente, nello stesso ordine in cui è stata fatta.
+    Una tabella mai vista in locale viene scaricata dal remoto alla prima lettura.
+    """
+
+    nome_backend = "sincronizzato"
+
+    def __init__(self, locale, remoto, coda):
+        super().__init__(remoto, coda)
+        self.locale = locale
+
+    def ricarica(self, nome):
+        """Riallinea la copia locale al remoto (es. dopo modifiche fatte direttamente sul foglio)."""
+        if self.in_attesa(nome):
+            return self.locale.leggi(nome)
+        df = self.remoto.leggi(nome)
+        self.locale.scrivi(nome, df)
+        return df
+
+    def versione(self, nome):
+        return self.locale.versione(nome) if self.locale.esiste(nome) else None
+
+    def leggi(self, nome):
+        if not self.locale.esiste(nome):
+            return self.ricarica(nome)
+        return self.locale.leggi(nome)
+
+    def scrivi(self, nome, df):
+        self.locale.scrivi(nome, df)
+        super().scrivi(nome, df)
+
+    def aggiungi(self, nome, righe_df):
+        if nome in FOGLI_CON_ID:
+            # Gli id si assegnano prima: copia locale e remoto devono avere gli stessi
+            righe_df, _ = con_id(righe_df)
+        self.locale.aggiungi(nome, righe_df)
+        super().aggiungi(nome, righe_df)
+
+    def upsert(self, nome, righe_df, chiavi):
+        self.locale.upsert(nome, righe_df, chiavi)
+        super().upsert(nome, righe_df, chiavi)
+
+    def aggiorna_righe(self, nome, modifiche_df):
+        self.locale.aggiorna_righe(nome, modifiche_df)
+        super().aggiorna_righe(nome, modifiche_df)
+
+    def elimina_righe(self, nome, id_righe):
+        self.locale.elimina_righe(nome, id_righe)
+        super().elimina_righe(nome, id_righe)
+
+    def assegna_id(self, nome, id_df):
+        self.locale.assegna_id(nome, id_df)
+        super().assegna_id(nome, id_df)
+
+
+# --- CACHE A LIVELLI (memoria → disco → archivio) ---
+class ArchivioInCache(Archivio):
+    """
+    Avvolge un archivio con due livelli di cache: un LRU in memoria condiviso dal processo
+    e una copia su disco per tabella. Una tabella si riscarica solo se la sua versione
+    (vedi Archivio.versione) è cambiata; la versione si ricontrolla al massimo ogni
+    intervallo_controllo secondi. Le scritture di righe (aggiungi, upsert, aggiorna/elimina
+    per id) si applicano anche alla copia in memoria e su disco, senza riscaricare la tabella;
+    una riscrittura completa la invalida.
+    """
+
+    def __init__(self, interno, cartella=CARTELLA_CACHE, capienza=16, intervallo_controllo=30):
+        self.interno = interno
+        self.nome_backend = interno.nome_backend
+        self.cartella = cartella
+        self.capienza = capienza
+        self.intervallo_controllo = intervallo_controllo
+        os.makedirs(cartella, exist_ok=True)
+        self._memoria = OrderedDict()  # nome -> (versione, controllata_il, df)
+        self._lock = threading.Lock()
+        self._scritture = {}  # nome -> lock delle scritture su quella tabella (vedi _scrivi_righe)
+
+    def _lock_scritture(self, nome):
+        with self._lock:
+            return self._scritture.setdefault(nome, threading.Lock())
+
+    def __getattr__(self, attributo):
+        # in_attesa, stato_coda, esiste… restano quelli dell'archivio interno
+        if attributo == "interno":
+            raise AttributeError(attributo)
+        return getattr(self.interno, attributo)
+
+    # --- Livello disco (snapshot Arrow, vedi cache_arrow) ---
+    def _file_dati(self, nome):
+        return os.path.join(self.cartella, f"{nome}{cache_arrow.ESTENSIONE}")
+
+    def _file_versione(self, nome):
+        return os.path.join(self.cartella, f"{nome}.versione.json")
+
+    def _versione_disco(self, nome):
+        try:
+            with open(self._file_versione(nome)) as f:
+                return json.load(f)["versione"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _leggi_disco(self, nome):
+        try:
+            return cache_arrow.leggi_snapshot(self._file_dati(nome))
+        except (OSError, ValueError, KeyError, pa.ArrowException):
+            return None
+
+    def _scrivi_disco(self, nome, versione, df):
+        try:
+            cache_arrow.scrivi_snapshot(self._file_dati(nome), df)
+        except (OSError, pa.ArrowException):
+            # Uno snapshot non scrivibile non deve impedire la lettura
+            return
+        with open(self._file_versione(nome), "w") as f:
+            json.dump({"versione": versione}, f)
+
+    # --- Livello memoria ---
+    def _in_memoria(self, nome):
+        with self._lock:
+            voce = self._memoria.get(nome)
+            if voce is not None:
+                self._memoria.move_to_end(nome)
+            return voce
+
+    def _memorizza(self, nome, versione, df):
+        with self._lock:
+            self._memoria[nome] = (versione, time.monotonic(), df)
+            self._memoria.move_to_end(nome)
+            while len(self._memoria) > self.capienza:
+                self._memoria.popitem(last=False)
+
+    def leggi(self, nome):
+        """Tabella dalla cache (o dall'archivio se è cambiata)."""
+        with span(f"archivio.leggi.{nome}", foglio=nome) as dettagli:
+            df, dettagli["cache"] = self._leggi(nome)
+            dettagli["righe"] = len(df)
+            return df
+
+    def _leggi(self, nome):
+        """(tabella, livello che l'ha servita: memoria, disco, backend o ultima_copia)."""
+        voce = self._in_memoria(nome)
+        if voce is not None and time.monotonic() - voce[1] < self.intervallo_controllo:
+            return voce[2].copy(), "memoria"
+
+        try:
+            versione = self.interno.versione(nome)
+        except Exception:
+            # Versione non disponibile (rete giù): meglio una copia vecchia che niente
+            copia = self.ultima_copia(nome)
+            if copia is None:
+                raise
+            return copia, "ultima_copia"
+        versione = None if versione is None else str(versione)
+
+        if versione is not None:
+            if voce is not None and voce[0] == versione:
+                self._memorizza(nome, versione, voce[2])
+                return voce[2].copy(), "memoria"
+            if self._versione_disco(nome) == versione:
+                df = self._leggi_disco(nome)
+                if df is not None:
+                    self._memorizza(nome, versione, df)
+                    return df.copy(), "disco"
+
+        df = self.interno.leggi(nome)
+        self._memorizza(nome, versione, df)
+        self._scrivi_disco(nome, versione, df)
+        return df.copy(), "backend"
+
+    def ultima_copia(self, nome):
+        """Ultima copia nota (memoria o disco) senza controllare la versione; None se non c'è."""
+        voce = self._in_memoria(nome)
+        if voce is not None:
+            return voce[2].copy()
+        return self._leggi_disco(nome)
+
+    def dimentica(self, nome=None):
+        """Toglie la tabella dalla memoria: alla prossima lettura si ricontrolla la versione."""
+        with self._lock:
+            if nome is None:
+                self._memoria.clear()
+            else:
+                self._memoria.pop(nome, None)
+
+    def invalida(self, nome):
+        """Scarta memoria e versione su disco: la prossima lettura passa dall'archivio."""
+        self.dimentica(nome)
+        try:
+            os.remove(self._file_versione(nome))
+        except OSError:
+            pass
+
+    def ricarica(self, nome):
+        """
+        Refresh manuale: la prossima lettura ricontrolla la versione del foglio.
+        In modalità sincronizzata prima si riallinea la copia locale al remoto.
+        """
+        if isinstance(self.interno, ArchivioSincronizzato):
+            self.interno.ricarica(nome)
+            self.invalida(nome)
+        else:
+            self.dimentica(nome)
+
+    def versione(self, nome):
+        return self.interno.versione(nome)
+
+    def versione_in_cache(self, nome):
+        """Versione della copia in memoria (l'ultima letta o scritta qui), senza chiederla all'archivio; None se non c'è."""
+        voce = self._in_memoria(nome)
+        return None if voce is None else voce[0]
+
+    def _copia_aggiornabile(self, nome):
+        """(versione, tabella intera) della copia in cache, se è allineata all'archivio; altrimenti None."""
+        try:
+            versione = self.interno.versione(nome)
+        except Exception:
+            return None
+        if versione is None:
+            return None
+        versione = str(versione)
+        voce = self._in_memoria(nome)
+        if voce is not None and voce[0] == versione:
+            return versione, voce[2]
+        if self._versione_disco(nome) == versione:
+            df = self._leggi_disco(nome)
+            if df is not None:
+                return versione, df
+        return None
+
+    def _scrivi_righe(self, nome, scrittura, applica):
+        """
+        Esegue scrittura() sull'archivio e applica la stessa modifica (applica(df) -> df) alla
+        copia in cache, che prende la nuova versione. Se la copia era già indietro (qualcun
+        altro ha cambiato la tabella) si invalida: la prossima lettura la riscarica.
+        Le scritture sulla stessa tabella passano una alla volta: due sessioni che partissero
+        dalla stessa copia salverebbero ciascuna solo le proprie righe sotto l'ultima versione.
+        """
+        with self._lock_scritture(nome):
+            prima = self._copia_aggiornabile(nome)
+            scrittura()
+            if prima is None:
+                self.invalida(nome)
+                return
+            try:
+                versione = self.interno.versione(nome)
+            except Exception:
+                versione = None
+            if versione is None:
+                self.invalida(nome)
+                return
+            df = applica(prima[1])
+            self._memorizza(nome, str(versione), df)
+            self._scrivi_disco(nome, str(versione), df)
+
+    def scrivi(self, nome, df):
+        with self._lock_scritture(nome):
+            with span(f"archivio.scrivi.{nome}", foglio=nome, righe=len(df)):
+                self.interno.scrivi(nome, df)
+            self.invalida(nome)
+
+    def aggiungi(self, nome, righe_df):
+        if nome in FOGLI_CON_ID:
+            # Stessi id nella copia in cache e nell'archivio (la coda li assegnerebbe solo ai suoi)
+            righe_df, _ = con_id(righe_df)
+        with span(f"archivio.aggiungi.{nome}", foglio=nome, righe=len(righe_df)):
+            self._scrivi_righe(nome, lambda: self.interno.aggiungi(nome, righe_df),
+                               lambda df: applica_righe(df, righe_df))
+
+    def upsert(self, nome, righe_df, chiavi):
+        with span(f"archivio.upsert.{nome}", foglio=nome, righe=len(righe_df)):
+            self._scrivi_righe(nome, lambda: self.interno.upsert(nome, righe_df, chiavi),
+                               lambda df: applica_righe(df, righe_df, chiavi))
+
+    def aggiorna_righe(self, nome, modifiche_df):
+        with span(f"archivio.aggiorna_righe.{nome}", foglio=nome, righe=len(modifiche_df)):
+            self._scrivi_righe(nome, lambda: self.interno.aggiorna_righe(nome, modifiche_df),
+                               lambda df: aggiorna_per_id(df, modifiche_df))
+
+    def elimina_righe(self, nome, id_righe):
+        with span(f"archivio.elimina_righe.{nome}", foglio=nome, righe=len(id_righe)):
+            self._scrivi_righe(nome, lambda: self.interno.elimina_righe(nome, id_righe),
+                               lambda df: elimina_per_id(df, id_righe).reset_index(drop=True))
+
+    def assegna_id(self, nome, id_df):
+        with span(f"archivio.assegna_id.{nome}", foglio=nome, righe=len(id_df)):
+            self._scrivi_righe(nome, lambda: self.interno.assegna_id(nome, id_df),
+                               lambda df: assegna_per_posizione(df, id_df))
+
+
+# --- CONFIGURAZIONE (un archivio per processo) ---
+_archivio = None
+
+
+def crea_archivio(modalita, client_factory=None, percorso=PERCORSO_DB, percorso_coda=PERCORSO_CODA):
+    if modalita not in MODALITA:
+        raise ValueError(f"Modalità archivio '{modalita}' non valida: usa una tra {', '.join(MODALITA)}.")
+    if modalita == "locale":
+        return ArchivioLocale(percorso)
+    if client_factory is None:
+        raise ValueError(f"La modalità '{modalita}' richiede le credenziali Google.")
+    remoto = ArchivioGoogleSheets(client_factory)
+    coda = CodaScritture(remoto, percorso_coda)
+    if modalita == "sheets":
+        return ArchivioDifferito(remoto, coda)
+    return ArchivioSincronizzato(ArchivioLocale(percorso), remoto, coda)
+
+
+def popola_se_vuoto(archivio_dati, nomi, dati_iniziali):
+    """
+    Scrive i fogli di `nomi` ancora vuoti con quelli di dati_iniziali() ({nome: DataFrame}),
+    chiamata solo se ne manca almeno uno. I fogli che hanno già righe non si toccano.
+    Ritorna i nomi dei fogli scritti.
+    """
+    mancanti = [nome for nome in nomi if archivio_dati.leggi(nome).empty]
+    if not mancanti:
+        return []
+    fogli = dati_iniziali()
+    scritti = [nome for nome in mancanti if nome in fogli and not fogli[nome].empty]
+    for nome in scritti:
+        archivio_dati.scrivi(nome, fogli[nome])
+    return scritti
+
+
+def configura(modalita, client_factory=None, percorso=PERCORSO_DB, percorso_coda=PERCORSO_CODA,
+              cartella_cache=CARTELLA_CACHE, dati_iniziali=None):
+    """
+    Imposta l'archivio del processo (con la cache a livelli davanti);
+    le chiamate successive riusano quello già creato.
+    In locale dati_iniziali (vedi popola_se_vuoto) riempie i fogli vuoti alla creazione:
+    un database nuovo altrimenti non ha nemmeno un utente con cui accedere.
+    """
+    global _archivio
+    if _archivio is None or _archivio.nome_backend != modalita:
+        _archivio = ArchivioInCache(crea_archivio(modalita, client_factory, percorso, percorso_coda), cartella_cache)
+        if modalita == "locale" and dati_iniziali is not None:
+            popola_se_vuoto(_archivio, FOGLI, dati_iniziali)
+    return _archivio
+
+
+def get_archivio():
+    if _archivio is None:
+        raise RuntimeError("Archivio non configurato: chiama archivio.configura() all'avvio.")
+    return _archivio
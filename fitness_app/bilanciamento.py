@@ -0,0 +1,104 @@
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .chiavi import ASSENTE, ATLETI
+
+# --- MATRICE ATLETI × MACRO-AREE DEI TEST (Bilanciamento) ---
+# Numero di test per (atleta, macro-area) in un array di interi: righe = id_atleta
+# (chiavi.ATLETI), colonne = macro-aree in ordine alfabetico come la vecchia pivot_table.
+# Si costruisce una volta per caricamento e si aggiorna con i soli test inseriti o
+# eliminati; la tabella e il CSV della pagina si ricavano dalla matrice e restano in
+# cache finché la matrice non cambia.
+
+COLONNA_TOTALE = "Totale test"
+
+
+class MatriceBilanciamento:
+    """Conteggi dei test per atleta e macro-area, aggiornabili incrementalmente."""
+
+    def __init__(self, esercizi_df):
+        if not {"id_esercizio", "id_categoria", "categoria"} <= set(esercizi_df.columns):
+            esercizi_df = pd.DataFrame(columns=["id_esercizio", "id_categoria", "categoria"])
+        appartenenza = esercizi_df.loc[
+            (esercizi_df["id_esercizio"] != ASSENTE) & (esercizi_df["id_categoria"] != ASSENTE),
+            ["id_esercizio", "id_categoria", "categoria"],
+        ]
+        # Una macro-area per esercizio (l'ultima del foglio, come il vecchio dizionario esercizio -> categoria)
+        appartenenza = appartenenza.drop_duplicates("id_esercizio", keep="last")
+        categorie = appartenenza.drop_duplicates("id_categoria").assign(etichetta=lambda d: d["categoria"].astype(str))
+        categorie = categorie.sort_values("etichetta", kind="stable")
+        self.etichette = categorie["etichetta"].tolist()
+        colonna_di = {id_cat: i for i, id_cat in enumerate(categorie["id_categoria"])}
+        self._colonna = pd.Series(
+            appartenenza["id_categoria"].map(colonna_di).to_numpy(dtype="int64"),
+            index=appartenenza["id_esercizio"].to_numpy(dtype="int32"),
+        )
+        self.conteggi = np.zeros((0, len(self.etichette)), dtype="int64")
+        self._nomi = {}  # id_atleta -> nome come compare nei test
+        self._tabella = None
+        self._csv = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def costruisci(cls, test_df, esercizi_df):
+        matrice = cls(esercizi_df)
+        matrice.aggiungi(test_df)
+        return matrice
+
+    def copia(self):
+        """Copia indipendente (conteggi e nomi si duplicano): per gli snapshot."""
+        nuova = copy.copy(self)
+        with self._lock:
+            nuova.conteggi, nuova._nomi = self.conteggi.copy(), dict(self._nomi)
+        nuova._lock = threading.Lock()
+        return nuova
+
+    def _accumula(self, test_df, segno):
+        if test_df.empty or not {"id_atleta", "id_esercizio"} <= set(test_df.columns):
+            return
+        righe = test_df["id_atleta"].to_numpy(dtype="int64")
+        colonne = self._colonna.reindex(test_df["id_esercizio"].to_numpy(dtype="int32")).to_numpy()
+        validi = (righe != ASSENTE) & ~np.isnan(colonne)
+        righe, colonne = righe[validi], colonne[validi].astype("int64")
+        with self._lock:
+            if segno > 0 and "nome" in test_df.columns:
+                for id_atleta, nome in zip(righe, test_df["nome"].to_numpy(dtype="object")[validi]):
+                    self._nomi.setdefault(int(id_atleta), nome)
+            necessarie = max(len(ATLETI), int(righe.max()) + 1 if len(righe) else 0)
+            if necessarie > self.conteggi.shape[0]:
+                self.conteggi = np.pad(self.conteggi, ((0, necessarie - self.conteggi.shape[0]), (0, 0)))
+            np.add.at(self.conteggi, (righe, colonne), segno)
+            self._tabella = self._csv = None
+
+    def aggiungi(self, test_df):
+        """Aggiunge i test (servono id_atleta e id_esercizio, vedi chiavi.aggiungi_codici)."""
+        self._accumula(test_df, 1)
+        return self
+
+    def rimuovi(self, test_df):
+        """Toglie i test eliminati (stesse righe che erano state aggiunte)."""
+        self._accumula(test_df, -1)
+        return self
+
+    def tabella(self):
+        """DataFrame atleti × macro-aree più il totale: solo gli atleti con almeno un test, per nome."""
+        with self._lock:
+            if self._tabella is None:
+                totali = self.conteggi.sum(axis=1)
+                righe = np.flatnonzero(totali > 0)
+                tabella = pd.DataFrame(
+                    self.conteggi[righe], columns=pd.Index(self.etichette, name="macroarea"),
+                    index=pd.Index([self._nomi.get(int(r), ATLETI.chiave(int(r))) for r in righe], name="nome"),
+                )
+                tabella[COLONNA_TOTALE] = totali[righe]
+                self._tabella = tabella.sort_index()
+            return self._tabella
+
+    def csv(self):
+        """La tabella in CSV (bytes), per il pulsante di download."""
+        if self._csv is None:
+            self._csv = self.tabella().to_csv().encode()
+        return self._csv
@@ -0,0 +1,105 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+from pandas.api import types as ptypes
+from pyarrow import feather
+
+# --- SNAPSHOT SU DISCO IN FORMATO ARROW (Feather v2) ---
+# Al posto del pickle: file non compresso letto in memory-map, così si caricano
+# solo le colonne richieste e niente codice viene eseguito in lettura.
+# Ogni colonna ha un tipo esplicito salvato nei metadati del file:
+# - int64 / float64 / bool / datetime: colonne già tipizzate da pandas
+# - stringa: solo testo
+# - misto: celle di tipo diverso (numeri e testo, come le restituisce get_all_records);
+#   si salvano come testo più una colonna di servizio che dice quali celle erano numeri
+
+ESTENSIONE = ".feather"
+_CHIAVE_TIPI = b"tipi_colonne"
+_SUFFISSO_NUMERO = "__numero"
+
+
+def tipi_colonne(df):
+    """Schema esplicito {colonna: tipo} usato per scrivere lo snapshot."""
+    tipi = {}
+    for col in df.columns:
+        serie = df[col]
+        if ptypes.is_bool_dtype(serie):
+            tipi[col] = "bool"
+        elif ptypes.is_integer_dtype(serie):
+            tipi[col] = "int64"
+        elif ptypes.is_float_dtype(serie):
+            tipi[col] = "float64"
+        elif ptypes.is_datetime64_any_dtype(serie):
+            tipi[col] = "datetime"
+        elif serie.map(lambda x: x is None or isinstance(x, str)).all():
+            tipi[col] = "stringa"
+        else:
+            tipi[col] = "misto"
+    return tipi
+
+
+def _numerizza(valore):
+    """Testo di una cella numerica di nuovo in int o float."""
+    try:
+        return int(valore)
+    except ValueError:
+        return float(valore)
+
+
+def _colonna_arrow(serie, tipo):
+    if tipo == "bool":
+        return pa.array(serie, type=pa.bool_())
+    if tipo == "int64":
+        return pa.array(serie, type=pa.int64())
+    if tipo == "float64":
+        return pa.array(serie, type=pa.float64())
+    if tipo == "datetime":
+        return pa.array(serie)
+    valori = [None if x is None or (isinstance(x, float) and pd.isna(x)) else str(x) for x in serie]
+    return pa.array(valori, type=pa.string())
+
+
+def scrivi_snapshot(percorso, df):
+    """Salva df in percorso (scrittura atomica: chi legge non vede mai un file a metà)."""
+    tipi = tipi_colonne(df)
+    df = df.reset_index(drop=True)
+    nomi, colonne = [], []
+    for col in df.columns:
+        nomi.append(str(col))
+        colonne.append(_colonna_arrow(df[col], tipi[col]))
+        if tipi[col] == "misto":
+            nomi.append(f"{col}{_SUFFISSO_NUMERO}")
+            colonne.append(pa.array(
+                [isinstance(x, (int, float)) and not isinstance(x, bool) and not pd.isna(x) for x in df[col]],
+                type=pa.bool_(),
+            ))
+    tabella = pa.table(colonne, names=nomi).replace_schema_metadata(
+        {_CHIAVE_TIPI: json.dumps({str(c): t for c, t in tipi.items()})}
+    )
+    temporaneo = f"{percorso}.{os.getpid()}.tmp"
+    feather.write_feather(tabella, temporaneo, compression="uncompressed")
+    os.replace(temporaneo, percorso)
+
+
+def leggi_snapshot(percorso, colonne=None):
+    """Carica lo snapshot (solo le colonne richieste, se indicate) in memory-map."""
+    with pa.memory_map(percorso) as sorgente:
+        schema = pa.ipc.open_file(sorgente).schema
+    tipi = json.loads((schema.metadata or {}).get(_CHIAVE_TIPI, b"{}"))
+    if colonne is not None:
+        colonne = [c for c in colonne if c in tipi]
+        colonne += [f"{c}{_SUFFISSO_NUMERO}" for c in colonne if tipi[c] == "misto"]
+    df = feather.read_table(percorso, columns=colonne, memory_map=True).to_pandas()
+    for col, tipo in tipi.items():
+        if col not in df.columns:
+            continue
+        if tipo == "misto":
+            numero = df.pop(f"{col}{_SUFFISSO_NUMERO}")
+            df[col] = pd.Series(
+                [_numerizza(x) if n else x for x, n in zip(df[col], numero)], index=df.index, dtype="object"
+            )
+        elif tipo == "stringa":
+            df[col] = df[col].astype("object")
+    return df
@@ -0,0 +1,54 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# --- CARICAMENTO PARALLELO DEI FOGLI ---
+# Ogni foglio è una chiamata di rete indipendente: scaricarli insieme fa aspettare
+# il più lento invece della somma di tutti. Un foglio che fallisce non blocca gli altri.
+
+FOGLI = ["utenti", "esercizi", "test", "benchmark", "wod"]
+
+
+def carica_fogli(caricatori, max_thread=None, inizializza_thread=None):
+    """
+    Esegue in parallelo i caricatori {nome_foglio: funzione senza argomenti}.
+    inizializza_thread (opzionale) viene chiamata all'avvio di ogni thread del pool.
+
+    Ritorna (dati, tempi, errori):
+    - dati: {nome: DataFrame} solo per i fogli caricati
+    - tempi: {nome: secondi impiegati}, anche per i fogli falliti
+    - errori: {nome: eccezione} per i fogli falliti
+    """
+    def esegui(nome):
+        inizio = time.perf_counter()
+        try:
+            return nome, caricatori[nome](), None, time.perf_counter() - inizio
+        except Exception as e:
+            return nome, None, e, time.perf_counter() - inizio
+
+    dati, tempi, errori = {}, {}, {}
+    with ThreadPoolExecutor(max_workers=max_thread or len(caricatori) or 1,
+                            thread_name_prefix="carica-fogli",
+                            initializer=inizializza_thread) as pool:
+        for nome, df, errore, durata in pool.map(esegui, list(caricatori)):
+            tempi[nome] = durata
+            if errore is None:
+                dati[nome] = df
+            else:
+                errori[nome] = errore
+    return dati, tempi, errori
+
+
+def leggi_esportazione(cartella, nomi=FOGLI):
+    """
+    Fogli esportati da Google Sheets (File > Scarica > CSV, un file <foglio>.csv per foglio)
+    come {nome: DataFrame} di stringhe; i file che mancano si saltano.
+    """
+    fogli = {}
+    for nome in nomi:
+        percorso = os.path.join(cartella, f"{nome}.csv")
+        if os.path.exists(percorso):
+            fogli[nome] = pd.read_csv(percorso, dtype=str, keep_default_na=False)
+    return fogli
@@ -0,0 +1,107 @@
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# --- CHIAVI NORMALIZZATE E ID INTERI ---
+# Un'unica normalizzazione per esercizi, categorie e atleti (lowercase, strip, senza spazi,
+# trattini e underscore) e un dizionario per tipo che assegna a ogni chiave un intero
+# stabile per tutta la vita del processo. Join e filtri lavorano sugli id (int32),
+# non su stringhe normalizzate di nuovo a ogni pagina.
+
+ASSENTE = -1  # id dei valori vuoti o mancanti
+_DA_TOGLIERE = r"[ \-_]"
+
+
+def normalizza(valore):
+    """Chiave normalizzata di un singolo valore ("" se mancante)."""
+    if valore is None or (not isinstance(valore, str) and pd.isna(valore)):
+        return ""
+    return re.sub(_DA_TOGLIERE, "", str(valore).strip().lower())
+
+
+def normalizza_serie(serie):
+    """Versione vettoriale: normalizza solo i valori distinti e poi li ridistribuisce."""
+    valori = pd.Series(serie).astype("object")
+    codici, distinti = pd.factorize(valori, use_na_sentinel=True)
+    if not all(isinstance(d, str) for d in distinti):
+        # factorize confronta per uguaglianza (1 == 1.0 == True) ma il testo è diverso
+        # ("1", "1.0", "true"): le celle non di testo si fattorizzano come testo
+        valori = valori.where(valori.isna(), valori.astype(str))
+        codici, distinti = pd.factorize(valori, use_na_sentinel=True)
+    distinti_norm = (
+        pd.Series(distinti, dtype="object").astype(str)
+        .str.strip().str.lower().str.replace(_DA_TOGLIERE, "", regex=True)
+        .to_numpy(dtype="object")
+    )
+    risultato = np.full(len(codici), "", dtype="object")
+    validi = codici >= 0
+    risultato[validi] = distinti_norm[codici[validi]]
+    return pd.Series(risultato, index=getattr(serie, "index", None), dtype="object")
+
+
+class Dizionario:
+    """Assegna id interi (0, 1, 2, …) alle chiavi normalizzate; gli id non cambiano mai."""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self._id = {}
+        self._chiavi = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._chiavi)
+
+    def codifica(self, serie):
+        """Array int32 di id per la Series (le chiavi nuove vengono registrate)."""
+        return self.codifica_chiavi(normalizza_serie(serie))
+
+    def codifica_chiavi(self, norm):
+        """Come codifica(), per chiavi già normalizzate."""
+        codici, distinti = pd.factorize(pd.Series(norm, dtype="object"))
+        with self._lock:
+            for chiave in distinti:
+                if chiave and chiave not in self._id:
+                    self._id[chiave] = len(self._chiavi)
+                    self._chiavi.append(chiave)
+            id_distinti = np.array([self._id.get(c, ASSENTE) if c else ASSENTE for c in distinti], dtype="int32")
+        if not len(codici):
+            return np.array([], dtype="int32")
+        return id_distinti[codici]
+
+    def id(self, valore):
+        """Id di un singolo valore (ASSENTE se non è mai stato visto)."""
+        return self._id.get(normalizza(valore), ASSENTE)
+
+    def chiave(self, id_):
+        return self._chiavi[id_] if 0 <= id_ < len(self._chiavi) else ""
+
+
+ESERCIZI = Dizionario("esercizio")
+CATEGORIE = Dizionario("categoria")
+ATLETI = Dizionario("atleta")
+
+# colonna sorgente -> (colonna id, colonna chiave normalizzata o None, dizionario)
+COLONNE_ID = {
+    "esercizio": ("id_esercizio", "esercizio_norm", ESERCIZI),
+    "categoria": ("id_categoria", "categoria_norm", CATEGORIE),
+    "nome": ("id_atleta", None, ATLETI),
+}
+
+
+def aggiungi_codici(df, colonne=None):
+    """
+    Aggiunge a df (in place) gli id interi delle colonne presenti fra esercizio, categoria
+    e nome, più esercizio_norm/categoria_norm ricavate dalla stessa normalizzazione.
+    Ritorna df per comodità.
+    """
+    for sorgente in colonne or COLONNE_ID:
+        if sorgente not in df.columns:
+            continue
+        col_id, col_norm, dizionario = COLONNE_ID[sorgente]
+        norm = normalizza_serie(df[sorgente])
+        df[col_id] = dizionario.codifica_chiavi(norm)
+        if col_norm:
+            df[col_norm] = norm
+    return df
@@ -0,0 +1,187 @@
+import copy
+import threading
+
+import pandas as pd
+
+from .chiavi import ASSENTE
+
+# --- MOTORE DELLE CLASSIFICHE ---
+# Tabella dei record personali (PR) per (atleta, esercizio) e, per ogni categoria, la somma
+# dei PR di ciascun atleta: per i test numerici vince il massimo di valore_num, per quelli
+# a tempo il minimo di valore_sec. Si costruisce una volta al caricamento dei dati; un test
+# nuovo tocca solo il suo PR e le somme delle categorie del suo esercizio. Le classifiche
+# ordinate si ricalcolano solo per le categorie cambiate e si servono già pronte.
+
+COLONNA_VALORE = {False: "valore_num", True: "valore_sec"}
+
+
+def _migliore(a, b, tempo):
+    return min(a, b) if tempo else max(a, b)
+
+
+class Classifiche:
+    """Record personali e classifiche composite per categoria, aggiornabili test per test."""
+
+    def __init__(self, esercizi_df):
+        if not {"id_esercizio", "id_categoria", "categoria"} <= set(esercizi_df.columns):
+            esercizi_df = pd.DataFrame(columns=["id_esercizio", "id_categoria", "categoria"])
+        appartenenza = esercizi_df.loc[
+            (esercizi_df["id_esercizio"] != ASSENTE) & (esercizi_df["id_categoria"] != ASSENTE),
+            ["id_esercizio", "id_categoria", "categoria"],
+        ]
+        categorie = appartenenza.drop_duplicates("id_categoria")
+        # {id_categoria: nome del foglio esercizi}, nell'ordine del foglio
+        self.categorie = dict(zip(categorie["id_categoria"].astype(int), categorie["categoria"]))
+        self._categorie_di = {}  # {id_esercizio: [id_categoria, ...]}
+        for id_es, id_cat in appartenenza[["id_esercizio", "id_categoria"]].drop_duplicates().itertuples(index=False):
+            self._categorie_di.setdefault(int(id_es), []).append(int(id_cat))
+        self._pr = {}      # {(id_atleta, id_esercizio, tempo): miglior valore}
+        self._somme = {}   # {(id_categoria, tempo): {id_atleta: somma dei PR}}
+        self._quanti = {}  # {(id_categoria, tempo): {id_atleta: numero di PR nella somma}}
+        self._nomi = {}    # {id_atleta: nome da mostrare}
+        self._generi = {}  # {id_atleta: genere dell'ultimo test}
+        self._ordinate = {}  # classifiche già ordinate, {(id_categoria, tempo): DataFrame}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def costruisci(cls, test_df, esercizi_df):
+        classifiche = cls(esercizi_df)
+        classifiche._carica(test_df)
+        return classifiche
+
+    def copia(self):
+        """Copia indipendente per gli snapshot: le classifiche già ordinate si condividono."""
+        nuova = copy.copy(self)
+        with self._lock:
+            nuova._pr = dict(self._pr)
+            nuova._somme = {k: dict(v) for k, v in self._somme.items()}
+            nuova._quanti = {k: dict(v) for k, v in self._quanti.items()}
+            nuova._nomi = dict(self._nomi)
+            nuova._generi = dict(self._generi)
+            nuova._ordinate = dict(self._ordinate)
+        nuova._lock = threading.Lock()
+        return nuova
+
+    def _righe_valide(self, test_df):
+        """Per tempo/non tempo: (id_atleta, id_esercizio, valore) dei test con un valore leggibile."""
+        if test_df.empty or not {"id_atleta", "id_esercizio", "tipo_valore"} <= set(test_df.columns):
+            return {}
+        tempo = test_df["tipo_valore"].astype("object").eq("tempo")
+        righe = {}
+        for e_tempo in (False, True):
+            colonna = COLONNA_VALORE[e_tempo]
+            if colonna not in test_df.columns:
+                continue
+            parte = test_df.loc[tempo == e_tempo, ["id_atleta", "id_esercizio", colonna]]
+            parte = parte[(parte["id_atleta"] != ASSENTE) & parte[colonna].notna()]
+            righe[e_tempo] = parte.rename(columns={colonna: "valore"}).astype({"valore": "float64"})
+        return righe
+
+    def _registra_atleti(self, test_df):
+        if {"id_atleta", "nome"} <= set(test_df.columns):
+            ultimi = test_df.drop_duplicates("id_atleta", keep="last")
+            self._nomi.update(zip(ultimi["id_atleta"].astype(int), ultimi["nome"].astype(str)))
+            if "genere" in test_df.columns:
+                self._generi.update(zip(ultimi["id_atleta"].astype(int), ultimi["genere"].astype("object")))
+
+    def _carica(self, test_df):
+        # Costruzione in blocco: due groupby per tipo invece di un ciclo per test
+        self._registra_atleti(test_df)
+        for tempo, righe in self._righe_valide(test_df).items():
+            migliori = righe.groupby(["id_atleta", "id_esercizio"])["valore"].agg("min" if tempo else "max")
+            for (id_atleta, id_es), valore in migliori.items():
+                self._imposta_pr(int(id_atleta), int(id_es), tempo, float(valore))
+
+    def _imposta_pr(self, id_atleta, id_es, tempo, valore):
+        """Sostituisce il PR (o lo toglie se valore è None) e riporta la differenza sulle somme."""
+        chiave = (id_atleta, id_es, tempo)
+        precedente = self._pr.pop(chiave, None)
+        if valore is not None:
+            self._pr[chiave] = valore
+        differenza = (valore or 0.0) - (precedente or 0.0)
+        delta = (valore is not None) - (precedente is not None)
+        for id_cat in self._categorie_di.get(id_es, []):
+            somme = self._somme.setdefault((id_cat, tempo), {})
+            quanti = self._quanti.setdefault((id_cat, tempo), {})
+            somme[id_atleta] = somme.get(id_atleta, 0.0) + differenza
+            quanti[id_atleta] = quanti.get(id_atleta, 0) + delta
+            if quanti[id_atleta] <= 0:
+                # Nessun PR rimasto in questa categoria: l'atleta esce dalla classifica
+                del somme[id_atleta], quanti[id_atleta]
+            self._ordinate.pop((id_cat, tempo), None)
+
+    def aggiungi(self, test_df):
+        """Applica i test appena inseriti (servono gli id di chiavi.aggiungi_codici)."""
+        with self._lock:
+            self._registra_atleti(test_df)
+            for tempo, righe in self._righe_valide(test_df).items():
+                for id_atleta, id_es, valore in righe.itertuples(index=False):
+                    chiave = (int(id_atleta), int(id_es), tempo)
+                    attuale = self._pr.get(chiave)
+                    migliore = valore if attuale is None else _migliore(attuale, valore, tempo)
+                    if migliore != attuale:
+                        self._imposta_pr(*chiave, float(migliore))
+        return self
+
+    def ricalcola(self, test_df, coppie):
+        """
+        Ricalcola da test_df i PR delle coppie (id_atleta, id_esercizio) indicate,
+        es. dopo l'eliminazione di un test.
+        """
+        coppie = {(int(a), int(e)) for a, e in coppie}
+        if len(test_df) and coppie:
+            test_df = test_df[pd.MultiIndex.from_arrays([
+                test_df["id_atleta"].astype("int64"), test_df["id_esercizio"].astype("int64"),
+            ]).isin(list(coppie))]
+        with self._lock:
+            for id_atleta, id_es in coppie:
+                for tempo in (False, True):
+                    self._imposta_pr(id_atleta, id_es, tempo, None)
+            self._carica(test_df)
+        return self
+
+    def _ordinata(self, id_cat, tempo):
+        chiave = (id_cat, tempo)
+        if chiave not in self._ordinate:
+            somme = self._somme.get(chiave, {})
+            colonna = COLONNA_VALORE[tempo]
+            df = pd.DataFrame({
+                "id_atleta": pd.Series(list(somme), dtype="int32"),
+                "nome": [self._nomi.get(a, "") for a in somme],
+                "genere": [self._generi.get(a) for a in somme],
+                colonna: pd.Series(list(somme.values()), dtype="float64"),
+            })
+            # A parità di valore l'ordine alfabetico tiene stabile la classifica
+            df = df.sort_values([colonna, "nome"], ascending=[tempo, True], kind="stable").reset_index(drop=True)
+            if tempo:
+                df[colonna] = df[colonna].round().astype("Int64")
+            self._ordinate[chiave] = df
+        return self._ordinate[chiave]
+
+    def classifica(self, id_categoria, tempo=False, genere=None, primi=None):
+        """
+        Classifica della categoria (somma dei PR, tempo: più basso è meglio) con la colonna
+        posizione; genere filtra gli atleti, primi tiene solo i primi N.
+        """
+        with self._lock:
+            df = self._ordinata(id_categoria, tempo)
+        if genere:
+            df = df[df["genere"] == genere]
+        if primi is not None:
+            df = df.head(primi)
+        df = df.drop(columns="id_atleta").reset_index(drop=True)
+        df.insert(0, "posizione", range(1, len(df) + 1))
+        return df
+
+    def posizione(self, id_categoria, id_atleta, tempo=False, genere=None):
+        """Posizione (da 1) dell'atleta nella classifica, None se non ci compare."""
+        with self._lock:
+            df = self._ordinata(id_categoria, tempo)
+        if genere:
+            df = df[df["genere"] == genere]
+        trovati = (df["id_atleta"] == id_atleta).to_numpy().nonzero()[0]
+        return int(trovati[0]) + 1 if len(trovati) else None
+
+    def record_personali(self, id_atleta):
+        """PR dell'atleta: {(id_esercizio, tempo): valore}."""
+        return {(e, t): v for (a, e, t), v in self._pr.items() if a == id_atleta}
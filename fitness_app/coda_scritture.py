@@ -0,0 +1,238 @@
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+
+import pandas as pd
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from .righe import COLONNA_ID, FOGLI_CON_ID, aggiorna_per_id, assegna_per_posizione, con_id, elimina_per_id
+
+# --- CODA DI SCRITTURA (write-behind) ---
+# Le scritture verso Google Sheets non bloccano più la pagina: finiscono in un giornale
+# SQLite su disco (sopravvive ai riavvii) e un thread in background le invia,
+# accorpandole per foglio e ritentando con backoff esponenziale.
+# Le righe accodate portano il loro id_riga e le aggiunte si inviano come upsert su quell'id:
+# ripetere un invio già arrivato (timeout dopo il successo, riavvio prima di togliere
+# l'operazione dal giornale) non duplica le righe.
+
+PERCORSO_CODA = os.environ.get("FITNESS_CODA", "./dati/coda_scritture.sqlite")
+TENTATIVI = 5
+ATTESA_DOPO_ERRORE = 30  # secondi prima di riprovare un foglio che continua a fallire
+
+
+def _df_in_json(df):
+    return df.to_json(orient="split", index=False, default_handler=str)
+
+
+def _json_in_df(testo):
+    return pd.read_json(io.StringIO(testo), orient="split", dtype=False, convert_dates=False)
+
+
+def _con_id(righe):
+    """True se ogni riga ha il suo id_riga (le aggiunte si possono ripetere senza duplicati)."""
+    return COLONNA_ID in righe.columns and not righe[COLONNA_ID].isna().any() and (righe[COLONNA_ID].astype(str).str.strip() != "").all()
+
+
+class CodaScritture:
+    """
+    Giornale persistente delle scritture verso un archivio remoto.
+    Operazioni: "scrivi" (intera tabella), "aggiungi" (righe nuove), "upsert" (righe per chiave),
+    "aggiorna_righe" (celle per id_riga), "elimina_righe" (id_riga da togliere) e "assegna_id"
+    (id per le righe che non l'hanno, per posizione).
+    """
+
+    def __init__(self, remoto, percorso=PERCORSO_CODA):
+        self.remoto = remoto
+        self.percorso = percorso
+        cartella = os.path.dirname(percorso)
+        if cartella:
+            os.makedirs(cartella, exist_ok=True)
+        self.ultimo_flush = None
+        self.ultimo_errore = None
+        self._lock = threading.Lock()
+        self._sveglia = threading.Event()
+        with self._connetti() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coda ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, foglio TEXT, operazione TEXT, dati TEXT, "
+                "chiavi TEXT, creato REAL, stato TEXT DEFAULT 'attesa', tentativi INTEGER DEFAULT 0, errore TEXT)"
+            )
+            # Operazioni rimaste "in corso" da un processo interrotto: si rimettono in attesa
+            conn.execute("UPDATE coda SET stato = 'attesa' WHERE stato = 'in_corso'")
+        self._worker = threading.Thread(target=self._ciclo, name="coda-scritture", daemon=True)
+        self._worker.start()
+        self._sveglia.set()
+
+    def _connetti(self):
+        return sqlite3.connect(self.percorso, timeout=30)
+
+    # --- Lato pagina: accodare è immediato ---
+    def accoda(self, foglio, operazione, df, chiavi=None):
+        if operazione == "aggiungi" and foglio in FOGLI_CON_ID:
+            df, _ = con_id(df)
+        with self._lock, self._connetti() as conn:
+            if operazione == "scrivi":
+                # Una riscrittura completa rende inutili le scritture precedenti ancora in attesa
+                conn.execute("DELETE FROM coda WHERE foglio = ? AND stato = 'attesa'", (foglio,))
+            conn.execute(
+                "INSERT INTO coda (foglio, operazione, dati, chiavi, creato) VALUES (?, ?, ?, ?, ?)",
+                (foglio, operazione, _df_in_json(df), json.dumps(list(chiavi)) if chiavi else None, time.time()),
+            )
+        self._sveglia.set()
+
+    def _pendenti(self, conn, foglio=None):
+        sql = "SELECT id, foglio, operazione, dati, chiavi FROM coda"
+        if foglio is not None:
+            return conn.execute(sql + " WHERE foglio = ? ORDER BY id", (foglio,)).fetchall()
+        return conn.execute(sql + " WHERE stato = 'attesa' ORDER BY id").fetchall()
+
+    def applica_pendenti(self, foglio, df):
+        """Applica a df le scritture non ancora inviate, così chi legge vede subito i propri salvataggi."""
+        from .archivio import applica_righe
+
+        with self._connetti() as conn:
+            operazioni = self._pendenti(conn, foglio)
+        for _, _, operazione, dati, chiavi in operazioni:
+            righe = _json_in_df(dati)
+            if operazione == "scrivi":
+                df = righe
+            elif operazione == "aggiorna_righe":
+                df = aggiorna_per_id(df, righe)
+            elif operazione == "elimina_righe":
+                df = elimina_per_id(df, righe[COLONNA_ID])
+            elif operazione == "assegna_id":
+                df = assegna_per_posizione(df, righe)
+            elif operazione == "aggiungi" and _con_id(righe):
+                # Righe già arrivate al remoto (invio riuscito, giornale non ancora pulito): si sostituiscono
+                df = applica_righe(df, righe, [COLONNA_ID])
+            else:
+                df = applica_righe(df, righe, json.loads(chiavi) if chiavi else None)
+        return df
+
+    def in_attesa(self, foglio=None):
+        with self._connetti() as conn:
+            if foglio is None:
+                return conn.execute("SELECT COUNT(*) FROM coda").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM coda WHERE foglio = ?", (foglio,)).fetchone()[0]
+
+    def firma(self, foglio):
+        """Cambia ogni volta che le scritture in attesa per il foglio cambiano."""
+        with self._connetti() as conn:
+            n, ultimo = conn.execute("SELECT COUNT(*), MAX(id) FROM coda WHERE foglio = ?", (foglio,)).fetchone()
+        return f"{n}:{ultimo or 0}"
+
+    def stato(self):
+        """Riepilogo per la UI: scritture in attesa per foglio, ultimo invio riuscito, ultimo errore."""
+        with self._connetti() as conn:
+            per_foglio = dict(conn.execute("SELECT foglio, COUNT(*) FROM coda GROUP BY foglio").fetchall())
+        return {
+            "in_attesa": sum(per_foglio.values()),
+            "per_foglio": per_foglio,
+            "ultimo_flush": self.ultimo_flush,
+            "ultimo_errore": self.ultimo_errore,
+        }
+
+    def svuota(self, timeout=60):
+        """Attende (al massimo timeout secondi) che tutte le scritture siano state inviate."""
+        limite = time.time() + timeout
+        while self.in_attesa() and time.time() < limite:
+            self._sveglia.set()
+            time.sleep(0.2)
+        return self.in_attesa() == 0
+
+    # --- Lato worker ---
+    @staticmethod
+    def _accorpa(operazioni):
+        """
+        Accorpa le operazioni consecutive di un foglio: più "aggiungi" diventano una sola append,
+        più "upsert" con le stesse chiavi un solo upsert (vince l'ultima versione della riga),
+        più "elimina_righe" (o "assegna_id") una sola chiamata e più "aggiorna_righe" sulle
+        stesse colonne una sola batch_update.
+        """
+        from .archivio import applica_righe
+
+        gruppi = []
+        for id_op, _, operazione, dati, chiavi in operazioni:
+            righe = _json_in_df(dati)
+            chiavi = json.loads(chiavi) if chiavi else None
+            if operazione == "scrivi":
+                # Le operazioni precedenti sono superate, ma vanno tolte dal giornale insieme a questa
+                gruppi = [[operazione, righe, chiavi, [i for gruppo in gruppi for i in gruppo[3]] + [id_op]]]
+                continue
+            ultimo = gruppi[-1] if gruppi else None
+            if ultimo and ultimo[0] == operazione and ultimo[2] == chiavi:
+                if operazione in ("elimina_righe", "assegna_id"):
+                    ultimo[1] = pd.concat([ultimo[1], righe], ignore_index=True)
+                elif operazione == "aggiorna_righe":
+                    if list(ultimo[1].columns) != list(righe.columns):
+                        gruppi.append([operazione, righe, chiavi, [id_op]])
+                        continue
+                    ultimo[1] = applica_righe(ultimo[1], righe, [COLONNA_ID])
+                else:
+                    ultimo[1] = applica_righe(ultimo[1], righe, chiavi)
+                ultimo[3].append(id_op)
+            else:
+                gruppi.append([operazione, righe, chiavi, [id_op]])
+        return gruppi
+
+    @retry(stop=stop_after_attempt(TENTATIVI), wait=wait_exponential(multiplier=1, max=20), reraise=True)
+    def _invia(self, foglio, operazione, righe, chiavi):
+        if operazione == "scrivi":
+            self.remoto.scrivi(foglio, righe)
+        elif operazione == "aggiungi" and _con_id(righe):
+            # Idempotente: se un tentativo precedente è arrivato, le righe si aggiornano invece di raddoppiare
+            self.remoto.upsert(foglio, righe, [COLONNA_ID])
+        elif operazione == "aggiungi":
+            self.remoto.aggiungi(foglio, righe)
+        elif operazione == "aggiorna_righe":
+            self.remoto.aggiorna_righe(foglio, righe)
+        elif operazione == "elimina_righe":
+            self.remoto.elimina_righe(foglio, righe[COLONNA_ID].tolist())
+        elif operazione == "assegna_id":
+            self.remoto.assegna_id(foglio, righe)
+        else:
+            self.remoto.upsert(foglio, righe, chiavi)
+
+    def _svuota_foglio(self, foglio):
+        with self._lock, self._connetti() as conn:
+            operazioni = conn.execute(
+                "SELECT id, foglio, operazione, dati, chiavi FROM coda "
+                "WHERE foglio = ? AND stato = 'attesa' ORDER BY id", (foglio,)
+            ).fetchall()
+            conn.executemany("UPDATE coda SET stato = 'in_corso' WHERE id = ?", [(op[0],) for op in operazioni])
+        for operazione, righe, chiavi, ids in self._accorpa(operazioni):
+            segnaposto = ", ".join("?" for _ in ids)
+            try:
+                self._invia(foglio, operazione, righe, chiavi)
+            except Exception:
+                self.ultimo_errore = (foglio, time.time(), traceback.format_exc(limit=3))
+                with self._connetti() as conn:
+                    conn.execute(
+                        "UPDATE coda SET stato = 'attesa', tentativi = tentativi + 1, errore = ? "
+                        "WHERE stato = 'in_corso' AND foglio = ?",
+                        (self.ultimo_errore[2], foglio),
+                    )
+                return False
+            with self._connetti() as conn:
+                conn.execute(f"DELETE FROM coda WHERE id IN ({segnaposto})", ids)
+        self.ultimo_flush = time.time()
+        self.ultimo_errore = None
+        return True
+
+    def _ciclo(self):
+        while True:
+            self._sveglia.wait(timeout=ATTESA_DOPO_ERRORE)
+            self._sveglia.clear()
+            with self._connetti() as conn:
+                fogli = [r[0] for r in conn.execute(
+                    "SELECT foglio FROM coda WHERE stato = 'attesa' GROUP BY foglio ORDER BY MIN(id)"
+                )]
+            for foglio in fogli:
+                try:
+                    self._svuota_foglio(foglio)
+                except Exception:
+                    self.ultimo_errore = (foglio, time.time(), traceback.format_exc(limit=3))
@@ -0,0 +1,85 @@
+import threading
+import time
+
+# --- CONNESSIONE GOOGLE (una per processo) ---
+# Credenziali e client gspread si creano una sola volta e sopravvivono ai rerun di Streamlit.
+# Le maniglie Spreadsheet/Worksheet restano in memoria per DURATA_MANIGLIE secondi,
+# così ogni lettura/scrittura non rifà la ricerca del file su Drive (client.open).
+
+SCOPE = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+DURATA_MANIGLIE = 600
+
+_lock = threading.Lock()
+_info_account = None
+_client = None
+
+
+def configura(info_account):
+    """Registra le credenziali del service account; il client viene creato alla prima richiesta."""
+    global _info_account, _client
+    with _lock:
+        if info_account != _info_account:
+            _info_account = dict(info_account)
+            _client = None
+
+
+def get_client():
+    """Client gspread autorizzato, condiviso da tutto il processo."""
+    global _client
+    with _lock:
+        if _client is None:
+            if _info_account is None:
+                raise RuntimeError("Credenziali Google non configurate: chiama connessione_google.configura().")
+            import gspread
+            from google.oauth2 import service_account
+
+            creds = service_account.Credentials.from_service_account_info(_info_account, scopes=SCOPE)
+            _client = gspread.authorize(creds)
+        return _client
+
+
+class PoolFogli:
+    """
+    Cache con scadenza delle maniglie Spreadsheet (per nome file) e Worksheet (per file e foglio).
+    Una maniglia scaduta o invalidata viene riaperta alla richiesta successiva.
+    """
+
+    def __init__(self, client_factory=get_client, durata=DURATA_MANIGLIE):
+        self._client_factory = client_factory
+        self.durata = durata
+        self._maniglie = {}
+        self._lock = threading.Lock()
+
+    def _da_cache(self, chiave, apri):
+        adesso = time.monotonic()
+        with self._lock:
+            voce = self._maniglie.get(chiave)
+            if voce and voce[1] > adesso:
+                return voce[0]
+        maniglia = apri()
+        with self._lock:
+            self._maniglie[chiave] = (maniglia, adesso + self.durata)
+        return maniglia
+
+    def file(self, nome):
+        return self._da_cache(("file", nome), lambda: self._client_factory().open(nome))
+
+    def foglio(self, nome_file, nome_foglio):
+        return self._da_cache(("foglio", nome_file, nome_foglio), lambda: self.file(nome_file).worksheet(nome_foglio))
+
+    def memorizza_foglio(self, nome_file, nome_foglio, worksheet):
+        """Registra una worksheet appena creata (add_worksheet) senza riaprirla."""
+        with self._lock:
+            self._maniglie[("foglio", nome_file, nome_foglio)] = (worksheet, time.monotonic() + self.durata)
+
+    def invalida(self, nome_file=None):
+        """Dimentica le maniglie di un file (tutte se nome_file è None), es. dopo un errore."""
+        with self._lock:
+            if nome_file is None:
+                self._maniglie.clear()
+            else:
+                for chiave in [k for k in self._maniglie if k[1] == nome_file]:
+                    del self._maniglie[chiave]
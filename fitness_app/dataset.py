@@ -0,0 +1,238 @@
+import threading
+import time
+
+import pandas as pd
+
+from .archivio import applica_righe
+from .chiavi import aggiungi_codici
+from .livelli import costruisci_tabella_soglie
+from .preparazione import arricchisci_test, costruisci_viste
+from .righe import COLONNA_ID, aggiorna_per_id, elimina_per_id, etichette
+from .schema_dati import accoda_test
+from .ultimi_test import aggiorna_ultimi_test, ricalcola_ultimi_test
+
+# --- SNAPSHOT CONDIVISI E VERSIONATI DEI DATI ---
+# Un'unica fotografia dei fogli e delle viste derivate per tutto il processo: ogni sessione
+# Streamlit legge la stessa (niente copie per utente) e ricorda solo il numero di versione.
+# Uno snapshot non si modifica mai: una scrittura ne pubblica uno nuovo che riusa tutti gli
+# oggetti non toccati e copia solo quelli cambiati (copy-on-write). Lo scambio avviene sotto
+# lock, quindi tutte le sessioni vedono la nuova versione insieme e due scritture
+# contemporanee si applicano una dopo l'altra, senza perdersene una.
+# Lo snapshot ricorda anche la versione di ogni foglio da cui viene: chi lo serve confronta
+# ogni tanto quelle versioni con l'archivio e ricarica solo se qualcosa è cambiato fuori.
+
+FOGLI_DF = ("utenti_df", "esercizi_df", "test_df", "benchmark_df", "soglie_df", "wod_df")
+VISTE = ("ultimi_test_df", "matrice_livelli", "classifiche", "indice_wod", "bilanciamento")
+METADATI = ("versioni_fogli",)  # {foglio: versione nell'archivio} dei dati dello snapshot
+CAMPI = FOGLI_DF + VISTE + METADATI
+
+
+class Snapshot:
+    """Fogli e viste di una versione dei dati; in sola lettura (vedi DatasetCondiviso.aggiorna)."""
+
+    __slots__ = ("versione",) + CAMPI
+
+    def __init__(self, versione, **campi):
+        mancanti = set(CAMPI) - set(campi)
+        if mancanti:
+            raise ValueError(f"Snapshot incompleto, mancano: {', '.join(sorted(mancanti))}")
+        object.__setattr__(self, "versione", versione)
+        for nome in CAMPI:
+            object.__setattr__(self, nome, campi[nome])
+
+    def __setattr__(self, nome, valore):
+        raise AttributeError("Snapshot in sola lettura: le modifiche passano da DatasetCondiviso.aggiorna()")
+
+    def campi(self):
+        return {nome: getattr(self, nome) for nome in CAMPI}
+
+
+class DatasetCondiviso:
+    """
+    Snapshot corrente del processo. Chi ha già in mano uno snapshot vecchio (un rerun in
+    corso, un fragment) continua a leggerlo intatto finché non lo lascia andare.
+    """
+
+    def __init__(self):
+        self._corrente = None
+        self._prossima = 1
+        self._controllato_il = None
+        self._lock = threading.Lock()
+        # foglio -> versione della copia appena scritta (es. ArchivioInCache.versione_in_cache):
+        # le scritture fatte con aggiorna() aggiornano così anche versioni_fogli
+        self.versione_scritta = None
+
+    def corrente(self):
+        """Ultimo snapshot pubblicato (None finché i dati non sono stati caricati)."""
+        return self._corrente
+
+    def _pubblica(self, campi):
+        snapshot = Snapshot(self._prossima, **campi)
+        self._prossima += 1
+        self._corrente = snapshot
+        return snapshot
+
+    def pubblica(self, **campi):
+        """
+        Sostituisce tutti i dati (es. dopo un caricamento completo); ritorna il nuovo snapshot.
+        versioni_fogli è facoltativo: senza, fogli_cambiati() non segnala mai nulla.
+        """
+        campi.setdefault("versioni_fogli", {})
+        with self._lock:
+            self._controllato_il = time.monotonic()
+            return self._pubblica(campi)
+
+    def aggiorna(self, modifica):
+        """
+        Applica modifica(snapshot_corrente) -> {campo: nuovo valore} sotto lock e pubblica il
+        risultato. modifica non deve toccare gli oggetti dello snapshot che riceve: ritorna
+        oggetti nuovi (o copie) solo per i campi che cambiano, gli altri vengono condivisi.
+        """
+        with self._lock:
+            if self._corrente is None:
+                raise RuntimeError("Nessun dato caricato: pubblica() va chiamato prima di aggiorna().")
+            modifiche = modifica(self._corrente)
+            versioni = self._corrente.versioni_fogli
+            if self.versione_scritta is not None:
+                scritti = [nome[:-3] for nome in modifiche if nome in FOGLI_DF and nome[:-3] in versioni]
+                if scritti:
+                    versioni = {**versioni, **{foglio: self.versione_scritta(foglio) for foglio in scritti}}
+            return self._pubblica({**self._corrente.campi(), **modifiche, "versioni_fogli": versioni})
+
+    def controllo_dovuto(self, intervallo):
+        """True al massimo una volta ogni intervallo secondi (per processo): è ora di chiamare fogli_cambiati()."""
+        with self._lock:
+            adesso = time.monotonic()
+            if self._controllato_il is not None and adesso - self._controllato_il < intervallo:
+                return False
+            self._controllato_il = adesso
+            return True
+
+    def fogli_cambiati(self, versioni_attuali):
+        """
+        Fogli dello snapshot corrente la cui versione nell'archivio ({foglio: versione}) non è
+        più quella caricata. Un foglio senza versione attuale (non nota, rete giù) non conta.
+        """
+        snapshot = self._corrente
+        if snapshot is None:
+            return []
+        return [
+            foglio for foglio, versione in snapshot.versioni_fogli.items()
+            if versioni_attuali.get(foglio) is not None and str(versioni_attuali[foglio]) != versione
+        ]
+
+
+# Dataset del processo, condiviso da tutte le sessioni
+DATASET = DatasetCondiviso()
+
+
+def snapshot_vuoto():
+    """Snapshot senza dati (versione 0, non pubblicato): serve prima del login o del primo caricamento."""
+    fogli = {nome: pd.DataFrame() for nome in FOGLI_DF}
+    fogli["soglie_df"] = costruisci_tabella_soglie(fogli["benchmark_df"])
+    return Snapshot(0, **fogli, **costruisci_viste(fogli["test_df"], fogli["esercizi_df"], fogli["soglie_df"]),
+                    versioni_fogli={})
+
+
+# --- MODIFICHE TIPICHE (da passare a DatasetCondiviso.aggiorna) ---
+def con_foglio(nome, df):
+    """Sostituisce un foglio senza viste derivate (utenti, wod, benchmark…)."""
+    return lambda snapshot: {nome: df}
+
+
+def con_righe(nome, righe_df, chiavi=None):
+    """Accoda (o con chiavi aggiorna) righe di un foglio senza viste derivate."""
+    return lambda snapshot: {nome: applica_righe(getattr(snapshot, nome), righe_df, chiavi)}
+
+
+def con_righe_aggiornate(nome, modifiche_df):
+    """Celle cambiate (id_riga + colonne modificate) di un foglio senza viste derivate."""
+    return lambda snapshot: {nome: aggiorna_per_id(getattr(snapshot, nome), modifiche_df)}
+
+
+def con_righe_eliminate(nome, id_righe):
+    """Righe eliminate (per id_riga) di un foglio senza viste derivate."""
+    return lambda snapshot: {nome: elimina_per_id(getattr(snapshot, nome), id_righe)}
+
+
+def _appartenenza(esercizi_df):
+    """Quello che le viste leggono dal catalogo: esercizio -> categoria e tipo di valore."""
+    colonne = [c for c in ("id_esercizio", "id_categoria", "categoria", "tipo_valore") if c in esercizi_df.columns]
+    return set(esercizi_df[colonne].astype(str).itertuples(index=False, name=None)) if colonne else set()
+
+
+def con_esercizi(aggiunti=None, modificati=None, eliminati=()):
+    """
+    Modifiche al catalogo esercizi: righe nuove, celle cambiate (id_riga + colonne) e id_riga
+    eliminati. Chiavi normalizzate e id si calcolano solo per le righe toccate. Se cambia
+    l'appartenenza esercizio -> categoria/tipo, test e viste si riallineano in memoria
+    (come dopo un caricamento, ma senza riscaricare i fogli).
+    """
+    def modifica(snapshot):
+        esercizi_df = elimina_per_id(snapshot.esercizi_df, eliminati) if len(eliminati) else snapshot.esercizi_df
+        if modificati is not None and not modificati.empty:
+            esercizi_df = aggiorna_per_id(esercizi_df, modificati)
+            toccate = etichette(esercizi_df, modificati[COLONNA_ID])
+            sorgenti = [c for c in ("esercizio", "categoria") if c in modificati.columns]
+            if toccate and sorgenti:
+                codici = aggiungi_codici(esercizi_df.loc[toccate, sorgenti].copy(), sorgenti)
+                derivate = [c for c in codici.columns if c not in sorgenti]
+                esercizi_df.loc[toccate, derivate] = codici[derivate]
+        if aggiunti is not None and not aggiunti.empty:
+            esercizi_df = applica_righe(esercizi_df, aggiungi_codici(aggiunti.copy(), ["esercizio", "categoria"]))
+        if esercizi_df is snapshot.esercizi_df:
+            return {}
+        campi = {"esercizi_df": esercizi_df}
+        if _appartenenza(esercizi_df) != _appartenenza(snapshot.esercizi_df):
+            test_df = snapshot.test_df
+            if not test_df.empty and {"esercizio", "categoria"} <= set(esercizi_df.columns):
+                test_df = arricchisci_test(test_df, esercizi_df)
+            campi["test_df"] = test_df
+            campi.update(costruisci_viste(test_df, esercizi_df, snapshot.soglie_df))
+        return campi
+    return modifica
+
+
+def con_test_aggiunti(nuovi_test_df):
+    """Test appena inseriti (come escono dal form): test_df e le viste, incrementali."""
+    def modifica(snapshot):
+        arricchiti = arricchisci_test(nuovi_test_df, snapshot.esercizi_df)  # già tipizzati
+        return {
+            "test_df": accoda_test(snapshot.test_df, arricchiti),
+            "ultimi_test_df": aggiorna_ultimi_test(snapshot.ultimi_test_df, arricchiti, snapshot.soglie_df),
+            "matrice_livelli": snapshot.matrice_livelli.copia().aggiungi(arricchiti, snapshot.soglie_df),
+            "classifiche": snapshot.classifiche.copia().aggiungi(arricchiti),
+            "indice_wod": snapshot.indice_wod.copia().aggiungi(arricchiti),
+            "bilanciamento": snapshot.bilanciamento.copia().aggiungi(arricchiti),
+        }
+    return modifica
+
+
+def con_test_rimossi(id_righe):
+    """Test eliminati (per id_riga): test_df e le viste, ricalcolando solo le coppie toccate."""
+    def modifica(snapshot):
+        test_df = snapshot.test_df
+        rimossi = test_df.loc[etichette(test_df, id_righe)]
+        if rimossi.empty:
+            return {}
+        rimasti = test_df.drop(index=rimossi.index)
+        chiavi = set(zip(rimossi["nome"].astype(str), rimossi["esercizio_norm"]))
+        coppie = set(zip(rimossi["id_atleta"], rimossi["id_esercizio"]))
+        # Un solo filtro vettoriale sui test rimasti: i ricalcoli vedono solo gli esercizi
+        # toccati (tutti gli atleti, per i WOD) e le coppie atleta/esercizio toccate
+        esercizi = rimossi["id_esercizio"].unique()
+        stessi_esercizi = rimasti[rimasti["id_esercizio"].isin(esercizi)]
+        toccati = stessi_esercizi[stessi_esercizi["id_atleta"].isin(rimossi["id_atleta"].unique())]
+        indice_wod = snapshot.indice_wod.copia()
+        for id_wod in esercizi:
+            if indice_wod.contiene(id_wod):
+                indice_wod.ricalcola(stessi_esercizi, id_wod)
+        return {
+            "test_df": rimasti,
+            "ultimi_test_df": ricalcola_ultimi_test(snapshot.ultimi_test_df, toccati, chiavi, snapshot.soglie_df),
+            "matrice_livelli": snapshot.matrice_livelli.copia().rimuovi(rimossi, snapshot.soglie_df),
+            "classifiche": snapshot.classifiche.copia().ricalcola(toccati, coppie),
+            "indice_wod": indice_wod,
+            "bilanciamento": snapshot.bilanciamento.copia().rimuovi(rimossi),
+        }
+    return modifica
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+from .righe import COLONNA_ID, FOGLI_CON_ID
+
+# --- DATI SINTETICI ---
+# Fogli finti ma realistici (stesse colonne e stessi formati di get_all_records) per
+# misurare come scala l'app: stessi parametri e stesso seme danno sempre gli stessi dati.
+
+GENERI = ["Maschio", "Femmina"]
+LIVELLI_SOGLIE = ["base", "principiante", "intermedio", "buono", "elite"]
+
+# categoria -> [(esercizio, tipo_valore, soglia "base" per i maschi, soglia "elite")]
+# Per i tempi le soglie sono in secondi e migliorano scendendo
+CATALOGO = {
+    "Endurance funzionale": [("Hyrox pro", "tempo", 7200, 3900), ("Run 5 km", "tempo", 1800, 1050),
+                             ("Row 2000 m", "tempo", 540, 400)],
+    "Forza": [("Back Squat 1RM", "kg_rel", 60, 200), ("Deadlift 1RM", "kg_rel", 80, 250),
+              ("Bench Press", "kg_rel", 40, 150), ("Strict Press", "kg_rel", 25, 90)],
+    "Ginnastica": [("Max Pull-up", "reps", 3, 40), ("Max Handstand Push-up", "reps", 1, 30),
+                   ("Toes to Bar 1 min", "reps", 5, 40)],
+    "Metabolico": [("Fran", "tempo", 600, 150), ("Grace", "tempo", 420, 100), ("Burpees 5 min", "reps", 40, 110)],
+    "Potenza": [("Box Jump cm", "reps", 40, 110), ("Power Clean 1RM", "kg", 40, 140), ("Snatch 1RM", "kg", 30, 110)],
+}
+FATTORE_FEMMINE = {"tempo": 1.12, "reps": 0.75, "kg_rel": 0.7, "kg": 0.7}
+# Peso corporeo medio: le soglie kg_rel sono in multipli del peso (kg sollevati / peso)
+PESO_MEDIO = {"Maschio": 78, "Femmina": 62}
+
+
+def _tempo(secondi):
+    secondi = int(round(secondi))
+    return f"{secondi // 60}:{secondi % 60:02d}"
+
+
+def genera_esercizi(esercizi_per_categoria=None):
+    """Foglio esercizi (categoria, esercizio, tipo_valore) dal catalogo."""
+    righe = []
+    for categoria, esercizi in CATALOGO.items():
+        for esercizio, tipo, _, _ in esercizi[:esercizi_per_categoria]:
+            righe.append({"categoria": categoria, "esercizio": esercizio, "tipo_valore": tipo})
+    return pd.DataFrame(righe)
+
+
+def genera_benchmark(esercizi_df):
+    """Foglio benchmark: cinque soglie per esercizio e genere ("mm:ss" per i tempi)."""
+    soglie_di = {e: (tipo, base, elite) for esercizi in CATALOGO.values() for e, tipo, base, elite in esercizi}
+    righe = []
+    for esercizio in esercizi_df["esercizio"]:
+        tipo, base, elite = soglie_di[esercizio]
+        for genere in GENERI:
+            fattore = FATTORE_FEMMINE[tipo] if genere == "Femmina" else 1.0
+            riga = {"esercizio": esercizio, "tipo_valore": tipo, "genere": genere}
+            for livello, valore in zip(LIVELLI_SOGLIE, np.linspace(base, elite, len(LIVELLI_SOGLIE)) * fattore):
+                if tipo == "tempo":
+                    riga[livello] = _tempo(valore)
+                elif tipo == "kg_rel":
+                    riga[livello] = str(round(float(valore) / PESO_MEDIO[genere], 2))
+                else:
+                    riga[livello] = str(round(float(valore), 1))
+            righe.append(riga)
+    return pd.DataFrame(righe)
+
+
+def genera_utenti(n_atleti, rng):
+    """Foglio utenti: un coach più n_atleti atleti."""
+    generi = rng.choice(GENERI, size=n_atleti)
+    righe = [{"nome": "Coach Sintetico", "pin": "0", "ruolo": "coach", "genere": "Maschio", "peso": 80}]
+    for i, genere in enumerate(generi):
+        righe.append({
+            "nome": f"Atleta {i:05d}", "pin": str(1000 + i), "ruolo": "atleta", "genere": str(genere),
+            "peso": int(rng.normal(PESO_MEDIO[str(genere)], 8)),
+        })
+    return pd.DataFrame(righe)
+
+
+def genera_test(n_test, utenti_df, esercizi_df, rng, giorni=3 * 365, fine="2025-06-30"):
+    """
+    Foglio test con n_test righe: atleta ed esercizio a caso, valore intorno alle soglie
+    (ogni atleta ha un suo "talento"), date distribuite sugli ultimi `giorni` giorni.
+    """
+    atleti = utenti_df[utenti_df["ruolo"] == "atleta"].reset_index(drop=True)
+    soglie_di = {e: (tipo, base, elite) for esercizi in CATALOGO.values() for e, tipo, base, elite in esercizi}
+    quale_atleta = rng.integers(0, len(atleti), size=n_test)
+    quale_esercizio = rng.integers(0, len(esercizi_df), size=n_test)
+    talento = rng.beta(2, 3, size=len(atleti))[quale_atleta]
+    frazione = np.clip(talento + rng.normal(0, 0.12, size=n_test), -0.2, 1.2)
+
+    esercizi = esercizi_df["esercizio"].to_numpy()[quale_esercizio]
+    tipi = esercizi_df["tipo_valore"].to_numpy()[quale_esercizio]
+    generi = atleti["genere"].to_numpy()[quale_atleta]
+    base = np.array([soglie_di[e][1] for e in esercizi], dtype="float64")
+    elite = np.array([soglie_di[e][2] for e in esercizi], dtype="float64")
+    fattore = np.where(generi == "Femmina", pd.Series(tipi).map(FATTORE_FEMMINE).to_numpy(), 1.0)
+    grezzi = (base + (elite - base) * frazione) * fattore
+    peso = np.round(atleti["peso"].to_numpy(dtype="float64")[quale_atleta] + rng.normal(0, 1.5, size=n_test), 1)
+
+    e_tempo = tipi == "tempo"
+    valori = np.where(
+        e_tempo,
+        pd.Series(grezzi).map(_tempo).to_numpy(),
+        pd.Series(np.round(np.maximum(grezzi, 0), 1)).astype(str).to_numpy(),
+    )
+    relativo = np.where(tipi == "kg_rel", np.round(np.maximum(grezzi, 0) / peso * 100).astype(int).astype(str), "")
+    date = pd.Timestamp(fine) - pd.to_timedelta(rng.integers(0, giorni, size=n_test), unit="D")
+    return pd.DataFrame({
+        "nome": atleti["nome"].to_numpy()[quale_atleta],
+        "esercizio": esercizi,
+        "valore": valori,
+        "tipo_valore": tipi,
+        "peso_corporeo": peso,
+        "relativo": relativo,
+        "data": date.strftime("%Y-%m-%d"),
+        "genere": generi,
+    })
+
+
+def genera_wod(esercizi_df, rng, n_wod=20, fine="2025-06-30"):
+    """Foglio wod: un WOD ogni pochi giorni, sugli esercizi del catalogo."""
+    scelti = esercizi_df.iloc[rng.integers(0, len(esercizi_df), size=n_wod)]
+    date = pd.Timestamp(fine) - pd.to_timedelta(np.arange(n_wod)[::-1] * 3, unit="D")
+    return pd.DataFrame({
+        "nome": [f"WOD {i + 1}" for i in range(n_wod)],
+        "descrizione": [f"Test di {e}" for e in scelti["esercizio"]],
+        "data": date.strftime("%Y-%m-%d"),
+        "principiante": "", "intermedio": "", "avanzato": "",
+        "esercizi": scelti["esercizio"].to_numpy(),
+        "tipo_valore": scelti["tipo_valore"].to_numpy(),
+        "titolo": "",
+    })
+
+
+def genera_dati(n_test, n_atleti=None, seme=0):
+    """
+    I cinque fogli {utenti, esercizi, test, benchmark, wod} con n_test test (da 100 a
+    qualche milione). n_atleti di default cresce con i test (circa 200 test per atleta).
+    """
+    rng = np.random.default_rng(seme)
+    n_atleti = n_atleti or int(min(max(10, n_test // 200), 5000))
+    esercizi_df = genera_esercizi()
+    utenti_df = genera_utenti(n_atleti, rng)
+    dati = {
+        "utenti": utenti_df,
+        "esercizi": esercizi_df,
+        "test": genera_test(n_test, utenti_df, esercizi_df, rng),
+        "benchmark": genera_benchmark(esercizi_df),
+        "wod": genera_wod(esercizi_df, rng),
+    }
+    # id_riga come nei fogli veri (vedi righe.py), ma ripetibili a parità di seme
+    for nome in FOGLI_CON_ID:
+        dati[nome][COLONNA_ID] = [f"r{i:011x}" for i in range(len(dati[nome]))]
+    return dati
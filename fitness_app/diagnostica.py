@@ -0,0 +1,125 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+# --- DIAGNOSTICA DELLE PRESTAZIONI ---
+# Misure leggere (span) attorno a letture e scritture dei fogli, preparazione dei dati,
+# pagine e grafici: numero di chiamate, latenze, righe elaborate e hit/miss della cache.
+# Un registro per processo, condiviso da tutte le sessioni e dai thread del caricamento;
+# lo legge la pagina Diagnostica (coach) e si esporta in JSON lines.
+
+LIVELLI_HIT = ("memoria", "disco")  # cache dell'archivio: servito senza andare al backend
+
+
+class Diagnostica:
+    """Aggregati per nome di span più gli ultimi eventi (al massimo max_eventi)."""
+
+    def __init__(self, max_eventi=1000, file_jsonl=None):
+        self.file_jsonl = file_jsonl
+        self._eventi = deque(maxlen=max_eventi)
+        self._aggregati = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, nome, **attributi):
+        """
+        Misura il blocco. Il dizionario restituito accetta altri attributi durante
+        l'esecuzione: righe (elaborate) e cache (livello che ha servito la lettura).
+        """
+        dettagli = dict(attributi)
+        inizio = time.perf_counter()
+        try:
+            yield dettagli
+        except BaseException as e:
+            dettagli["errore"] = type(e).__name__
+            raise
+        finally:
+            self.registra(nome, time.perf_counter() - inizio, **dettagli)
+
+    def misura(self, nome, conta_righe=False):
+        """Decoratore: span attorno alla funzione (righe = len del risultato se richiesto)."""
+        def decoratore(funzione):
+            def avvolta(*args, **kwargs):
+                with self.span(nome) as dettagli:
+                    risultato = funzione(*args, **kwargs)
+                    if conta_righe and risultato is not None:
+                        dettagli["righe"] = len(risultato)
+                    return risultato
+            avvolta.__name__ = funzione.__name__
+            avvolta.__doc__ = funzione.__doc__
+            return avvolta
+        return decoratore
+
+    def registra(self, nome, durata, righe=None, cache=None, errore=None, **attributi):
+        evento = {"ts": round(time.time(), 3), "nome": nome, "ms": round(durata * 1000, 3)}
+        if righe is not None:
+            evento["righe"] = int(righe)
+        if cache is not None:
+            evento["cache"] = cache
+        if errore is not None:
+            evento["errore"] = errore
+        evento.update(attributi)
+        with self._lock:
+            self._eventi.append(evento)
+            aggregato = self._aggregati.get(nome)
+            if aggregato is None:
+                aggregato = self._aggregati[nome] = {
+                    "chiamate": 0, "totale_ms": 0.0, "max_ms": 0.0, "ultimo_ms": 0.0,
+                    "righe": 0, "hit": 0, "miss": 0, "errori": 0,
+                }
+            aggregato["chiamate"] += 1
+            aggregato["totale_ms"] += evento["ms"]
+            aggregato["max_ms"] = max(aggregato["max_ms"], evento["ms"])
+            aggregato["ultimo_ms"] = evento["ms"]
+            aggregato["righe"] += evento.get("righe", 0)
+            if cache is not None:
+                aggregato["hit" if cache in LIVELLI_HIT else "miss"] += 1
+            if errore is not None:
+                aggregato["errori"] += 1
+            if self.file_jsonl:
+                try:
+                    with open(self.file_jsonl, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(evento, ensure_ascii=False) + "\n")
+                except OSError:
+                    # Un file non scrivibile non deve rompere la misura (né la pagina)
+                    self.file_jsonl = None
+
+    def riepilogo(self):
+        """DataFrame con una riga per span, ordinato per tempo totale."""
+        colonne = ["nome", "chiamate", "totale_ms", "medio_ms", "max_ms", "ultimo_ms",
+                   "righe", "hit", "miss", "errori"]
+        with self._lock:
+            righe = [{"nome": nome, **aggregato} for nome, aggregato in self._aggregati.items()]
+        if not righe:
+            return pd.DataFrame(columns=colonne)
+        df = pd.DataFrame(righe)
+        df["medio_ms"] = df["totale_ms"] / df["chiamate"]
+        return df[colonne].sort_values("totale_ms", ascending=False, ignore_index=True)
+
+    def eventi(self, ultimi=None):
+        with self._lock:
+            eventi = list(self._eventi)
+        return eventi[-ultimi:] if ultimi else eventi
+
+    def esporta_jsonl(self, percorso=None):
+        """Eventi in memoria come JSON lines; con percorso li scrive anche su file."""
+        testo = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in self.eventi())
+        if percorso is not None:
+            with open(percorso, "w", encoding="utf-8") as f:
+                f.write(testo)
+        return testo
+
+    def azzera(self):
+        with self._lock:
+            self._eventi.clear()
+            self._aggregati.clear()
+
+
+# Registro del processo: fitness_app.diagnostica.span(...) ovunque
+DIAGNOSTICA = Diagnostica()
+span = DIAGNOSTICA.span
+misura = DIAGNOSTICA.misura
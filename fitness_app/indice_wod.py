@@ -0,0 +1,133 @@
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .chiavi import ASSENTE
+
+# --- INDICE DEI RISULTATI PER WOD ---
+# Per ogni WOD (id_esercizio) i risultati ordinati per data, con un punteggio unico in cui
+# più basso è meglio (secondi per i tempi, valore cambiato di segno per reps/kg). Una
+# finestra di date ("ultimi 90 giorni", una stagione) è una fetta trovata con la ricerca
+# binaria sull'array delle date; la classifica tiene solo il miglior risultato di ogni
+# atleta. La classifica su tutto lo storico è già pronta per ogni genere.
+
+COLONNE = ["data", "id_atleta", "nome", "genere", "valore", "punteggio"]
+
+
+class IndiceWod:
+    """Classifiche per WOD (miglior risultato per atleta) con filtri per genere e date."""
+
+    def __init__(self, esercizi_df):
+        if {"id_esercizio", "tipo_valore"} <= set(esercizi_df.columns):
+            tipi = esercizi_df.drop_duplicates("id_esercizio")
+            self.tipo_valore = dict(zip(tipi["id_esercizio"].astype(int), tipi["tipo_valore"].astype(str)))
+        else:
+            self.tipo_valore = {}
+        self._risultati = {}  # {id_wod: DataFrame COLONNE ordinato per data}
+        self._date = {}       # {id_wod: array datetime64 delle date valide, per la ricerca binaria}
+        self._pronte = {}     # {(id_wod, genere): classifica su tutto lo storico}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def costruisci(cls, test_df, esercizi_df):
+        indice = cls(esercizi_df)
+        indice.aggiungi(test_df)
+        return indice
+
+    def copia(self):
+        """Copia per gli snapshot: i risultati di ogni WOD si sostituiscono, mai modificati, quindi si condividono."""
+        nuova = copy.copy(self)
+        with self._lock:
+            nuova._risultati = dict(self._risultati)
+            nuova._date = dict(self._date)
+            nuova._pronte = dict(self._pronte)
+        nuova._lock = threading.Lock()
+        return nuova
+
+    def _righe(self, test_df):
+        """Risultati dei WOD indicizzati presenti in test_df, con il punteggio calcolato."""
+        if test_df.empty or not {"id_esercizio", "id_atleta", "data"} <= set(test_df.columns):
+            return pd.DataFrame(columns=COLONNE + ["id_esercizio"])
+        id_es = test_df["id_esercizio"].astype("int64")
+        tempo = id_es.map(self.tipo_valore).eq("tempo")
+        if "valore_sec" in test_df.columns:
+            secondi = test_df["valore_sec"].astype("float64")
+        else:
+            secondi = pd.Series(np.nan, index=test_df.index)
+        numeri = test_df["valore_num"] if "valore_num" in test_df.columns else pd.to_numeric(test_df["valore"], errors="coerce")
+        righe = pd.DataFrame({
+            "id_esercizio": id_es,
+            "data": pd.to_datetime(test_df["data"], errors="coerce"),
+            "id_atleta": test_df["id_atleta"].astype("int32"),
+            "nome": test_df["nome"].astype("object"),
+            "genere": test_df["genere"].astype("object") if "genere" in test_df.columns else None,
+            "valore": test_df["valore"].astype("object"),
+            "punteggio": secondi.where(tempo, -numeri.astype("float64")),
+        })
+        righe = righe[id_es.isin(list(self.tipo_valore)) & righe["punteggio"].notna() & (righe["id_atleta"] != ASSENTE)]
+        return righe
+
+    def _memorizza(self, id_wod, df):
+        # Le righe senza data restano in fondo: entrano solo nella classifica senza finestra
+        df = df.sort_values("data", kind="stable", na_position="last").reset_index(drop=True)
+        self._risultati[id_wod] = df
+        self._date[id_wod] = df["data"].dropna().to_numpy(dtype="datetime64[ns]")
+        for chiave in [k for k in self._pronte if k[0] == id_wod]:
+            del self._pronte[chiave]
+
+    def aggiungi(self, test_df):
+        """Aggiunge i test (nuovi o l'intero storico): si toccano solo i WOD coinvolti."""
+        righe = self._righe(test_df)
+        with self._lock:
+            for id_wod, nuove in righe.groupby("id_esercizio", sort=False):
+                nuove = nuove[COLONNE]
+                attuali = self._risultati.get(id_wod)
+                self._memorizza(id_wod, nuove if attuali is None else pd.concat([attuali, nuove], ignore_index=True))
+        return self
+
+    def contiene(self, id_wod):
+        """True se il WOD ha risultati nell'indice."""
+        return int(id_wod) in self._risultati
+
+    def ricalcola(self, test_df, id_wod):
+        """Ricostruisce da test_df i risultati di un WOD (es. dopo l'eliminazione di un test)."""
+        id_wod = int(id_wod)
+        righe = self._righe(test_df[test_df["id_esercizio"] == id_wod] if len(test_df) else test_df)
+        with self._lock:
+            self._memorizza(id_wod, righe[COLONNE])
+        return self
+
+    def _migliori(self, df):
+        # Miglior punteggio di ogni atleta; a parità vince il risultato ottenuto prima
+        df = df.sort_values(["punteggio", "data"], kind="stable").drop_duplicates("id_atleta")
+        df = df.reset_index(drop=True)
+        df.insert(0, "posizione", range(1, len(df) + 1))
+        return df[["posizione", "nome", "valore", "data", "genere"]]
+
+    def classifica(self, id_wod, genere=None, dal=None, al=None):
+        """
+        Classifica del WOD con il miglior risultato di ogni atleta. genere filtra i risultati,
+        dal/al (date incluse, anche una sola delle due) limitano la finestra temporale.
+        """
+        id_wod = int(id_wod)
+        with self._lock:
+            df = self._risultati.get(id_wod)
+            if df is None:
+                return pd.DataFrame(columns=["posizione", "nome", "valore", "data", "genere"])
+            if dal is None and al is None:
+                chiave = (id_wod, genere)
+                if chiave not in self._pronte:
+                    self._pronte[chiave] = self._migliori(df if not genere else df[df["genere"] == genere])
+                return self._pronte[chiave]
+            date = self._date[id_wod]
+        # Ricerca binaria sulle date ordinate (le righe senza data stanno dopo e restano fuori)
+        inizio = 0 if dal is None else int(np.searchsorted(date, np.datetime64(pd.Timestamp(dal), "ns"), "left"))
+        fine = len(date) if al is None else int(np.searchsorted(
+            date, np.datetime64(pd.Timestamp(al).normalize() + pd.Timedelta(days=1), "ns"), "left"
+        ))
+        finestra = df.iloc[inizio:fine]
+        if genere:
+            finestra = finestra[finestra["genere"] == genere]
+        return self._migliori(finestra)
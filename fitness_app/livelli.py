@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+from .chiavi import normalizza_serie
+
+# --- LIVELLI DI VALUTAZIONE ---
+LIVELLI = ["base", "principiante", "intermedio", "buono", "elite"]
+LIVELLO_MAPPING = {nome: i + 1 for i, nome in enumerate(LIVELLI)}
+NON_VALUTABILE = "Non valutabile"
+
+
+def tempo_in_secondi(serie, accetta_numeri=False):
+    """
+    Converte una Series di tempi 'mm:ss' in secondi (float64, NaN se non valido).
+    Con accetta_numeri=True i valori senza ':' vengono letti come numeri (soglie benchmark).
+    """
+    s = serie.where(serie.notna(), "").astype(str).str.strip()
+    parti = s.str.extract(r"^(\d+):(\d+)$")
+    secondi = parti[0].astype(float) * 60 + parti[1].astype(float)
+    if accetta_numeri:
+        numeri = pd.to_numeric(s.where(~s.str.contains(":", regex=False)), errors="coerce")
+        secondi = secondi.fillna(numeri)
+    return secondi.astype("float64")
+
+
+def _colonna_numerica(df, col):
+    if col not in df.columns:
+        return pd.Series(np.nan, index=df.index, dtype="float64")
+    if df[col].dtype == "float32":
+        # Colonne compatte (vedi schema_dati): si torna a float64 senza il rumore del float32
+        return df[col].astype("float64").round(6)
+    return pd.to_numeric(df[col], errors="coerce").astype("float64")
+
+
+def costruisci_tabella_soglie(benchmark_df):
+    """
+    Tabella soglie tipizzata, da costruire una volta per refresh dati.
+    Indice (esercizio_norm, genere), colonne base…elite in float64 (secondi per il tempo),
+    tipo_valore e minore_migliore (True se un valore più basso è migliore, cioè il tempo).
+    """
+    colonne = ["tipo_valore", "minore_migliore"] + LIVELLI
+    indice_vuoto = pd.MultiIndex.from_arrays([[], []], names=["esercizio_norm", "genere"])
+    if benchmark_df is None or benchmark_df.empty or "esercizio" not in benchmark_df.columns:
+        return pd.DataFrame(columns=colonne, index=indice_vuoto).astype(
+            {"minore_migliore": "bool", **{l: "float64" for l in LIVELLI}}
+        )
+
+    bench = pd.DataFrame({
+        "esercizio_norm": benchmark_df["esercizio_norm"] if "esercizio_norm" in benchmark_df.columns
+        else normalizza_serie(benchmark_df["esercizio"]),
+        "genere": benchmark_df["genere"].astype(str).str.strip(),
+        "tipo_valore": benchmark_df["tipo_valore"].astype(str).str.strip(),
+    })
+    bench["minore_migliore"] = bench["tipo_valore"] == "tempo"
+    for livello in LIVELLI:
+        grezzo = benchmark_df[livello] if livello in benchmark_df.columns else pd.Series(np.nan, index=benchmark_df.index)
+        bench[livello] = np.where(
+            bench["minore_migliore"],
+            tempo_in_secondi(grezzo, accetta_numeri=True),
+            pd.to_numeric(grezzo, errors="coerce"),
+        ).astype("float64")
+    bench = bench.drop_duplicates(["esercizio_norm", "genere"], keep="first")
+    return bench.set_index(["esercizio_norm", "genere"])[colonne]
+
+
+def formatta_soglia(valore, minore_migliore):
+    """Soglia numerica in forma leggibile: 'mm:ss' per i tempi, numero altrimenti."""
+    if valore is None or pd.isna(valore):
+        return None
+    if minore_migliore:
+        return f"{int(valore) // 60:02d}:{int(valore) % 60:02d}"
+    return f"{valore:g}"
+
+
+def calcola_livelli(test_df, soglie_df):
+    """
+    Calcola il livello di OGNI test in un colpo solo.
+    Allinea i test alla tabella soglie (vedi costruisci_tabella_soglie) su (esercizio_norm, genere)
+    e confronta i valori in modo vettoriale (tempo: valore <= soglia, altrimenti valore >= soglia).
+
+    Ritorna un DataFrame con lo stesso indice di test_df e le colonne:
+    - livello_num: 0 (nessuna soglia raggiunta / nessun benchmark) … 5 (elite)
+    - livello: "Base" … "Elite" oppure "Non valutabile"
+    - valore_calcolato: valore confrontato con le soglie (kg relativi, reps, secondi)
+    - ha_benchmark: True se esiste un benchmark per esercizio e genere
+    """
+    risultato = pd.DataFrame(index=test_df.index)
+    if test_df.empty:
+        risultato["livello_num"] = pd.Series(dtype="int8")
+        risultato["livello"] = pd.Series(dtype="object")
+        risultato["valore_calcolato"] = pd.Series(dtype="float64")
+        risultato["ha_benchmark"] = pd.Series(dtype="bool")
+        return risultato
+
+    esercizio_norm = test_df["esercizio_norm"] if "esercizio_norm" in test_df.columns \
+        else normalizza_serie(test_df["esercizio"])
+    genere = test_df["genere"].astype(str).str.strip() if "genere" in test_df.columns \
+        else pd.Series("", index=test_df.index)
+    chiavi = pd.MultiIndex.from_arrays([esercizio_norm.values, genere.values])
+    allineate = soglie_df.reindex(chiavi)
+
+    ha_benchmark = allineate["tipo_valore"].notna().values
+    is_tempo = allineate["minore_migliore"].eq(True).values
+    is_kg_rel = (allineate["tipo_valore"] == "kg_rel").values
+
+    # --- Valore da confrontare con le soglie (già convertito se test_df è tipizzato) ---
+    valore = test_df["valore"].reset_index(drop=True)
+    if "valore_num" in test_df.columns:
+        valore_num = test_df["valore_num"].to_numpy(dtype="float64")
+    else:
+        valore_num = pd.to_numeric(valore.astype(str).str.replace(",", ".", regex=False), errors="coerce").values
+    if "valore_sec" in test_df.columns:
+        valore_sec = test_df["valore_sec"].astype("float64").to_numpy()
+    else:
+        valore_sec = tempo_in_secondi(valore).values
+    peso = _colonna_numerica(test_df, "peso_corporeo").values
+    if "peso" in test_df.columns:
+        peso = np.where(np.isnan(peso), _colonna_numerica(test_df, "peso").values, peso)
+    relativo = _colonna_numerica(test_df, "relativo").values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valore_rel = np.where(peso > 0, valore_num / peso, relativo)
+    val = np.where(is_tempo, valore_sec, np.where(is_kg_rel, valore_rel, valore_num))
+
+    # --- Soglie già numeriche (n × 5) ---
+    soglie = allineate[LIVELLI].to_numpy(dtype="float64")
+    with np.errstate(invalid="ignore"):
+        raggiunto = np.where(is_tempo[:, None], val[:, None] <= soglie, val[:, None] >= soglie)
+    raggiunto &= ha_benchmark[:, None]
+    # Livello più alto raggiunto (come il vecchio ciclo da "elite" verso "base")
+    livello_num = np.where(
+        raggiunto.any(axis=1),
+        len(LIVELLI) - np.argmax(raggiunto[:, ::-1], axis=1),
+        0,
+    ).astype("int8")
+
+    etichette = np.array([NON_VALUTABILE] + [l.capitalize() for l in LIVELLI], dtype=object)
+    risultato["livello_num"] = livello_num
+    risultato["livello"] = etichette[livello_num]
+    risultato["valore_calcolato"] = val
+    risultato["ha_benchmark"] = ha_benchmark
+    return risultato
+
+
+def aggiungi_livelli(test_df, soglie_df):
+    """Ritorna una copia di test_df con le colonne di calcola_livelli() aggiunte."""
+    df = test_df.copy()
+    livelli = calcola_livelli(df, soglie_df)
+    for col in livelli.columns:
+        df[col] = livelli[col]
+    return df
+
+
+def media_livelli_per_categoria(test_livelli, esercizi_df, col_esercizio="id_esercizio", livello_minimo=0):
+    """
+    Media di livello_num per categoria, nell'ordine delle categorie di esercizi_df.
+    test_livelli deve avere livello_num (vedi aggiungi_livelli). Un esercizio presente in
+    più categorie conta in ognuna. Ritorna (etichette, valori) pronti per il radar.
+    """
+    if test_livelli.empty or esercizi_df.empty:
+        return [], []
+    appartenenza = esercizi_df[["categoria", col_esercizio]].drop_duplicates()
+    unione = test_livelli[[col_esercizio, "livello_num"]].merge(appartenenza, on=col_esercizio, how="inner")
+    medie = unione["livello_num"].clip(lower=livello_minimo).groupby(unione["categoria"]).mean()
+    etichette, valori = [], []
+    for categoria in esercizi_df["categoria"].unique():
+        if categoria in medie.index:
+            etichette.append(str(categoria).capitalize())
+            valori.append(round(float(medie[categoria]), 2))
+    return etichette, valori
@@ -0,0 +1,120 @@
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .chiavi import ASSENTE, ATLETI
+from .livelli import calcola_livelli
+
+# --- MATRICE ATLETI × CATEGORIE DEI LIVELLI ---
+# Somme e conteggi di livello_num per (atleta, categoria) in due array NumPy densi:
+# righe = id_atleta (chiavi.ATLETI), colonne = categorie nell'ordine del foglio esercizi.
+# Si costruisce una volta per caricamento dei dati e si aggiorna con i soli test inseriti
+# o eliminati; ogni radar (singolo atleta o box intero) è una fetta della matrice.
+
+
+class MatriceLivelli:
+    """Medie dei livelli per atleta e categoria, aggiornabili incrementalmente."""
+
+    def __init__(self, esercizi_df):
+        if not {"id_esercizio", "id_categoria", "categoria"} <= set(esercizi_df.columns):
+            esercizi_df = pd.DataFrame(columns=["id_esercizio", "id_categoria", "categoria"])
+        appartenenza = esercizi_df.loc[
+            (esercizi_df["id_esercizio"] != ASSENTE) & (esercizi_df["id_categoria"] != ASSENTE),
+            ["id_esercizio", "id_categoria", "categoria"],
+        ]
+        # Colonne: una per categoria, nell'ordine in cui compare nel foglio esercizi
+        categorie = appartenenza.drop_duplicates("id_categoria")
+        self.etichette = [str(c).capitalize() for c in categorie["categoria"]]
+        colonna_di = {id_cat: i for i, id_cat in enumerate(categorie["id_categoria"])}
+        # Coppie (id_esercizio, colonna): un esercizio in più categorie conta in ognuna
+        coppie = appartenenza[["id_esercizio", "id_categoria"]].drop_duplicates()
+        self._appartenenza = pd.DataFrame({
+            "id_esercizio": coppie["id_esercizio"].to_numpy(dtype="int32"),
+            "colonna": coppie["id_categoria"].map(colonna_di).to_numpy(dtype="int64"),
+        })
+        n_categorie = len(self.etichette)
+        self.somme = np.zeros((0, n_categorie), dtype="float64")
+        self.conteggi = np.zeros((0, n_categorie), dtype="int64")
+        self.zeri = np.zeros((0, n_categorie), dtype="int64")  # test "Non valutabile" (livello 0)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def costruisci(cls, test_df, esercizi_df, soglie_df):
+        matrice = cls(esercizi_df)
+        matrice.aggiungi(test_df, soglie_df)
+        return matrice
+
+    def copia(self):
+        """Copia indipendente (gli array si duplicano, il resto non cambia mai): per gli snapshot."""
+        nuova = copy.copy(self)
+        with self._lock:
+            nuova.somme, nuova.conteggi, nuova.zeri = self.somme.copy(), self.conteggi.copy(), self.zeri.copy()
+        nuova._lock = threading.Lock()
+        return nuova
+
+    def _celle(self, test_df, soglie_df):
+        """(righe, colonne, livelli) di ogni coppia test × categoria dell'esercizio."""
+        if test_df.empty or "id_atleta" not in test_df.columns:
+            vuoto = np.array([], dtype="int64")
+            return vuoto, vuoto, np.array([], dtype="float64")
+        if "livello_num" in test_df.columns:
+            livelli = test_df["livello_num"]
+        else:
+            livelli = calcola_livelli(test_df, soglie_df)["livello_num"]
+        celle = pd.DataFrame({
+            "id_atleta": test_df["id_atleta"].to_numpy(dtype="int32"),
+            "id_esercizio": test_df["id_esercizio"].to_numpy(dtype="int32"),
+            "livello_num": livelli.to_numpy(dtype="float64"),
+        })
+        celle = celle[celle["id_atleta"] != ASSENTE].merge(self._appartenenza, on="id_esercizio", how="inner")
+        return (
+            celle["id_atleta"].to_numpy(dtype="int64"),
+            celle["colonna"].to_numpy(dtype="int64"),
+            celle["livello_num"].to_numpy(dtype="float64"),
+        )
+
+    def _accumula(self, test_df, soglie_df, segno):
+        righe, colonne, livelli = self._celle(test_df, soglie_df)
+        with self._lock:
+            necessarie = max(len(ATLETI), int(righe.max()) + 1 if len(righe) else 0)
+            if necessarie > self.somme.shape[0]:
+                extra = ((0, necessarie - self.somme.shape[0]), (0, 0))
+                self.somme = np.pad(self.somme, extra)
+                self.conteggi = np.pad(self.conteggi, extra)
+                self.zeri = np.pad(self.zeri, extra)
+            np.add.at(self.somme, (righe, colonne), segno * livelli)
+            np.add.at(self.conteggi, (righe, colonne), segno)
+            np.add.at(self.zeri, (righe, colonne), segno * (livelli <= 0))
+
+    def aggiungi(self, test_df, soglie_df):
+        """Aggiunge i test (servono id_atleta e id_esercizio, vedi chiavi.aggiungi_codici)."""
+        self._accumula(test_df, soglie_df, 1)
+        return self
+
+    def rimuovi(self, test_df, soglie_df):
+        """Toglie i test eliminati (stesse righe che erano state aggiunte)."""
+        self._accumula(test_df, soglie_df, -1)
+        return self
+
+    def _radar(self, somme, conteggi, zeri, livello_minimo):
+        # Con livello_minimo=1 i test non valutabili contano come "base" (0 -> 1)
+        if livello_minimo:
+            somme = somme + zeri * livello_minimo
+        presenti = conteggi > 0
+        medie = np.divide(somme, conteggi, out=np.zeros_like(somme), where=presenti)
+        etichette = [e for e, p in zip(self.etichette, presenti) if p]
+        valori = [round(float(v), 2) for v, p in zip(medie, presenti) if p]
+        return etichette, valori
+
+    def profilo(self, nome, livello_minimo=0):
+        """Radar di un atleta: (etichette, valori) delle categorie in cui ha almeno un test."""
+        riga = ATLETI.id(nome)
+        if riga == ASSENTE or riga >= self.somme.shape[0]:
+            return [], []
+        return self._radar(self.somme[riga], self.conteggi[riga], self.zeri[riga], livello_minimo)
+
+    def generale(self, livello_minimo=0):
+        """Radar del box intero: media su tutti i test di tutti gli atleti."""
+        return self._radar(self.somme.sum(axis=0), self.conteggi.sum(axis=0), self.zeri.sum(axis=0), livello_minimo)
@@ -0,0 +1,135 @@
+import functools
+
+import pandas as pd
+
+from .bilanciamento import MatriceBilanciamento
+from .caricamento import FOGLI, carica_fogli
+from .chiavi import aggiungi_codici, normalizza_serie
+from .classifiche import Classifiche
+from .diagnostica import span
+from .indice_wod import IndiceWod
+from .livelli import costruisci_tabella_soglie
+from .matrice_livelli import MatriceLivelli
+from .righe import COLONNA_ID, FOGLI_CON_ID, assicura_id
+from .schema_dati import tipizza_test
+from .ultimi_test import costruisci_ultimi_test
+
+# --- PREPARAZIONE DEI DATI CARICATI ---
+# Dai cinque fogli così come arrivano dall'archivio alle tabelle usate dalle pagine:
+# normalizzazione, id interi, categorie dei test, soglie numeriche e viste derivate.
+# Niente Streamlit qui: la stessa pipeline gira nell'app, nei benchmark e negli script.
+
+
+def carica_dati(archivio_dati, caricatori=None, ripiego=None, inizializza_thread=None):
+    """
+    Scarica in parallelo i cinque fogli dall'archivio (vedi archivio.configura).
+    Un foglio che non si carica viene preso da ripiego(nome) (es. la copia in sessione),
+    poi dall'ultima copia su disco dell'archivio, altrimenti resta vuoto.
+    caricatori {nome: funzione} sostituisce la lettura diretta dall'archivio.
+    Le righe dei fogli modificabili ancora senza id_riga lo ricevono qui (e lo salvano).
+    Ritorna (dati, tempi, errori) come caricamento.carica_fogli; un id che non si riesce a
+    salvare finisce in errori come "<foglio>.id_riga" (il foglio è comunque caricato).
+    """
+    if caricatori is None:
+        caricatori = {nome: functools.partial(archivio_dati.leggi, nome) for nome in FOGLI}
+    dati, tempi, errori = carica_fogli(caricatori, inizializza_thread=inizializza_thread)
+    for nome in errori:
+        precedente = ripiego(nome) if ripiego else None
+        if precedente is None or precedente.empty:
+            ultima_copia = getattr(archivio_dati, "ultima_copia", None)
+            precedente = ultima_copia(nome) if ultima_copia else None
+        dati[nome] = precedente if precedente is not None else pd.DataFrame()
+    for nome in FOGLI_CON_ID:
+        if nome in dati and nome not in errori:
+            try:
+                with span(f"dati.assicura_id.{nome}", foglio=nome):
+                    dati[nome] = assicura_id(archivio_dati, nome, dati[nome])
+            except Exception as e:
+                # Id non salvati = id inutilizzabili: si riprova al prossimo caricamento
+                errori[f"{nome}.{COLONNA_ID}"] = e
+    return dati, tempi, errori
+
+
+def arricchisci_test(test_df, esercizi_df):
+    """Aggiunge ai test id/chiavi di esercizio e atleta e la categoria dell'esercizio (merge sugli id)."""
+    test_df = test_df.copy()
+    test_df.columns = [str(col).strip().lower() for col in test_df.columns]
+
+    # --- RIMUOVI eventuali colonne duplicate PRIMA del merge! ---
+    test_df = test_df.drop(columns=[
+        col for col in ['categoria', 'categoria_norm', 'id_categoria'] if col in test_df.columns
+    ])
+    aggiungi_codici(test_df, ["esercizio", "nome"])
+    test_df = test_df.merge(
+        esercizi_df[['id_esercizio', 'categoria', 'categoria_norm', 'id_categoria']],
+        how='left',
+        on='id_esercizio'
+    )
+    test_df["id_categoria"] = test_df["id_categoria"].fillna(-1).astype("int32")
+    # Tipi compatti una volta sola (category, datetime, valore_num/valore_sec, float32)
+    return tipizza_test(test_df)
+
+
+def prepara_fogli(dati):
+    """
+    Normalizza i fogli {utenti, esercizi, test, benchmark, wod} (modificati sul posto) e
+    ritorna {utenti_df, esercizi_df, test_df, benchmark_df, soglie_df, wod_df, avvisi};
+    avvisi elenca i problemi da mostrare all'utente.
+    """
+    utenti_df = dati["utenti"]
+    esercizi_df = dati["esercizi"]
+    test_df = dati["test"]
+    benchmark_df = dati["benchmark"]
+    wod_df = dati["wod"]
+    avvisi = []
+    if "esercizio" in benchmark_df.columns and "esercizio" in esercizi_df.columns:
+        categoria_per_esercizio = esercizi_df.drop_duplicates("esercizio").set_index("esercizio")["categoria"]
+        benchmark_df["categoria_norm"] = normalizza_serie(benchmark_df["esercizio"].map(categoria_per_esercizio))
+
+    # Normalizzazione colonne e valori
+    test_df.columns = [str(col).strip().lower() for col in test_df.columns]
+    esercizi_df.columns = [str(col).strip().lower() for col in esercizi_df.columns]
+    benchmark_df.columns = [str(col).strip().lower() for col in benchmark_df.columns]
+    # --- AGGIUNGI id interi e colonne normalizzate (una passata vettoriale per foglio) ---
+    aggiungi_codici(benchmark_df, ["esercizio", "categoria"])
+    # --- Tabella soglie numerica: le stringhe "mm:ss" si parsano una volta sola per refresh ---
+    soglie_df = costruisci_tabella_soglie(benchmark_df)
+    aggiungi_codici(esercizi_df, ["esercizio", "categoria"])
+    aggiungi_codici(utenti_df, ["nome"])
+
+    # --- merge su colonne normalizzate ---
+    if 'esercizio' in test_df.columns and 'esercizio' in esercizi_df.columns and 'categoria' in esercizi_df.columns:
+        test_df = arricchisci_test(test_df, esercizi_df)
+    elif not test_df.empty:
+        avvisi.append("⚠️ Errore: manca la colonna 'esercizio' o 'categoria' nei dati esercizi.")
+    return {
+        "utenti_df": utenti_df,
+        "esercizi_df": esercizi_df,
+        "test_df": test_df,
+        "benchmark_df": benchmark_df,
+        "soglie_df": soglie_df,
+        "wod_df": wod_df,
+        "avvisi": avvisi,
+    }
+
+
+def costruisci_viste(test_df, esercizi_df, soglie_df):
+    """Strutture derivate dai test: {ultimi_test_df, matrice_livelli, classifiche, indice_wod, bilanciamento}."""
+    viste = {}
+    righe = len(test_df)
+    # Vista materializzata degli ultimi test (Dashboard)
+    with span("viste.ultimi_test", righe=righe):
+        viste["ultimi_test_df"] = costruisci_ultimi_test(test_df, soglie_df)
+    # Matrice atleti × categorie dei livelli (tutti i radar)
+    with span("viste.matrice_livelli", righe=righe):
+        viste["matrice_livelli"] = MatriceLivelli.costruisci(test_df, esercizi_df, soglie_df)
+    # Record personali e classifiche per categoria (pagina Classifiche)
+    with span("viste.classifiche", righe=righe):
+        viste["classifiche"] = Classifiche.costruisci(test_df, esercizi_df)
+    # Indice dei risultati per WOD (pagina Classifica Workout)
+    with span("viste.indice_wod", righe=righe):
+        viste["indice_wod"] = IndiceWod.costruisci(test_df, esercizi_df)
+    # Test per atleta e macro-area (pagina Bilanciamento Atleti)
+    with span("viste.bilanciamento", righe=righe):
+        viste["bilanciamento"] = MatriceBilanciamento.costruisci(test_df, esercizi_df)
+    return viste
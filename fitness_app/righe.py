@@ -0,0 +1,137 @@
+import threading
+import uuid
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# --- ID STABILI DELLE RIGHE ---
+# Ogni riga dei fogli modificabili porta un id_riga che non cambia mai (né con le modifiche
+# né con le eliminazioni di altre righe). Modifiche ed eliminazioni puntano a quell'id:
+# sul foglio si toccano solo le celle coinvolte, in memoria la riga si trova con un dizionario
+# id -> etichetta invece di maschere booleane su nome/esercizio/data.
+
+COLONNA_ID = "id_riga"
+COLONNA_POSIZIONE = "posizione"  # negli id da assegnare: riga della tabella, 0 = prima riga di dati
+FOGLI_CON_ID = ("utenti", "esercizi", "test", "wod")
+
+
+def nuovo_id():
+    # La "r" iniziale evita che Sheets lo legga come numero (es. "12e4…")
+    return "r" + uuid.uuid4().hex[:11]
+
+
+def _senza_id(df):
+    if COLONNA_ID not in df.columns:
+        return pd.Series(True, index=df.index)
+    valori = df[COLONNA_ID]
+    return valori.isna() | (valori.astype(str).str.strip() == "")
+
+
+def id_mancanti(df):
+    """DataFrame (posizione, id_riga) con un id nuovo per ogni riga di df che non l'ha."""
+    posizioni = np.flatnonzero(_senza_id(df).to_numpy())
+    return pd.DataFrame({COLONNA_POSIZIONE: posizioni, COLONNA_ID: [nuovo_id() for _ in posizioni]})
+
+
+def assegna_per_posizione(df, id_df):
+    """Ritorna df con gli id di id_df (vedi id_mancanti) nelle righe che non ne hanno ancora uno."""
+    if id_df.empty or df.empty:
+        return df
+    posizioni = id_df[COLONNA_POSIZIONE].to_numpy(dtype="int64")
+    valide = posizioni < len(df)
+    valide[valide] = _senza_id(df).to_numpy()[posizioni[valide]]
+    if not valide.any():
+        return df
+    df = df.copy()
+    if COLONNA_ID not in df.columns:
+        df[COLONNA_ID] = ""
+    df[COLONNA_ID] = df[COLONNA_ID].astype("object")
+    df.iloc[posizioni[valide], df.columns.get_loc(COLONNA_ID)] = id_df[COLONNA_ID].to_numpy(dtype="object")[valide]
+    return df
+
+
+def con_id(df):
+    """(df con un id_riga per ogni riga, True se ne sono stati assegnati di nuovi)."""
+    id_df = id_mancanti(df)
+    if id_df.empty:
+        return df, False
+    return assegna_per_posizione(df, id_df), True
+
+
+def assicura_id(archivio_dati, nome, df):
+    """
+    Assegna l'id alle righe che non l'hanno (fogli vecchi o righe scritte a mano sul foglio)
+    e salva solo quelle celle (archivio.assegna_id): succede una volta sola, poi le righe
+    hanno già il loro id. Se il salvataggio fallisce l'eccezione risale e df resta com'era.
+    """
+    id_df = id_mancanti(df)
+    if id_df.empty:
+        return df
+    archivio_dati.assegna_id(nome, id_df)
+    return assegna_per_posizione(df, id_df)
+
+
+# --- INDICE id_riga -> etichetta di riga ---
+# Uno per DataFrame, costruito alla prima ricerca: i DataFrame degli snapshot non cambiano
+# mai, quindi l'indice resta valido finché il DataFrame esiste.
+_indici = {}  # id(df) -> (weakref al df, {id_riga: etichetta})
+_lock = threading.Lock()
+
+
+def indice_righe(df):
+    """Dizionario {id_riga: etichetta nell'indice di df}."""
+    chiave = id(df)
+    with _lock:
+        voce = _indici.get(chiave)
+        if voce is not None and voce[0]() is df:
+            return voce[1]
+    mappa = dict(zip(df[COLONNA_ID].astype(str), df.index)) if COLONNA_ID in df.columns else {}
+    with _lock:
+        _indici[chiave] = (weakref.ref(df, lambda _, k=chiave: _indici.pop(k, None)), mappa)
+    return mappa
+
+
+def etichette(df, id_righe):
+    """Etichette delle righe con quegli id (quelli che non ci sono vengono ignorati)."""
+    mappa = indice_righe(df)
+    return [mappa[i] for i in map(str, id_righe) if i in mappa]
+
+
+def riga(df, id_riga):
+    """La riga con quell'id (Series), None se non c'è."""
+    mappa = indice_righe(df)
+    return df.loc[mappa[str(id_riga)]] if str(id_riga) in mappa else None
+
+
+def aggiorna_per_id(df, modifiche_df):
+    """
+    Ritorna df con le celle di modifiche_df (id_riga + solo le colonne cambiate) applicate
+    alle righe con lo stesso id; gli id assenti vengono ignorati.
+    """
+    if modifiche_df.empty or df.empty:
+        return df
+    colonne = [c for c in modifiche_df.columns if c != COLONNA_ID]
+    righe = etichette(df, modifiche_df[COLONNA_ID])
+    if not righe or not colonne:
+        return df
+    mappa = indice_righe(df)
+    df = df.copy()
+    for col in colonne:
+        if col not in df.columns:
+            df[col] = None
+        elif isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("object")
+    for id_riga, valori in zip(modifiche_df[COLONNA_ID].astype(str), modifiche_df[colonne].itertuples(index=False, name=None)):
+        if id_riga in mappa:
+            df.loc[mappa[id_riga], colonne] = list(valori)
+    # Stesse etichette e stessi id: l'indice del df di partenza vale anche per la copia
+    with _lock:
+        _indici[id(df)] = (weakref.ref(df, lambda _, k=id(df): _indici.pop(k, None)), mappa)
+    return df
+
+
+def elimina_per_id(df, id_righe):
+    """Ritorna df senza le righe con quegli id."""
+    righe = etichette(df, id_righe)
+    return df.drop(index=righe) if righe else df
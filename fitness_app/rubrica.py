@@ -0,0 +1,85 @@
+import threading
+import weakref
+
+# --- RUBRICA UTENTI ---
+# Indici hash sul foglio utenti, costruiti una volta per versione dei dati: login e ricerca
+# di un utente per (nome, ruolo) diventano ricerche in un dizionario invece di normalizzare e
+# scandire tutto utenti_df a ogni click. utenti_df degli snapshot non cambia mai, quindi la
+# rubrica resta valida finché quel DataFrame esiste (una scrittura ne crea uno nuovo).
+
+
+def _chiave(valore):
+    """Nome o ruolo come li confronta il login: senza spazi ai bordi, minuscolo."""
+    return str(valore).strip().lower()
+
+
+def _indici(utenti_df):
+    """({(nome, ruolo): [etichette nell'ordine del foglio]}, [nomi degli atleti])."""
+    accesso, atleti = {}, {}
+    if {"nome", "ruolo"} <= set(utenti_df.columns):
+        for etichetta, nome, ruolo in zip(utenti_df.index, utenti_df["nome"], utenti_df["ruolo"]):
+            accesso.setdefault((_chiave(nome), _chiave(ruolo)), []).append(etichetta)
+            if ruolo == "atleta":
+                atleti.setdefault(nome, None)
+    return accesso, list(atleti)
+
+
+class RubricaUtenti:
+    """Login e ricerca per nome su un utenti_df (indici da rubrica(), non ricostruirli a mano)."""
+
+    def __init__(self, utenti_df, indici=None):
+        self.utenti_df = utenti_df
+        self._accesso, self._atleti = indici or _indici(utenti_df)
+
+    def accedi(self, nome, pin, ruolo):
+        """Dizionario dell'utente (nome, pin e ruolo normalizzati) se le credenziali sono valide, altrimenti None."""
+        pin = str(pin).strip()
+        for etichetta in self._accesso.get((_chiave(nome), _chiave(ruolo)), ()):
+            riga = self.utenti_df.loc[etichetta]
+            if str(riga.get("pin", "")).strip() == pin:
+                utente = riga.to_dict()
+                utente.update(nome=_chiave(riga["nome"]), pin=pin, ruolo=_chiave(riga["ruolo"]))
+                return utente
+        return None
+
+    def utente(self, nome, ruolo="atleta"):
+        """Riga (Series) dell'utente con quel nome e ruolo (la prima, a parità), None se non c'è."""
+        etichette = self._accesso.get((_chiave(nome), _chiave(ruolo)))
+        return None if not etichette else self.utenti_df.loc[etichette[0]]
+
+    def atleti(self):
+        """Nomi degli atleti, senza doppioni e nell'ordine del foglio."""
+        return list(self._atleti)
+
+
+# Solo gli indici: un riferimento al DataFrame lo terrebbe in vita anche dopo lo snapshot
+_rubriche = {}  # id(utenti_df) -> (weakref al df, indici)
+_lock = threading.Lock()
+
+
+def rubrica(utenti_df):
+    """Rubrica di utenti_df: gli indici si costruiscono alla prima richiesta e poi si riusano."""
+    chiave = id(utenti_df)
+    with _lock:
+        voce = _rubriche.get(chiave)
+        if voce is not None and voce[0]() is utenti_df:
+            return RubricaUtenti(utenti_df, voce[1])
+    indici = _indici(utenti_df)
+    with _lock:
+        _rubriche[chiave] = (weakref.ref(utenti_df, lambda _, k=chiave: _rubriche.pop(k, None)), indici)
+    return RubricaUtenti(utenti_df, indici)
+
+
+def accedi(dati_aggiornati, nome, pin, ruolo):
+    """
+    Login sullo snapshot di dati_aggiornati(forza_controllo=False, fogli=...). Se le credenziali
+    non valgono (utente o PIN appena cambiati sul foglio?) si ricontrolla subito la versione di
+    'utenti', senza aspettare l'intervallo, e si riprova una volta se i dati sono cambiati.
+    """
+    snapshot = dati_aggiornati()
+    utente = rubrica(snapshot.utenti_df).accedi(nome, pin, ruolo)
+    if utente is None:
+        ricaricato = dati_aggiornati(forza_controllo=True, fogli=["utenti"])
+        if ricaricato is not snapshot:
+            utente = rubrica(ricaricato.utenti_df).accedi(nome, pin, ruolo)
+    return utente
@@ -0,0 +1,83 @@
+import pandas as pd
+
+from .livelli import tempo_in_secondi
+
+# --- SCHEMA TIPIZZATO DEI TEST ---
+# test_df arriva da get_all_records con colonne object: qui si converte una volta sola
+# al caricamento, così le pagine non ripetono to_numeric/to_datetime/parsing dei tempi.
+
+# Colonne del foglio "test" (ordine con cui si scrivono)
+COLONNE_FOGLIO_TEST = ["nome", "esercizio", "valore", "tipo_valore", "peso_corporeo", "relativo", "data", "genere", "id_riga"]
+COLONNE_CATEGORIA = ["nome", "esercizio", "genere", "tipo_valore", "categoria"]
+COLONNE_FLOAT32 = ["peso_corporeo", "relativo"]
+
+
+def _numeri(serie):
+    """Numeri anche scritti con la virgola decimale ("72,5")."""
+    return pd.to_numeric(serie.astype(str).str.strip().str.replace(",", ".", regex=False), errors="coerce")
+
+
+def tipizza_test(test_df):
+    """
+    Ritorna test_df con tipi compatti:
+    - nome/esercizio/genere/tipo_valore/categoria come category
+    - data come datetime64 (NaT se non leggibile)
+    - valore invariato per la visualizzazione, più valore_num (float64)
+      e valore_sec (Int32, secondi dei tempi "mm:ss")
+    - peso_corporeo/relativo come float32
+    Si può richiamare su un DataFrame già tipizzato (es. dopo aver accodato righe nuove).
+    """
+    df = test_df.copy()
+    if df.empty and not len(df.columns):
+        return df
+    for col in COLONNE_CATEGORIA:
+        if col in df.columns:
+            df[col] = df[col].astype("object").where(df[col].notna(), None).astype("category")
+    if "data" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["data"]):
+        df["data"] = pd.to_datetime(df["data"], errors="coerce", format="mixed")
+    if "valore" in df.columns:
+        df["valore_num"] = _numeri(df["valore"]).astype("float64")
+        df["valore_sec"] = tempo_in_secondi(df["valore"]).round().astype("Int32")
+    for col in COLONNE_FLOAT32:
+        if col in df.columns:
+            df[col] = _numeri(df[col]).astype("float32")
+    return df
+
+
+def accoda_test(test_df, nuovi_df):
+    """
+    test_df con in fondo nuovi_df, entrambi già tipizzati: si uniscono solo le categorie
+    delle colonne category, senza ritipizzare tutto test_df a ogni inserimento.
+    """
+    if nuovi_df.empty:
+        return test_df
+    if test_df.empty:
+        return nuovi_df.reset_index(drop=True)
+    test_df, nuovi_df = test_df.copy(deep=False), nuovi_df.copy(deep=False)
+    for col in COLONNE_CATEGORIA:
+        if col in test_df.columns and col in nuovi_df.columns:
+            categorie = test_df[col].cat.categories.union(nuovi_df[col].cat.categories)
+            if not categorie.equals(test_df[col].cat.categories):
+                test_df[col] = test_df[col].cat.set_categories(categorie)
+            nuovi_df[col] = nuovi_df[col].cat.set_categories(categorie)
+    return pd.concat([test_df, nuovi_df], ignore_index=True)
+
+
+def formatta_data(valore):
+    """Data in forma 'AAAA-MM-GG' per le etichette (stringa vuota se mancante)."""
+    return "" if pd.isna(valore) else pd.Timestamp(valore).strftime("%Y-%m-%d")
+
+
+def test_per_foglio(test_df):
+    """Righe di test_df nel formato del foglio: solo le sue colonne, date 'AAAA-MM-GG', niente category."""
+    df = test_df[[c for c in COLONNE_FOGLIO_TEST if c in test_df.columns]].copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("object")
+    for col in COLONNE_FLOAT32:
+        if col in df.columns and df[col].dtype == "float32":
+            # Senza arrotondare 72.3 tornerebbe nel foglio come 72.30000305175781
+            df[col] = df[col].astype("float64").round(6)
+    if "data" in df.columns and pd.api.types.is_datetime64_any_dtype(df["data"]):
+        df["data"] = df["data"].dt.strftime("%Y-%m-%d")
+    return df
@@ -0,0 +1,80 @@
+import pandas as pd
+
+from .chiavi import normalizza_serie
+from .livelli import LIVELLI, aggiungi_livelli
+
+# --- VISTA "ULTIMO TEST PER ATLETA × ESERCIZIO" ---
+# Tabella materializzata con indice (nome, esercizio_norm): per ogni coppia l'ultimo test
+# con livello e avanzamento già calcolati. Si costruisce a ogni refresh dei dati e si
+# aggiorna riga per riga quando un test viene inserito o eliminato.
+
+CHIAVE = ["nome", "esercizio_norm"]
+PROGRESSO_NON_VALUTABILE = 0.1  # barra appena visibile per i test senza livello
+
+
+def _prepara(test_df, soglie_df):
+    df = test_df.copy()
+    if "esercizio_norm" not in df.columns:
+        df["esercizio_norm"] = normalizza_serie(df["esercizio"])
+    df = aggiungi_livelli(df, soglie_df)
+    df["progresso"] = (df["livello_num"] / len(LIVELLI)).where(df["livello_num"] > 0, PROGRESSO_NON_VALUTABILE)
+    # La vista è piccola e si aggiorna cella per cella: niente category (non accettano valori nuovi)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype) or col in CHIAVE:
+            df[col] = df[col].astype("object")
+    return df
+
+
+def _ultimi(df):
+    # Ordinamento stabile: a parità di data vince la riga inserita per ultima
+    return df.sort_values("data", kind="stable").drop_duplicates(CHIAVE, keep="last")
+
+
+def costruisci_ultimi_test(test_df, soglie_df):
+    """Ultimo test di ogni (nome, esercizio_norm) con livello, livello_num e progresso (0–1)."""
+    if test_df.empty:
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=CHIAVE))
+    return _ultimi(_prepara(test_df, soglie_df)).set_index(CHIAVE).sort_index()
+
+
+def aggiorna_ultimi_test(vista, nuovi_test, soglie_df):
+    """Applica i test appena inseriti: sostituiscono l'ultimo solo se non sono più vecchi."""
+    if nuovi_test.empty:
+        return vista
+    nuovi = _ultimi(_prepara(nuovi_test, soglie_df)).set_index(CHIAVE)
+    if vista.empty:
+        return nuovi.sort_index()
+    presenti = nuovi.index.intersection(vista.index)
+    if len(presenti):
+        piu_recenti = nuovi.loc[presenti, "data"] >= vista.loc[presenti, "data"]
+        da_sostituire = piu_recenti[piu_recenti].index
+        colonne = vista.columns.intersection(nuovi.columns)
+        vista = vista.copy()  # la vista di partenza può essere in uno snapshot condiviso
+        vista.loc[da_sostituire, colonne] = nuovi.loc[da_sostituire, colonne]
+    mancanti = nuovi.index.difference(vista.index)
+    if len(mancanti):
+        vista = pd.concat([vista, nuovi.loc[mancanti]]).sort_index()
+    return vista
+
+
+def ricalcola_ultimi_test(vista, test_df, chiavi, soglie_df):
+    """
+    Ricalcola solo le coppie (nome, esercizio_norm) indicate a partire da test_df
+    (es. dopo l'eliminazione di un test); le coppie rimaste senza test spariscono.
+    """
+    chiavi = pd.MultiIndex.from_tuples(list(chiavi), names=CHIAVE)
+    vista = vista.drop(index=chiavi.intersection(vista.index))
+    if test_df.empty:
+        return vista
+    norm = test_df["esercizio_norm"] if "esercizio_norm" in test_df.columns else normalizza_serie(test_df["esercizio"])
+    coinvolti = pd.MultiIndex.from_arrays([test_df["nome"].astype("object"), norm.astype("object")]).isin(chiavi)
+    return aggiorna_ultimi_test(vista, test_df[coinvolti], soglie_df)
+
+
+def ultimi_test_atleta(vista, nome):
+    """Ultimi test dell'atleta, dal più vecchio al più recente (DataFrame vuoto se non ce ne sono)."""
+    try:
+        righe = vista.xs(nome, level="nome", drop_level=False)
+    except KeyError:
+        return vista.iloc[0:0].reset_index()
+    return righe.reset_index().sort_values("data", kind="stable")
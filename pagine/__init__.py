@@ -0,0 +1,55 @@
+# Pagine dell'app: ogni modulo espone mostra(ctx) e viene importato solo quando la pagina
+# si apre, così plotly, PIL e le viste pesanti non rallentano l'avvio né i rerun delle altre pagine
+import importlib
+import time
+
+import streamlit as st
+
+from fitness_app.diagnostica import span
+
+# nome in sidebar -> (modulo, ruolo richiesto; None = tutti i loggati).
+# Le voci del menu che non sono qui (es. "📒 esercizi") non disegnano nulla, come prima.
+PAGINE = {
+    "🏠 Dashboard": ("pagine.dashboard", None),
+    "➕ Inserisci nuovo test": ("pagine.inserisci_test", None),
+    "👤 Profilo Atleta": ("pagine.profilo", None),
+    "📅 Calendario WOD": ("pagine.calendario_wod", None),
+    "⚙️ Gestione esercizi": ("pagine.gestione_esercizi", "coach"),
+    "📋 Storico Dati utenti": ("pagine.storico_utenti", "coach"),
+    "📊 Bilanciamento Atleti": ("pagine.bilanciamento", "coach"),
+    "➕ Aggiungi Utente": ("pagine.aggiungi_utente", "coach"),
+    "⚙️ Gestione benchmark": ("pagine.gestione_benchmark", "coach"),
+    "📊 Grafici": ("pagine.grafici", None),
+    "📜 Storico test": ("pagine.storico_test", None),
+    "📈 Storico Progressi": ("pagine.storico_progressi", None),
+    "📒 WOD": ("pagine.wod", None),
+    "🏆 Classifiche": ("pagine.classifiche", "coach"),
+    "🏅 Classifica Workout": ("pagine.classifica_wod", None),
+    "📊 Graf Coach": ("pagine.graf_coach", None),
+    "🩺 Diagnostica": ("pagine.diagnostica", "coach"),
+}
+
+
+def mostra_pagina(nome, ctx):
+    """
+    Importa (la prima volta) e disegna la pagina; i tempi finiscono in st.session_state.tempi_pagina
+    e nella diagnostica (span pagina.import.<modulo> e pagina.<modulo>).
+    """
+    if nome not in PAGINE:
+        return
+    modulo, ruolo = PAGINE[nome]
+    if ruolo is not None and (ctx.utente is None or ctx.utente.get("ruolo") != ruolo):
+        st.warning("Questa pagina è riservata ai coach.")
+        return
+    breve = modulo.rsplit(".", 1)[-1]
+    inizio = time.perf_counter()
+    with span(f"pagina.import.{breve}"):
+        pagina = importlib.import_module(modulo)
+    importata = time.perf_counter()
+    with span(f"pagina.{breve}"):
+        pagina.mostra(ctx)
+    st.session_state.tempi_pagina = {
+        "pagina": nome,
+        "import": importata - inizio,
+        "render": time.perf_counter() - importata,
+    }
@@ -0,0 +1,58 @@
+import pandas as pd
+import streamlit as st
+
+from fitness_app.dataset import DATASET, con_righe
+from fitness_app.righe import COLONNA_ID, nuovo_id
+from pagine.comuni import aggiungi_righe_google_sheets
+
+
+# --- Aggiunta di un nuovo utente (coach) ---
+def mostra(ctx):
+    utente = ctx.utente
+    utenti_df = ctx.utenti_df
+    st.title("Aggiungi Utente")
+
+    with st.form("form_nuovo_utente"):
+        nome = st.text_input("Nome e Cognome")
+        pin = st.text_input("PIN (numerico o stringa)", max_chars=6)
+        ruolo = st.selectbox("Ruolo", ["atleta", "coach"])
+        data_nascita = st.date_input("Data di nascita")
+        peso = st.number_input("Peso (kg)", min_value=20.0, max_value=250.0, step=0.1)
+        altezza = st.number_input("Altezza (cm)", min_value=100.0, max_value=230.0, step=0.1)
+        genere = st.selectbox("Genere", ["Maschio", "Femmina", "Altro"])
+        email = st.text_input("Email")
+        telefono = st.text_input("Telefono")
+        obiettivi = st.text_area("Obiettivi")
+        note_mediche = st.text_area("Note mediche")
+        data_iscrizione = st.date_input("Data iscrizione", value=pd.to_datetime("today"))
+        scadenza_certificato = st.date_input("Scadenza certificato")
+        foto_profilo = st.text_input("Link foto profilo (opzionale)")
+
+        submitted = st.form_submit_button("Aggiungi utente")
+
+        if submitted:
+            try:
+                nuovo_utente = {
+                    "nome": nome.strip().title(),
+                    "pin": pin,
+                    "ruolo": ruolo,
+                    "data_nascita": data_nascita.strftime("%Y-%m-%d"),
+                    "peso": peso,
+                    "altezza": altezza,
+                    "genere": genere,
+                    "email": email,
+                    "telefono": telefono,
+                    "obiettivi": obiettivi,
+                    "note_mediche": note_mediche,
+                    "data_iscrizione": data_iscrizione.strftime("%Y-%m-%d"),
+                    "scadenza_certificato": scadenza_certificato.strftime("%Y-%m-%d"),
+                    "foto_profilo": foto_profilo,
+                    COLONNA_ID: nuovo_id(),
+                }
+
+                nuovo_utente_df = pd.DataFrame([nuovo_utente])
+                aggiungi_righe_google_sheets(nuovo_utente_df, "utenti", "utenti")
+                DATASET.aggiorna(con_righe("utenti_df", nuovo_utente_df))
+                st.success(f"Utente '{nome}' aggiunto con successo!")
+            except Exception as e:
+                st.error(f"Errore durante il salvataggio: {e}")
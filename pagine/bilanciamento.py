@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from fitness_app.bilanciamento import COLONNA_TOTALE
+
+# Fasce di colore per numero di test: rosso chiaro se zero, giallo se pochi, verde se OK
+SOGLIA_POCHI = 3
+COLORI = ("#ffcccc", "#fff5ba", "#ccffcc")
+
+
+def colori_fasce(tabella):
+    """CSS di ogni cella delle macro-aree in una passata vettoriale (per Styler.apply con axis=None)."""
+    valori = tabella.to_numpy()
+    colori = np.select([valori == 0, valori < SOGLIA_POCHI], COLORI[:2], default=COLORI[2])
+    return pd.DataFrame(np.char.add("background-color: ", colori), index=tabella.index, columns=tabella.columns)
+
+
+# --- Bilanciamento atleti: test per macro-area (coach) ---
+def mostra(ctx):
+    # Matrice atleti × macro-aree mantenuta nello snapshot (fitness_app.bilanciamento):
+    # qui nessuna pivot, la tabella è già pronta e aggiornata con gli ultimi test
+    bilanciamento = ctx.bilanciamento
+    st.title("Bilanciamento Atleti")
+    st.write("Bilancia i carichi di lavoro degli atleti.")
+
+    # --- Tabella bilanciamento ---
+    tabella_bilanciamento = bilanciamento.tabella()
+    st.dataframe(tabella_bilanciamento, use_container_width=True)
+
+    # Usa st.dataframe per l'interattività, st.write(pivot.style) per i colori
+    st.write("### Tabella Bilanciamento Atleti (colorata):")
+    macroaree = [c for c in tabella_bilanciamento.columns if c != COLONNA_TOTALE]
+    st.dataframe(
+        tabella_bilanciamento.style.apply(colori_fasce, axis=None, subset=macroaree)  # solo le macroaree, non il totale
+    )
+
+    st.download_button(
+        label="📥 Scarica Tabella (CSV)",
+        data=bilanciamento.csv(),
+        file_name='bilanciamento_atleti.csv',
+        mime='text/csv',
+    )
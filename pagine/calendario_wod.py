@@ -0,0 +1,132 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from fitness_app.dataset import DATASET, con_righe, con_righe_aggiornate, con_righe_eliminate
+from fitness_app.righe import COLONNA_ID, nuovo_id, riga
+from pagine.comuni import aggiorna_righe_google_sheets, aggiungi_righe_google_sheets, elimina_righe_google_sheets
+
+
+# --- Calendario WOD: ricerca e, per il coach, aggiunta/modifica/eliminazione ---
+def mostra(ctx):
+    utente = ctx.utente
+    wod_df = ctx.wod_df
+    st.title("Calendario WOD")
+    st.write("Visualizza e filtra il calendario degli allenamenti.")
+
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        filtro_nome = st.text_input("🔍 Cerca WOD per nome", "")
+    with col2:
+        data_filtro = st.date_input("📆 Filtra per data (facoltativo)")
+
+    # Filtra il DataFrame
+    filtered_df = wod_df.copy()
+    if filtro_nome:
+        filtered_df = filtered_df[filtered_df["nome"].str.contains(filtro_nome, case=False, na=False)]
+    if data_filtro:
+        filtered_df = filtered_df[pd.to_datetime(filtered_df["data"]) == pd.to_datetime(data_filtro)]
+
+    st.dataframe(filtered_df)
+
+    # SOLO COACH: funzioni avanzate (export, aggiungi, modifica, elimina)
+    if utente['ruolo'] == 'coach':
+
+        # --- ESPORTA IN CSV ---
+        st.markdown("#### Esporta calendario")
+        if st.button("Esporta in CSV"):
+            filtered_df.to_csv("Calendario_WOD.csv", index=False)
+            st.success("File CSV esportato (scarica dalla sidebar a sinistra se sei su Streamlit Cloud)!")
+
+        st.markdown("---")
+
+        # --- AGGIUNGI NUOVO WOD ---
+        st.subheader("➕ Aggiungi un nuovo WOD")
+        with st.form("aggiungi_wod"):
+            nome = st.text_input("Nome del WOD", key="wod_nome")
+            descrizione = st.text_area("Descrizione", key="wod_descrizione")
+            data_wod = st.date_input("Data", value=datetime.date.today(), key="wod_data")
+            principiante = st.text_input("Versione Principiante", key="wod_principiante")
+            intermedio = st.text_input("Versione Intermedio", key="wod_intermedio")
+            avanzato = st.text_input("Versione Avanzato", key="wod_avanzato")
+            esercizi = st.text_area("Esercizi (separati da virgola)", key="wod_esercizi")
+            tipo_valore = st.selectbox("Tipo Valore", ["kg", "reps", "tempo", "calorie", "metri", "round", "altro"], key="wod_tipo_valore")
+            titolo = st.text_input("Titolo/Obiettivo del WOD", key="wod_titolo")
+            submit_wod = st.form_submit_button("Salva nuovo WOD")
+            if submit_wod:
+                nuovo_wod = {
+                    "nome": nome,
+                    "descrizione": descrizione,
+                    "data": data_wod.strftime("%Y-%m-%d"),
+                    "principiante": principiante,
+                    "intermedio": intermedio,
+                    "avanzato": avanzato,
+                    "esercizi": esercizi,
+                    "tipo_valore": tipo_valore,
+                    "titolo": titolo,
+                    COLONNA_ID: nuovo_id(),
+                }
+                nuovo_wod_df = pd.DataFrame([nuovo_wod])
+                aggiungi_righe_google_sheets(nuovo_wod_df, "wod", "wod")
+                wod_df = DATASET.aggiorna(con_righe("wod_df", nuovo_wod_df)).wod_df
+                st.success("Nuovo WOD aggiunto!")
+
+        st.markdown("---")
+
+        # --- MODIFICA WOD ---
+        st.subheader("✏️ Modifica un WOD esistente")
+        if not wod_df.empty and COLONNA_ID in wod_df.columns:
+            # Si sceglie per id_riga (le etichette data - nome possono ripetersi)
+            info = dict(zip(wod_df[COLONNA_ID].astype(str), wod_df["data"].astype(str) + " - " + wod_df["nome"].astype(str)))
+            wod_da_modificare = st.selectbox("Seleziona un WOD da modificare", list(info), format_func=info.get, key="modifica_wod_select")
+            if wod_da_modificare:
+                row = riga(wod_df, wod_da_modificare)
+                tipo_valori_possibili = ["kg", "reps", "tempo", "calorie", "metri", "round", "altro"]
+                valore_attuale = str(row["tipo_valore"]) if str(row["tipo_valore"]) in tipo_valori_possibili else tipo_valori_possibili[0]
+                with st.form("modifica_wod_form"):
+                    nome_mod = st.text_input("Nome del WOD", value=row["nome"], key="mod_nome")
+                    descrizione_mod = st.text_area("Descrizione", value=row["descrizione"], key="mod_descrizione")
+                    data_mod = st.date_input("Data", value=pd.to_datetime(row["data"]), key="mod_data")
+                    principiante_mod = st.text_input("Versione Principiante", value=row["principiante"], key="mod_principiante")
+                    intermedio_mod = st.text_input("Versione Intermedio", value=row["intermedio"], key="mod_intermedio")
+                    avanzato_mod = st.text_input("Versione Avanzato", value=row["avanzato"], key="mod_avanzato")
+                    esercizi_mod = st.text_area("Esercizi (separati da virgola)", value=row["esercizi"], key="mod_esercizi")
+                    tipo_valore_mod = st.selectbox(
+                        "Tipo Valore", 
+                        tipo_valori_possibili, 
+                        index=tipo_valori_possibili.index(valore_attuale),
+                        key="mod_tipo_valore"
+                    )
+                    titolo_mod = st.text_input("Titolo/Obiettivo del WOD", value=row["titolo"], key="mod_titolo")
+                    submit_mod = st.form_submit_button("Salva modifiche")
+                    if submit_mod:
+                        nuovi = {
+                            "nome": nome_mod, "descrizione": descrizione_mod, "data": data_mod.strftime("%Y-%m-%d"),
+                            "principiante": principiante_mod, "intermedio": intermedio_mod, "avanzato": avanzato_mod,
+                            "esercizi": esercizi_mod, "tipo_valore": tipo_valore_mod, "titolo": titolo_mod,
+                        }
+                        # Solo le celle cambiate di questa riga, sul foglio e nello snapshot
+                        cambiati = {col: v for col, v in nuovi.items() if str(row.get(col, "")) != v}
+                        if cambiati:
+                            modifiche = pd.DataFrame([{COLONNA_ID: wod_da_modificare, **cambiati}])
+                            aggiorna_righe_google_sheets(modifiche, "wod", "wod")
+                            DATASET.aggiorna(con_righe_aggiornate("wod_df", modifiche))
+                        st.success("WOD aggiornato con successo!")
+
+        st.markdown("---")
+
+        # --- ELIMINA WOD ---
+        st.subheader("🗑️ Elimina un WOD")
+        if not wod_df.empty and COLONNA_ID in wod_df.columns:
+            info = dict(zip(wod_df[COLONNA_ID].astype(str), wod_df["data"].astype(str) + " - " + wod_df["nome"].astype(str)))
+            wod_da_eliminare = st.selectbox(
+                "Seleziona un WOD da eliminare", list(info), format_func=info.get, key="elimina_wod_select"
+            )
+            if st.button("Elimina WOD"):
+                # Sul foglio si cancella solo quella riga
+                elimina_righe_google_sheets([wod_da_eliminare], "wod", "wod")
+                DATASET.aggiorna(con_righe_eliminate("wod_df", [wod_da_eliminare]))
+                st.success("WOD eliminato con successo!")
+        else:
+            st.info("Non ci sono WOD da eliminare.")
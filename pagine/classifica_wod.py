@@ -0,0 +1,13 @@
+import streamlit as st
+
+from classifica_workout import mostra_classifica_wod
+
+
+# --- Classifica di un singolo WOD ---
+def mostra(ctx):
+    esercizi_df = ctx.esercizi_df
+    indice_wod = ctx.indice_wod
+    st.title("Classifica Workout")
+    wod_list = esercizi_df[esercizi_df['tipo_valore'].isin(['tempo', 'reps', 'kg_rel'])]['esercizio'].unique()
+    wod_selezionato = st.selectbox("Seleziona un WOD", wod_list)
+    mostra_classifica_wod(indice_wod, wod_selezionato)
@@ -0,0 +1,30 @@
+import streamlit as st
+
+
+# --- Classifiche per categoria (coach) ---
+def mostra(ctx):
+    classifiche = ctx.classifiche
+    st.title("Classifiche")
+    st.write("Visualizza le classifiche degli atleti, suddivise per categoria e tipo di valore.")
+
+    # Classifiche già pronte nel motore (classifiche.Classifiche): qui si leggono solo le fette
+    genere_classifica = st.selectbox("Genere", ["Tutti", "Maschio", "Femmina"], key="classifiche_genere")
+    genere_classifica = None if genere_classifica == "Tutti" else genere_classifica
+    for id_cat, cat in classifiche.categorie.items():
+        st.subheader(f"Categoria: {cat.capitalize()}")
+
+        # --- CLASSIFICHE NUMERICHE (kg, reps, ecc) - somma dei PR di ogni esercizio ---
+        classifica_num = classifiche.classifica(id_cat, tempo=False, genere=genere_classifica)
+        if not classifica_num.empty:
+            st.write("Classifica test numerici (somma PR di tutti gli esercizi):")
+            st.dataframe(classifica_num)
+        else:
+            st.info("Nessun test numerico per questa categoria.")
+
+        # --- CLASSIFICHE TEMPO (minuti:secondi) - somma dei best time, più basso è meglio ---
+        classifica_tempo = classifiche.classifica(id_cat, tempo=True, genere=genere_classifica)
+        if not classifica_tempo.empty:
+            st.write("Classifica test a tempo (somma best time di tutti gli esercizi, più basso è meglio):")
+            st.dataframe(classifica_tempo)
+        else:
+            st.info("Nessun test a tempo per questa categoria.")
@@ -0,0 +1,31 @@
+from fitness_app import archivio
+
+
+# --- SCRITTURE SUI FOGLI (condivise dalle pagine) ---
+# La cache dell'archivio (memoria + ./cache) si aggiorna da sola a ogni scrittura
+def aggiungi_righe_google_sheets(righe_df, file_name, sheet_name):
+    """
+    Accoda solo le nuove righe al foglio (un'unica append lato archivio, quindi due coach
+    che salvano insieme non si sovrascrivono).
+    """
+    if righe_df.empty:
+        return
+    archivio.get_archivio().aggiungi(sheet_name, righe_df)
+
+def upsert_righe_google_sheets(righe_df, file_name, sheet_name, chiavi):
+    """Aggiorna le righe già presenti (stessa chiave) e accoda le altre, inviando solo quelle."""
+    if righe_df.empty:
+        return
+    archivio.get_archivio().upsert(sheet_name, righe_df, chiavi)
+
+def aggiorna_righe_google_sheets(modifiche_df, file_name, sheet_name):
+    """Scrive solo le celle cambiate (id_riga + colonne modificate) delle righe con quell'id."""
+    if modifiche_df.empty:
+        return
+    archivio.get_archivio().aggiorna_righe(sheet_name, modifiche_df)
+
+def elimina_righe_google_sheets(id_righe, file_name, sheet_name):
+    """Elimina dal foglio solo le righe con quegli id_riga (non riscrive il resto)."""
+    if len(id_righe) == 0:
+        return
+    archivio.get_archivio().elimina_righe(sheet_name, list(id_righe))
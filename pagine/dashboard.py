@@ -0,0 +1,54 @@
+from PIL import Image
+import streamlit as st
+
+from fitness_app.ultimi_test import ultimi_test_atleta
+
+
+# --- Dashboard: ultimi test dell'atleta con livello e avanzamento ---
+def mostra(ctx):
+    utente = ctx.utente
+    ultimi_test_df = ctx.ultimi_test_df
+
+    try:
+        logo = Image.open("assets/logo.png")
+        st.image(logo, width=120)
+    except Exception as e:
+        st.warning(f"Logo non caricato: {e}")
+
+
+    st.markdown("<h1 style='color:#263959;'>Dashboard</h1>", unsafe_allow_html=True)
+    st.write("Benvenuto nella Dashboard! Qui puoi visualizzare i tuoi progressi e accedere alle funzionalità principali.")
+        # --- Ultimi test per esercizio, con livello e progress bar ---
+    if utente and 'nome' in utente:
+        # Ultimi test con livello e progresso già calcolati (vista ultimi_test_df)
+        latest_tests = ultimi_test_atleta(ultimi_test_df, utente['nome'])
+        st.markdown("### 🏋️‍♂️ Ultimi test per esercizio")
+
+        livello_colore = {
+            "Base": "gray",
+            "Principiante": "orange",
+            "Intermedio": "dodgerblue",
+            "Buono": "seagreen",
+            "Elite": "gold"
+        }
+
+        if not latest_tests.empty:
+            for _, row in latest_tests.iterrows():
+                livello = row['livello']
+
+                col1, col2 = st.columns([2, 1])
+                with col1:
+                    st.metric(f"{row['esercizio']}", row['valore'])
+                    st.markdown(
+                        f"<span style='font-size:0.95em; color:{livello_colore.get(livello, 'black')};'>Livello: <b>{livello}</b></span>",
+                        unsafe_allow_html=True
+                    )
+                    # Progress bar visiva
+                    st.progress(float(row['progresso']))
+                with col2:
+                    if row['tipo_valore'] == 'kg_rel':
+                        st.text(f"Forza relativa: {row.get('relativo', '-')}")
+        else:
+            st.info("Non ci sono ancora test inseriti per questo atleta.")
+    else:
+        st.warning("Devi essere loggato come atleta per visualizzare i tuoi progressi.")
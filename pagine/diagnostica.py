@@ -0,0 +1,61 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from fitness_app.diagnostica import DIAGNOSTICA
+
+
+# --- Diagnostica prestazioni (coach): span di fogli, preparazione dati, pagine e grafici ---
+def mostra(ctx):
+    st.title("🩺 Diagnostica prestazioni")
+    st.caption(
+        "Misure del processo (tutte le sessioni) dall'avvio o dall'ultimo azzeramento: "
+        "archivio.* = letture/scritture dei fogli, dati.* e viste.* = preparazione, "
+        "pagina.* = import e disegno delle pagine, grafico.* = serializzazione Plotly."
+    )
+
+    riepilogo = DIAGNOSTICA.riepilogo()
+    if riepilogo.empty:
+        st.info("Nessuna misura ancora registrata.")
+        return
+
+    gruppo = riepilogo["nome"].str.split(".").str[0]
+    gruppi = ["Tutti"] + sorted(gruppo.unique())
+    scelto = st.selectbox("Gruppo", gruppi, key="diagnostica_gruppo")
+    if scelto != "Tutti":
+        riepilogo = riepilogo[gruppo == scelto]
+    st.dataframe(
+        riepilogo.set_index("nome").round({"totale_ms": 1, "medio_ms": 1, "max_ms": 1, "ultimo_ms": 1}),
+        use_container_width=True,
+    )
+
+    # --- Cache dei fogli: quante letture evitano il backend ---
+    letture = riepilogo[riepilogo["nome"].str.startswith("archivio.leggi.")]
+    if not letture.empty:
+        st.subheader("Cache dei fogli")
+        cache = pd.DataFrame({
+            "foglio": letture["nome"].str.removeprefix("archivio.leggi."),
+            "hit": letture["hit"],
+            "miss": letture["miss"],
+        }).set_index("foglio")
+        cache["hit %"] = (100 * cache["hit"] / (cache["hit"] + cache["miss"]).where(lambda x: x > 0)).round(1)
+        st.dataframe(cache, use_container_width=True)
+
+    st.subheader("Ultimi eventi")
+    st.dataframe(pd.DataFrame(DIAGNOSTICA.eventi(ultimi=200)[::-1]), use_container_width=True)
+
+    colonna_export, colonna_azzera = st.columns(2)
+    with colonna_export:
+        st.download_button(
+            "⬇️ Esporta JSON lines",
+            data=DIAGNOSTICA.esporta_jsonl(),
+            file_name=f"diagnostica_{datetime.datetime.now():%Y%m%d_%H%M%S}.jsonl",
+            mime="application/x-ndjson",
+        )
+    with colonna_azzera:
+        if st.button("🧹 Azzera misure", key="diagnostica_azzera"):
+            DIAGNOSTICA.azzera()
+            st.rerun()
+    if DIAGNOSTICA.file_jsonl:
+        st.caption(f"Le misure vengono accodate anche in {DIAGNOSTICA.file_jsonl}")
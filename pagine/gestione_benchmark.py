@@ -0,0 +1,34 @@
+import plotly.graph_objects as go
+import streamlit as st
+
+from fitness_app.diagnostica import span
+
+
+# --- Gestione benchmark: livelli medi per categoria di tutto il box (coach) ---
+def mostra(ctx):
+    matrice_livelli = ctx.matrice_livelli
+    st.title("Gestione Benchmark")
+    # ...existing code...
+
+    # Livello medio di OGNI test inserito da tutti (se non trova, "base"=1): fetta della matrice
+    radar_labels, radar_values = matrice_livelli.generale(livello_minimo=1)
+
+    if radar_labels:
+        fig = go.Figure(data=go.Scatterpolar(
+            r=radar_values,
+            theta=radar_labels,
+            fill='toself'
+        ))
+        fig.update_layout(
+            polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
+            showlegend=False,
+            title="Livelli medi per categoria (tutti gli atleti)"
+        )
+        with span("grafico.gestione_benchmark.radar_generale"):
+            st.plotly_chart(fig, use_container_width=True)
+        # Visualizza i valori numerici
+        st.write("**Media livelli per categoria:**")
+        for cat, val in zip(radar_labels, radar_values):
+            st.write(f"- {cat}: {val}/5")
+    else:
+        st.info("Nessun dato disponibile per il grafico radar.")
@@ -0,0 +1,6 @@
+from esercizi import mostra_gestione_esercizi
+
+
+# --- Gestione del catalogo esercizi (coach) ---
+def mostra(ctx):
+    mostra_gestione_esercizi()
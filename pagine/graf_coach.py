@@ -0,0 +1,9 @@
+from graficicoach import mostra_grafici_coach
+
+
+# --- Radar del coach (singolo atleta e box intero) ---
+def mostra(ctx):
+    utenti_df = ctx.utenti_df
+    test_df = ctx.test_df
+    matrice_livelli = ctx.matrice_livelli
+    mostra_grafici_coach(test_df, matrice_livelli, utenti_df)
@@ -0,0 +1,211 @@
+import plotly.graph_objects as go
+import streamlit as st
+
+from fitness_app.chiavi import ATLETI, CATEGORIE, ESERCIZI
+from fitness_app.diagnostica import span
+from fitness_app.livelli import LIVELLO_MAPPING, aggiungi_livelli
+
+
+# --- Pannelli con filtri: ogni @st.fragment rigira solo se stesso al cambio dei suoi widget ---
+@st.fragment
+def _pannello_stato_esercizi(utenti_df, esercizi_df, test_df, soglie_df):
+    livello_mapping = LIVELLO_MAPPING
+    # Scegli atleta: "Tutti gli atleti" o uno specifico
+    opzioni_utenti = ["Tutti gli atleti"] + list(utenti_df[utenti_df['ruolo'] == 'atleta']['nome'].unique())
+    atleta_selezionato = st.selectbox("Seleziona atleta", opzioni_utenti)
+
+    # Scegli categoria/esercizio
+    categorie_disponibili = esercizi_df["categoria"].unique()
+    categoria_selezionata = st.selectbox("Seleziona categoria", categorie_disponibili)
+    esercizi_filtrati = esercizi_df[esercizi_df["id_categoria"] == CATEGORIE.id(categoria_selezionata)]["esercizio"].unique()
+    esercizio_selezionato = st.selectbox("Seleziona esercizio", esercizi_filtrati)
+    id_esercizio_sel = ESERCIZI.id(esercizio_selezionato)
+
+    # Filtro i test in base a chi voglio vedere
+    if atleta_selezionato == "Tutti gli atleti":
+        test_selezionati = test_df[test_df['id_esercizio'] == id_esercizio_sel]
+    else:
+        test_selezionati = test_df[
+            (test_df['id_esercizio'] == id_esercizio_sel) &
+            (test_df['id_atleta'] == ATLETI.id(atleta_selezionato))
+        ]
+
+    # Livello di ogni test in blocco (se non raggiunge nessuna soglia conta come "base")
+    test_selezionati = aggiungi_livelli(test_selezionati, soglie_df)
+    risultati = test_selezionati["livello_num"].clip(lower=1).astype(int).tolist()
+    if atleta_selezionato == "Tutti gli atleti":
+        nomi_barre = test_selezionati["nome"].tolist()
+    else:
+        nomi_barre = test_selezionati["data"].astype(str).tolist()
+
+    if risultati:
+        fig = go.Figure(go.Bar(
+            x=risultati,
+            y=nomi_barre,
+            orientation='h',
+            marker=dict(
+                color='rgba(40, 167, 69, 0.85)',
+                line=dict(color='rgba(40, 167, 69, 1.0)', width=3)
+            ),
+            text=[list(livello_mapping.keys())[r-1].capitalize() for r in risultati],
+            textposition='outside'
+        ))
+        fig.update_layout(
+            xaxis=dict(range=[0.5, 5.5], tickvals=[1,2,3,4,5], ticktext=list(livello_mapping.keys()), title="Livello"),
+            yaxis=dict(title="Atleta" if atleta_selezionato == "Tutti gli atleti" else "Data"),
+            title=f"Livello raggiunto - {esercizio_selezionato}",
+            bargap=0.5,
+            height=60 + 38 * len(nomi_barre)
+        )
+        with span("grafico.grafici.livelli_esercizio"):
+            st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("Non ci sono dati sufficienti per mostrare il grafico.")
+
+
+@st.fragment
+def _pannello_radar_atleta(utenti_df, matrice_livelli):
+    atleta_radar = st.selectbox("Seleziona atleta per Radar", utenti_df[utenti_df['ruolo'] == 'atleta']['nome'].unique(), key="coach_radar_atleta")
+
+    radar_labels, radar_values = matrice_livelli.profilo(atleta_radar)
+    if radar_labels:
+        fig = go.Figure(data=go.Scatterpolar(
+            r=radar_values,
+            theta=radar_labels,
+            fill='toself',
+            marker=dict(color='rgba(0,123,255,0.7)')
+        ))
+        fig.update_layout(
+            polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
+            showlegend=False,
+            title=f"Profilo Radar: {atleta_radar}",
+            margin=dict(l=40, r=40, t=60, b=40)
+        )
+        with span("grafico.grafici.radar_atleta"):
+            st.plotly_chart(fig, use_container_width=True)
+        for label, value in zip(radar_labels, radar_values):
+            st.write(f"**{label}**: {value}/5")
+    else:
+        st.info("Non ci sono dati sufficienti per generare il grafico radar.")
+
+
+@st.fragment
+def _pannello_esercizio_atleta(utente, esercizi_df, test_df, soglie_df):
+    macroaree = esercizi_df["categoria"].unique()
+    macroarea_sel = st.selectbox("Seleziona macro-area", macroaree)
+    esercizi_macro = esercizi_df[esercizi_df["id_categoria"] == CATEGORIE.id(macroarea_sel)]["esercizio"].unique()
+    esercizio_sel = st.selectbox("Seleziona esercizio", esercizi_macro)
+
+    # Dopo aver scelto macroarea e esercizio_sel... (filtro sugli id interi)
+    test_esercizio = test_df[
+        (test_df['id_atleta'] == ATLETI.id(utente['nome'])) &
+        (test_df['id_esercizio'] == ESERCIZI.id(esercizio_sel))
+    ]
+
+    livello = "Non valutabile"    # <--- qui inizializzo
+    livello_num = 1               # Default base
+
+    if not test_esercizio.empty:
+        ultimo = aggiungi_livelli(test_esercizio.sort_values("data").tail(1), soglie_df).iloc[0]
+        if ultimo["livello_num"] > 0:
+            livello = ultimo["livello"]
+            livello_num = int(ultimo["livello_num"])
+
+    # --- GRAFICO NEON (barra crescente, spessa e colorata in base al livello) ---
+    colori_gradiente = [
+        "#ff3333",   # base
+        "#ff9900",   # principiante
+        "#ffee00",   # intermedio
+        "#99ff33",   # buono
+        "#33cc33"    # elite
+    ]
+    colore_barra = colori_gradiente[livello_num - 1]
+
+    fig = go.Figure(go.Bar(
+        x=[livello_num],
+        y=[""],  # o ["Livello"]
+        orientation='h',
+        marker=dict(
+            color=colore_barra,
+            line=dict(color="black", width=6)
+        ),
+        width=[0.7],  # più spessa!
+        text=[livello],
+        textposition="outside"
+    ))
+    fig.update_layout(
+        xaxis=dict(
+            range=[1, 5],
+            tickvals=[1, 2, 3, 4, 5],
+            ticktext=["Base", "Principiante", "Intermedio", "Buono", "Elite"],
+            showgrid=False
+        ),
+        yaxis=dict(showticklabels=False, showgrid=False),
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=150,
+        margin=dict(l=30, r=30, t=20, b=20),
+        showlegend=False,
+        bargap=0.18
+    )
+    with span("grafico.grafici.stato_esercizi"):
+        st.plotly_chart(fig, use_container_width=True)
+    st.markdown(f"<div style='text-align:center;font-size:1.3em;'><b>Livello attuale:</b> {livello}</div>", unsafe_allow_html=True)
+
+
+# --- Grafici di livello per esercizio e radar per macro-area ---
+def mostra(ctx):
+    utente = ctx.utente
+    utenti_df = ctx.utenti_df
+    esercizi_df = ctx.esercizi_df
+    test_df = ctx.test_df
+    soglie_df = ctx.soglie_df
+    matrice_livelli = ctx.matrice_livelli
+
+    if utente['ruolo'] == 'coach':
+        # ----- GRAFICI COACH -----
+        st.subheader("📊 Stato esercizi (tutti o singolo atleta)")
+
+        _pannello_stato_esercizi(utenti_df, esercizi_df, test_df, soglie_df)
+
+        # ------- Grafico Radar COACH: scegli un atleta --------
+        st.markdown("---")
+        st.subheader("📊 Profilo Radar (per atleta)")
+        _pannello_radar_atleta(utenti_df, matrice_livelli)
+
+    else:
+        # ----- GRAFICI ATLETA -----
+        st.subheader("📊 Risultati esercizi: Stato & Macro-Aree")
+
+        _pannello_esercizio_atleta(utente, esercizi_df, test_df, soglie_df)
+
+        st.markdown("---")
+        st.markdown("""
+        <div style="padding:0.7em 1em 0.7em 1em; background:#f7fafc; border-radius:10px; font-size:1.05em;">
+            <b>Cos'è questo grafico radar?</b><br>
+            Questo grafico mostra il tuo livello medio raggiunto in ciascuna macro-area (Forza, Ginnastica, Metabolico, Mobilità, ecc.) sulla base degli esercizi che hai testato.<br>
+            Ogni area va da 1 (Principiante/Base) a 5 (Elite). Più il riempimento si avvicina al bordo, più sei vicino al massimo livello per quella categoria!
+        </div>
+        """, unsafe_allow_html=True)
+        st.markdown("### 📊 Profilo Radar: Macro-Aree (Forza, Ginnastica, Metabolico, Mobilità)")
+
+        radar_labels, radar_values = matrice_livelli.profilo(utente['nome'])
+        if radar_labels:
+            fig = go.Figure(data=go.Scatterpolar(
+                r=radar_values,
+                theta=radar_labels,
+                fill='toself',
+                marker=dict(color='rgba(0,123,255,0.7)')
+            ))
+            fig.update_layout(
+                polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
+                showlegend=False,
+                title="Profilo Radar per Macro-Categoria",
+                margin=dict(l=40, r=40, t=60, b=40)
+            )
+            with span("grafico.grafici.radar_macro_aree"):
+                st.plotly_chart(fig, use_container_width=True)
+            # Mostra valori numerici accanto alle etichette
+            for label, value in zip(radar_labels, radar_values):
+                st.write(f"**{label}**: {value}/5")
+        else:
+            st.info("Non ci sono dati sufficienti per generare il grafico radar.")
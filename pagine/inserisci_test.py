@@ -0,0 +1,303 @@
+import datetime
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from fitness_app.chiavi import CATEGORIE, normalizza
+from fitness_app.dataset import DATASET, con_test_aggiunti
+from fitness_app.diagnostica import span
+from fitness_app.livelli import LIVELLI, LIVELLO_MAPPING, aggiungi_livelli, formatta_soglia
+from fitness_app.righe import COLONNA_ID, nuovo_id
+from fitness_app.rubrica import rubrica
+from pagine.comuni import aggiungi_righe_google_sheets
+
+
+# --- Inserimento di un nuovo test e analisi del test appena salvato ---
+def mostra(ctx):
+    utente = ctx.utente
+    utenti_df = ctx.utenti_df
+    esercizi_df = ctx.esercizi_df
+    test_df = ctx.test_df
+    soglie_df = ctx.soglie_df
+    atleti = rubrica(utenti_df).atleti()
+    st.subheader("➕ Inserisci un nuovo test")
+
+    # --- Reset form se richiesto ---
+    if st.session_state.get("reset_test_form", False):
+        if "categoria" in esercizi_df.columns:
+            st.session_state["categoria_input"] = esercizi_df["categoria"].unique()[0]
+        st.session_state["esercizio_input"] = ""
+        st.session_state["genere_input"] = "Maschio"
+        st.session_state["valore_input"] = 0.0
+        st.session_state["minuti_input"] = 0
+        st.session_state["secondi_input"] = 0
+        st.session_state["data_input"] = datetime.date.today()
+        if utente and utente.get("ruolo") == "coach":
+            st.session_state["nome_atleta_input"] = atleti[0]
+        st.session_state["reset_test_form"] = False
+
+    if "categoria_input" not in st.session_state:
+        if "categoria" in esercizi_df.columns:
+            st.session_state["categoria_input"] = esercizi_df["categoria"].unique()[0]
+        else:
+            st.error("❌ La colonna 'categoria' non è presente nel foglio esercizi.")
+            st.stop()
+
+    categorie_disponibili = esercizi_df["categoria"].unique()
+    categoria_selezionata = st.selectbox("Seleziona categoria", categorie_disponibili, key="categoria_input")
+    esercizi_filtrati = esercizi_df[esercizi_df["id_categoria"] == CATEGORIE.id(categoria_selezionata)]["esercizio"].unique()
+
+    if "esercizio_input" not in st.session_state or st.session_state["esercizio_input"] not in esercizi_filtrati:
+        st.session_state["esercizio_input"] = esercizi_filtrati[0] if len(esercizi_filtrati) > 0 else ""
+
+    esercizio = st.selectbox("Esercizio", esercizi_filtrati, key="esercizio_input")
+
+    if esercizio in esercizi_df["esercizio"].values:
+        tipo_valore = esercizi_df[esercizi_df["esercizio"] == esercizio]["tipo_valore"].values[0]
+    else:
+        st.error("❌ Errore: esercizio non valido. Controlla il database esercizi.")
+        st.stop()
+
+    # Nome Atleta
+    if utente and utente.get("ruolo") == "atleta":
+        nome_atleta = utente["nome"]
+        st.markdown(f"👤 **Atleta:** {nome_atleta}")
+    else:
+        if "nome_atleta_input" not in st.session_state:
+            st.session_state["nome_atleta_input"] = atleti[0]
+        nome_atleta = st.selectbox("Seleziona atleta", atleti, key="nome_atleta_input")
+
+    # Genere
+    genere = st.selectbox("Genere", ["Maschio", "Femmina", "Altro"], key="genere_input")
+
+    # Recupera il peso corporeo dal profilo atleta selezionato o chiedi di inserirlo
+    default_peso = None
+    if utente and utente.get("ruolo") == "atleta":
+        try:
+            default_peso = float(str(utente["peso_corporeo"]).replace(",", "."))
+        except Exception:
+            default_peso = 70.0
+    else:
+        riga_atleta = rubrica(utenti_df).utente(nome_atleta)
+        if riga_atleta is not None:
+            try:
+                default_peso = float(str(riga_atleta["peso_corporeo"]).replace(",", "."))
+            except Exception:
+                default_peso = 70.0
+        else:
+            default_peso = 70.0
+
+    peso_corporeo = st.number_input(
+        "Peso corporeo (kg)",
+        min_value=20.0, max_value=250.0,
+        value=float(default_peso) if default_peso else 70.0,
+        step=0.1
+    )
+
+    # Valore inserito
+    if tipo_valore == "tempo":
+        minuti = st.number_input("Minuti", min_value=0, step=1, key="minuti_input")
+        secondi = st.number_input("Secondi", min_value=0, max_value=59, step=1, key="secondi_input")
+        valore = f"{int(minuti):02d}:{int(secondi):02d}"
+    else:
+        valore = st.number_input("Valore", step=1.0, key="valore_input")
+
+    # Data test
+    data_test = st.date_input("Data", key="data_input")
+
+    # Calcolo valore relativo
+    relativo = None
+    if tipo_valore == "kg_rel" and peso_corporeo is not None and peso_corporeo > 0:
+        try:
+            relativo = round(float(valore) / peso_corporeo, 2)
+        except:
+            relativo = None
+
+    if st.button("Salva test"):
+        try:
+            nuovo_test = {
+                "nome": nome_atleta.strip().title(),
+                "esercizio": esercizio,
+                "valore": str(valore).replace(",", "."),
+                "tipo_valore": tipo_valore,
+                "peso_corporeo": peso_corporeo,
+                "relativo": relativo,
+                "data": data_test.strftime("%Y-%m-%d"),
+                "genere": genere,
+                COLONNA_ID: nuovo_id(),
+            }
+            nuovo_test_df = pd.DataFrame([nuovo_test])
+            # Accoda solo la nuova riga: niente riscrittura né ricaricamento dell'intero storico
+            aggiungi_righe_google_sheets(nuovo_test_df, "test", "test")
+            # Nuovo snapshot condiviso: test_df e viste aggiornati solo con la riga nuova
+            DATASET.aggiorna(con_test_aggiunti(nuovo_test_df))
+            st.session_state["pagina_attiva"] = "➕ Inserisci nuovo test"
+            st.success("✅ Test salvato correttamente!")
+            st.rerun()
+        except Exception as e:
+            st.error(f"⚠️ Errore durante il salvataggio del test: {e}")
+
+        st.session_state["pagina_attiva"] = "➕ Inserisci nuovo test"
+        st.session_state["last_nome"] = nuovo_test["nome"]
+        st.session_state["last_esercizio"] = nuovo_test["esercizio"]
+        st.session_state["last_valore"] = nuovo_test["valore"]
+        st.session_state["last_tipo_valore"] = nuovo_test["tipo_valore"]
+        st.session_state["last_relativo"] = nuovo_test["relativo"]
+        if tipo_valore == "tempo":
+            st.session_state["last_minuti"] = int(minuti)
+            st.session_state["last_secondi"] = int(secondi)
+        st.session_state["reset_test_form"] = True
+        st.rerun()
+
+    # --- ANALISI DEL TEST APPENA SALVATO (usa i valori del form qui sopra) ---
+    if "last_nome" in st.session_state and "last_esercizio" in st.session_state:
+        atleta_test = test_df[test_df["nome"] == st.session_state["last_nome"]]
+        test_utente = test_df[
+            (test_df["nome"] == st.session_state["last_nome"]) &
+            (test_df["esercizio"] == st.session_state["last_esercizio"])
+        ]
+
+        if not test_utente.empty:
+            test_utente["data"] = pd.to_datetime(test_utente["data"])
+            test_utente = test_utente.sort_values("data")
+
+            tipo_valore = st.session_state["last_tipo_valore"]
+            esercizio = st.session_state["last_esercizio"]
+            genere = st.session_state.get("genere_input", "Maschio")  # fallback
+
+            if tipo_valore == "tempo":
+                val_attuale = st.session_state["last_minuti"] * 60 + st.session_state["last_secondi"]
+            elif tipo_valore == "kg_rel":
+                val_attuale = st.session_state["last_relativo"]
+            else:
+                val_attuale = float(st.session_state["last_valore"])
+
+            # Livello dell'ultimo test (stesso motore vettoriale delle altre pagine)
+            test_utente = aggiungi_livelli(test_utente, soglie_df)
+            ultimo = test_utente.iloc[-1]
+            livello_raggiunto = ultimo["livello"]
+
+            if not ultimo["ha_benchmark"]:
+                st.warning("⚠️ Nessun benchmark trovato per l'esercizio o il genere specificato. Verifica i dati del benchmark.")
+            elif ultimo["livello_num"] == 0:
+                st.warning("⚠️ I dati del benchmark sono incompleti o il valore attuale non rientra nelle soglie definite.")
+
+            st.success(f"✅ Hai raggiunto il livello: **{livello_raggiunto.upper()}** 💪")
+
+            # 🔁 Confronto con test precedente
+            if len(test_utente) > 1:
+                test_prec = test_utente.iloc[-2]  # penultimo test
+                if tipo_valore == "tempo":
+                    try:
+                        m, s = map(int, str(test_prec["valore"]).split(":"))
+                        val_prec = m * 60 + s
+                        diff = val_prec - val_attuale
+                        verso = "migliorato" if diff > 0 else "peggiorato"
+                        st.info(f"⏱️ Hai {verso} di **{abs(diff)} secondi** rispetto al test del {test_prec['data'].date()}.")
+                    except Exception:
+                        st.warning("⚠️ Errore nel confronto con il test precedente.")
+                else:
+                    try:
+                        val_prec = float(test_prec["relativo"]) if tipo_valore == "kg_rel" else float(test_prec["valore"])
+                        diff = round(val_attuale - val_prec, 2)
+                        verso = "migliorato" if diff > 0 else "peggiorato"
+                        st.info(f"📊 Hai {verso} di **{abs(diff)}** rispetto al test del {test_prec['data'].date()}.")
+                    except Exception:
+                        st.warning("⚠️ Errore nel confronto con il test precedente.")
+
+        # Mostra l'expander solo dopo il salvataggio
+        if st.session_state.get('show_expander', False):
+            with st.expander("📊 Analisi del test appena inserito", expanded=True):
+                # 1. Calcola livello raggiunto (motore vettoriale sull'ultimo test)
+                chiave = (normalizza(esercizio), str(genere).strip())
+                soglie = soglie_df.loc[chiave] if chiave in soglie_df.index else None
+                livello_raggiunto = "Non valutabile"
+                livello_nome_trovato = None
+                prossimo_livello = None
+                valore_target = None
+                val = None
+                tipo = tipo_valore
+                if not test_utente.empty:
+                    ultimo = aggiungi_livelli(test_utente, soglie_df).iloc[-1]
+                    val = ultimo["valore_calcolato"] if pd.notnull(ultimo["valore_calcolato"]) else None
+                    if ultimo["livello_num"] > 0:
+                        livello_nome_trovato = ultimo["livello"]
+                        livello_raggiunto = livello_nome_trovato
+
+                # 2. Consiglia prossimo livello e valore target
+                if livello_nome_trovato and livello_nome_trovato.lower() != "elite" and soglie is not None:
+                    prossimo = LIVELLI[LIVELLO_MAPPING[livello_nome_trovato.lower()]]
+                    prossimo_livello = prossimo.capitalize()
+                    valore_target = formatta_soglia(soglie[prossimo], soglie["minore_migliore"])
+
+                # Mostra risultati analisi post-salvataggio
+                st.info(f"**Livello raggiunto:** {livello_raggiunto}")
+                if prossimo_livello and valore_target is not None:
+                    st.info(f"🎯 Obiettivo prossimo livello: **{prossimo_livello}** (target: {valore_target})")
+                elif livello_raggiunto == "Elite":
+                    st.success("🏆 Complimenti! Hai raggiunto il livello massimo (Elite).")
+
+                # 3. Suggerisci quando ripetere il test (6 settimane)
+                data_prossimo_test = data_test + datetime.timedelta(weeks=6)
+                st.info(f"🔁 Ripeti questo test il: **{data_prossimo_test.strftime('%Y-%m-%d')}**")
+
+                # 4. Calcola miglioramento percentuale rispetto al test precedente
+                storico = test_df[
+                    (test_df['nome'] == nome_atleta) &
+                    (test_df['esercizio'] == esercizio) &
+                    (test_df['data'] < data_test.strftime("%Y-%m-%d"))
+                ].sort_values("data", ascending=False)
+                miglioramento = None
+                badge = False
+                if not storico.empty:
+                    row_prec = aggiungi_livelli(storico.head(1), soglie_df).iloc[0]
+                    # Valore precedente già convertito (kg relativi, reps, secondi)
+                    val_prec = row_prec["valore_calcolato"] if pd.notnull(row_prec["valore_calcolato"]) else None
+
+                    # Calcola miglioramento percentuale (attenzione: per il tempo, meno è meglio)
+                    if val is not None and val_prec is not None:
+                        if tipo_valore == 'tempo':
+                            miglioramento = (val_prec - val) / val_prec * 100 if val_prec > 0 else None
+                        else:
+                            miglioramento = (val - val_prec) / val_prec * 100 if val_prec > 0 else None
+                        if miglioramento is not None:
+                            st.info(f"📈 Miglioramento rispetto al test precedente: **{miglioramento:+.2f}%**")
+
+                    # 5. Badge se migliora di livello
+                    if livello_nome_trovato and row_prec["livello_num"] > 0:
+                        if LIVELLO_MAPPING[livello_nome_trovato.lower()] > row_prec["livello_num"]:
+                            badge = True
+                    if badge:
+                        st.success("🎉 **Complimenti! Hai sbloccato un nuovo livello!**")
+
+                # Alla fine, resetta il flag per non mostrare l'expander al prossimo caricamento
+                st.session_state['show_expander'] = False
+
+        # Extra: Tabella riassuntiva e mini-grafico
+        st.markdown("### 📊 Storico recente")
+        recenti = atleta_test.sort_values("data", ascending=False).head(5)
+        st.dataframe(recenti[["data", "esercizio", "valore"]], hide_index=True, use_container_width=True)
+
+        # Mini-grafico andamento ultimi test (solo valori numerici)
+        def conv_num(x):
+            try: return float(str(x).replace(",", "."))
+            except: return None
+        recenti["valore_num"] = recenti["valore"].apply(conv_num)
+        valori_plot = recenti[recenti["valore_num"].notnull()]
+        if not valori_plot.empty:
+            fig = go.Figure(go.Scatter(
+                x=valori_plot["data"].astype(str),
+                y=valori_plot["valore_num"],
+                mode='lines+markers',
+                text=valori_plot["esercizio"]
+            ))
+            fig.update_layout(
+                title="Andamento ultimi test (valore numerico)",
+                xaxis_title="Data",
+                yaxis_title="Valore",
+                height=250,
+                margin=dict(l=30, r=30, t=40, b=30)
+            )
+            with span("grafico.inserisci_test.storico_recente"):
+                st.plotly_chart(fig, use_container_width=True)
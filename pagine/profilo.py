@@ -0,0 +1,102 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from fitness_app.dataset import DATASET, con_righe, con_righe_aggiornate
+from fitness_app.righe import COLONNA_ID
+from fitness_app.rubrica import rubrica
+from pagine.comuni import aggiorna_righe_google_sheets, upsert_righe_google_sheets
+
+
+# --- Profilo atleta: dati anagrafici modificabili ---
+def mostra(ctx):
+    utente = ctx.utente
+    utenti_df = ctx.utenti_df
+    st.title("Profilo Atleta")
+    if utente is None:
+        st.warning("Nessun utente loggato.")
+        st.stop()
+
+    # Trova la riga dell’utente nel DataFrame
+    utente_row = rubrica(utenti_df).utente(utente["nome"], utente["ruolo"])
+
+    if utente_row is None:
+        st.error("Dati atleta non trovati.")
+        st.stop()
+
+    st.markdown(f"## 👤 {utente_row['nome'].title()} ({utente_row['ruolo'].capitalize()})")
+
+    eta = "-"
+    if "data_nascita" in utente_row and pd.notnull(utente_row["data_nascita"]):
+        try:
+            data_nascita = pd.to_datetime(str(utente_row["data_nascita"]))
+            oggi = datetime.datetime.now()
+            eta = oggi.year - data_nascita.year - ((oggi.month, oggi.day) < (data_nascita.month, data_nascita.day))
+        except Exception:
+            pass
+
+    info_fields = [
+        ("Data di nascita", "data_nascita"),
+        ("Età", None),  # calcolata
+        ("Genere", "genere"),
+        ("Peso corporeo (kg)", "peso"),
+        ("Altezza (cm)", "altezza"),
+        ("Telefono", "telefono"),
+        ("Email", "email"),
+        ("Note", "note"),
+        ("Obiettivi", "obiettivi"),
+        ("Patologie", "patologie"),
+        ("Scadenza certificato", "certificato_scadenza"),
+        ("Ultima visita medica", "certificato_data"),
+        ("Tag", "tag")
+    ]
+
+    # Questi può modificarli solo l'atleta (tutto il resto solo COACH)
+    campi_modificabili_atleta = ["peso", "altezza", "note", "obiettivi"]
+
+    if utente["ruolo"] == "coach":
+        st.info("Come coach puoi modificare tutti i campi.")
+    else:
+        st.info("Puoi aggiornare solo alcuni dati del tuo profilo (peso, altezza, note, obiettivi).")
+
+    with st.form("modifica_profilo"):
+        nuovi_valori = {}
+        for label, col in info_fields:
+            if col is None:
+                st.write(f"**{label}:** {eta}")
+                continue
+            valore_corrente = utente_row.get(col, "")
+            # Coach: modifica tutto, atleta solo alcuni
+            if utente["ruolo"] == "coach" or (utente["ruolo"] == "atleta" and col in campi_modificabili_atleta):
+                nuovi_valori[col] = st.text_input(label, value=str(valore_corrente) if pd.notnull(valore_corrente) else "")
+            else:
+                st.write(f"**{label}:** {valore_corrente if pd.notnull(valore_corrente) else '-'}")
+        salva = st.form_submit_button("💾 Salva modifiche")
+
+    if salva:
+        # Aggiorna solo i campi modificabili, e di questi solo quelli cambiati davvero
+        cambiati = {
+            col: nuovo for col, nuovo in nuovi_valori.items()
+            if nuovo != (str(utente_row.get(col, "")) if pd.notnull(utente_row.get(col, "")) else "")
+        }
+        id_riga = str(utente_row.get(COLONNA_ID, "") or "").strip()
+        if not cambiati:
+            st.info("Nessuna modifica da salvare.")
+        elif id_riga:
+            # Sul foglio vanno solo le celle cambiate della riga con questo id
+            modifiche = pd.DataFrame([{COLONNA_ID: id_riga, **cambiati}])
+            aggiorna_righe_google_sheets(modifiche, "utenti", "utenti")
+            DATASET.aggiorna(con_righe_aggiornate("utenti_df", modifiche))
+            st.success("Profilo aggiornato correttamente! 🚀")
+            st.rerun()
+        else:
+            # Riga ancora senza id (foglio non aggiornato): si invia la riga intera per nome
+            riga = utente_row.to_frame().T
+            for col, nuovo in cambiati.items():
+                riga[col] = nuovo
+            riga = riga.fillna("")  # ⚠️ Importantissimo per evitare errori Google Sheets con NaN/None!
+            upsert_righe_google_sheets(riga, "utenti", "utenti", chiavi=["nome"])
+            DATASET.aggiorna(con_righe("utenti_df", riga, chiavi=["nome"]))
+            st.success("Profilo aggiornato correttamente! 🚀")
+            st.rerun()
@@ -0,0 +1,107 @@
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from fitness_app.chiavi import ESERCIZI
+from fitness_app.diagnostica import span
+
+
+# --- Storico progressi: tabella, export CSV e andamento per esercizio ---
+def mostra(ctx):
+    st.title("📈 Storico Progressi")
+    st.write("Qui puoi visualizzare lo storico dettagliato dei test inseriti, esportare i dati e vedere l’andamento nel tempo di ogni esercizio.")
+    _pannello_storico(ctx.utente, ctx.test_df)
+
+
+# Filtri, tabella e grafico in un fragment: cambiare atleta o esercizio rigira solo questo pannello
+@st.fragment
+def _pannello_storico(utente, test_df):
+    # Inizializza 'storico' come DataFrame vuoto per evitare errori
+    storico = pd.DataFrame(columns=test_df.columns)
+
+    # AREA ATLETA: mostra solo i test dell’atleta loggato
+    if utente.get('ruolo') == 'atleta':
+        storico = test_df[test_df['nome'] == utente.get('nome')].copy()
+
+    # AREA COACH: filtro per atleta o tutti
+    elif utente.get('ruolo') == 'coach':
+        opzioni_atleti = ["Tutti"] + list(test_df["nome"].unique())
+        atleta_sel = st.selectbox("Seleziona atleta", opzioni_atleti)
+        if atleta_sel == "Tutti":
+            storico = test_df.copy()
+        else:
+            storico = test_df[test_df["nome"] == atleta_sel].copy()
+    else:
+        st.warning("Ruolo utente non riconosciuto. Controlla la configurazione.")
+
+    # Ordina per data discendente
+    storico["data"] = pd.to_datetime(storico["data"], errors="coerce")
+    storico = storico.sort_values("data", ascending=False)
+
+    # Filtro per esercizio
+    esercizi_disp = ["Tutti"] + list(storico["esercizio"].unique())
+    esercizio_sel = st.selectbox("Seleziona esercizio", esercizi_disp)
+    if esercizio_sel != "Tutti":
+        storico = storico[storico["id_esercizio"] == ESERCIZI.id(esercizio_sel)]
+
+    # --- Se la colonna 'livello' non esiste la aggiunge
+    if "livello" not in storico.columns:
+        storico["livello"] = "Non assegnato"
+
+    # Visualizza la tabella solo se c’è almeno un dato
+    if not storico.empty:
+        st.dataframe(
+            storico[["data", "nome", "esercizio", "valore", "livello"]].sort_values("data", ascending=False),
+            hide_index=True,
+            use_container_width=True
+        )
+        # Esporta CSV
+        st.download_button(
+            label="📥 Esporta storico in CSV",
+            data=storico.to_csv(index=False).encode('utf-8'),
+            file_name="storico_test.csv",
+            mime="text/csv"
+        )
+
+        # GRAFICO ANDAMENTO nel tempo per l’esercizio selezionato
+        if esercizio_sel != "Tutti":
+            st.subheader(f"Andamento nel tempo su {esercizio_sel}")
+            y_label = "Valore"
+            x = storico["data"]
+
+            # --- Conversione automatica valori (numeri o tempi mm:ss) ---
+            def converti_valore(v):
+                v = str(v).strip()
+                if ":" in v:
+                    try:
+                        m, s = map(int, v.split(":"))
+                        return m * 60 + s
+                    except Exception as e:
+                        st.warning(f"Errore conversione tempo '{v}': {e}")
+                        return None
+                try:
+                    return float(v.replace(",", "."))
+                except Exception as e:
+                    st.warning(f"Errore conversione valore '{v}': {e}")
+                    return None
+
+            y = storico["valore"].apply(converti_valore)
+
+            # DEBUG: mostra i valori convertiti (opzionale)
+            # st.write("DEBUG - Valori convertiti:", y.tolist())
+
+            # Controlla se ci sono valori validi
+            if y.dropna().empty:
+                st.info("Nessun dato valido per generare il grafico.")
+            else:
+                fig = go.Figure(go.Scatter(x=x, y=y, mode='lines+markers'))
+                fig.update_layout(
+                    xaxis_title="Data",
+                    yaxis_title=y_label,
+                    height=350,
+                    template="plotly_white"
+                )
+                with span("grafico.storico_progressi.andamento"):
+                    st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("Nessun test disponibile per i filtri selezionati.")
@@ -0,0 +1,42 @@
+import streamlit as st
+
+from fitness_app.dataset import DATASET, con_test_rimossi
+from fitness_app.livelli import aggiungi_livelli
+from fitness_app.righe import COLONNA_ID
+from fitness_app.schema_dati import formatta_data
+from pagine.comuni import elimina_righe_google_sheets
+
+
+# --- Storico dei propri test con eliminazione ---
+def mostra(ctx):
+    utente = ctx.utente
+    test_df = ctx.test_df
+    soglie_df = ctx.soglie_df
+    st.subheader("📜 Storico Dati")
+    atleta_test = test_df[test_df['nome'] == utente['nome']]
+
+    if atleta_test.empty:
+        st.info("Non ci sono test disponibili per questo utente.")
+    else:
+        # Calcola dinamicamente il livello per ogni esercizio (in blocco)
+        atleta_test = atleta_test.copy()
+        atleta_test['livello'] = aggiungi_livelli(atleta_test, soglie_df)['livello']
+        st.dataframe(atleta_test)
+
+        # Pulsante per eliminare un test: si sceglie per id_riga, l'etichetta è solo da mostrare
+        info = {
+            str(row[COLONNA_ID]): f"Esercizio: {row['esercizio']} | Data: {formatta_data(row['data'])} | Valore: {row['valore']} | Tipo: {row['tipo_valore']}"
+            for _, row in atleta_test.iterrows()
+        } if COLONNA_ID in atleta_test.columns else {}
+        id_da_eliminare = st.selectbox("Seleziona un test da eliminare", list(info), format_func=info.get)
+
+        if st.button("Elimina test"):
+            if id_da_eliminare is not None:
+                # Sul foglio sparisce solo quella riga; nello snapshot condiviso le viste
+                # si ricalcolano solo per la coppia atleta/esercizio toccata
+                elimina_righe_google_sheets([id_da_eliminare], "test", "test")
+                DATASET.aggiorna(con_test_rimossi([id_da_eliminare]))
+                st.success("✅ Test eliminato con successo!")
+                st.rerun()  # 🔁 Ricarica subito la pagina
+            else:
+                st.error("⚠️ Errore: test non trovato.")
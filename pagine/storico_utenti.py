@@ -0,0 +1,7 @@
+import streamlit as st
+
+
+# --- Storico dati utenti (coach) ---
+def mostra(ctx):
+    st.title("Storico Dati utenti")
+    # ...existing code...
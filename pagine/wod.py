@@ -0,0 +1,9 @@
+import streamlit as st
+
+
+# --- Elenco dei WOD ---
+def mostra(ctx):
+    wod_df = ctx.wod_df
+    st.title("WOD")
+    st.write("Gestisci e visualizza i WOD.")
+    st.dataframe(wod_df)  # Mostra i dati dei WOD
@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from fitness_app.archivio import ArchivioInCache, ArchivioLocale, popola_se_vuoto
+from fitness_app.caricamento import FOGLI, leggi_esportazione
+from fitness_app.dati_sintetici import genera_dati
+from fitness_app.righe import assegna_per_posizione
+from fitness_app.rubrica import RubricaUtenti
+
+
+class LocaleLento(ArchivioLocale):
+    """ArchivioLocale con scritture lente: due sessioni finiscono di sicuro una dentro l'altra."""
+
+    def aggiungi(self, nome, righe_df):
+        time.sleep(0.02)
+        super().aggiungi(nome, righe_df)
+
+
+@pytest.fixture
+def locale(tmp_path):
+    locale = ArchivioLocale(str(tmp_path / "dati.sqlite"))
+    locale.scrivi("test", pd.DataFrame({"nome": ["a", "b", "c"], "valore": ["1", "2", "3"], "id_riga": ["r1", "r2", "r3"]}))
+    return locale
+
+
+def test_upsert_per_id_sostituisce(locale):
+    versione = locale.versione("test")
+    locale.upsert("test", pd.DataFrame({"nome": ["b", "d"], "valore": ["20", "4"], "id_riga": ["r2", "r4"]}), ["id_riga"])
+    letto = locale.leggi("test")
+    assert letto["id_riga"].tolist() == ["r1", "r2", "r3", "r4"]
+    assert letto["valore"].tolist() == ["1", "20", "3", "4"]
+    assert locale.versione("test") == versione + 1
+
+
+def test_elimina_solo_gli_id_dati(locale):
+    locale.elimina_righe("test", ["r2", " r3 ", "r9"])
+    assert locale.leggi("test")["id_riga"].tolist() == ["r1"]
+    locale.elimina_righe("test", [])
+    locale.elimina_righe("assente", ["r1"])
+    assert locale.leggi("test")["nome"].tolist() == ["a"]
+
+
+def test_assegna_id_solo_alle_righe_senza(locale):
+    locale.scrivi("wod", pd.DataFrame({"nome": ["a", "b", "c", "d"], "id_riga": ["r1", "", None, "r4"]}))
+    # Anche posizioni che nel frattempo hanno già un id o non esistono più (id calcolati su una copia vecchia)
+    id_df = pd.DataFrame({"posizione": [0, 1, 2, 99], "id_riga": ["x0", "x1", "x2", "x99"]})
+    locale.assegna_id("wod", id_df)
+    letto = locale.leggi("wod")
+    assert letto["id_riga"].tolist() == ["r1", "x1", "x2", "r4"]
+    assert letto["nome"].tolist() == ["a", "b", "c", "d"]
+    # Stesso risultato della copia in memoria (cache e coda usano assegna_per_posizione)
+    atteso = assegna_per_posizione(pd.DataFrame({"nome": ["a", "b", "c", "d"], "id_riga": ["r1", "", None, "r4"]}), id_df)
+    assert atteso["id_riga"].tolist() == letto["id_riga"].tolist()
+
+    # Foglio senza la colonna id_riga: la colonna si aggiunge
+    locale.scrivi("benchmark", pd.DataFrame({"esercizio": ["squat", "stacco"]}))
+    locale.assegna_id("benchmark", pd.DataFrame({"posizione": [1], "id_riga": ["x1"]}))
+    assert locale.leggi("benchmark")["id_riga"].tolist() == ["", "x1"]
+
+
+def test_popola_solo_i_fogli_vuoti(tmp_path, locale):
+    dati = genera_dati(200, seme=1)
+    chiamate = []
+
+    def dati_iniziali():
+        chiamate.append(1)
+        return dati
+
+    assert popola_se_vuoto(locale, FOGLI, dati_iniziali) == ["utenti", "esercizi", "benchmark", "wod"]
+    assert len(locale.leggi("test")) == 3
+    assert len(locale.leggi("utenti")) == len(dati["utenti"])
+    # Coi dati sintetici il coach di prova può accedere
+    assert RubricaUtenti(locale.leggi("utenti")).accedi("Coach Sintetico", "0", "coach") is not None
+    # Tutto pieno: i dati iniziali non si generano nemmeno
+    assert popola_se_vuoto(locale, FOGLI, dati_iniziali) == []
+    assert len(chiamate) == 1
+
+    # Dall'esportazione CSV di Google Sheets
+    cartella = tmp_path / "esportazione"
+    cartella.mkdir()
+    dati["utenti"].to_csv(cartella / "utenti.csv", index=False)
+    nuovo = ArchivioLocale(str(tmp_path / "nuovo.sqlite"))
+    assert popola_se_vuoto(nuovo, FOGLI, lambda: leggi_esportazione(str(cartella))) == ["utenti"]
+    assert nuovo.leggi("utenti")["pin"].tolist() == dati["utenti"]["pin"].tolist()
+
+
+def test_cache_aggiornata_in_memoria_dopo_le_scritture(tmp_path):
+    locale = ArchivioLocale(str(tmp_path / "dati.sqlite"))
+    locale.scrivi("wod", pd.DataFrame({"nome": ["a", "b"], "id_riga": ["r1", "r2"]}))
+    cache = ArchivioInCache(locale, str(tmp_path / "cache"))
+    cache.leggi("wod")
+    cache.aggiungi("wod", pd.DataFrame({"nome": ["c"], "id_riga": ["r3"]}))
+    cache.aggiorna_righe("wod", pd.DataFrame({"id_riga": ["r1"], "nome": ["A"]}))
+    cache.elimina_righe("wod", ["r2"])
+    cache.upsert("wod", pd.DataFrame({"nome": ["C2"], "id_riga": ["r3"]}), ["id_riga"])
+    assert cache._leggi("wod")[1] == "memoria"
+    pd.testing.assert_frame_equal(cache.leggi("wod"), locale.leggi("wod"))
+
+
+def test_scritture_contemporanee_non_si_perdono(tmp_path):
+    locale = LocaleLento(str(tmp_path / "dati.sqlite"))
+    locale.scrivi("test", pd.DataFrame({"nome": ["a"], "id_riga": ["r0"]}))
+    cache = ArchivioInCache(locale, str(tmp_path / "cache"))
+    cache.leggi("test")
+    sessioni = [
+        threading.Thread(target=cache.aggiungi, args=("test", pd.DataFrame({"nome": [f"n{i}"], "id_riga": [f"r{i + 1}"]})))
+        for i in range(8)
+    ]
+    for sessione in sessioni:
+        sessione.start()
+    for sessione in sessioni:
+        sessione.join()
+
+    attese = sorted(locale.leggi("test")["id_riga"])
+    assert len(attese) == 9
+    assert sorted(cache.leggi("test")["id_riga"]) == attese
+    # Anche la copia su disco (quella che sopravvive a un riavvio) ha tutte le righe
+    cache.dimentica()
+    df, livello = cache._leggi("test")
+    assert livello == "disco" and sorted(df["id_riga"]) == attese
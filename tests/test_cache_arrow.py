@@ -0,0 +1,43 @@
+import pandas as pd
+
+from fitness_app.cache_arrow import leggi_snapshot, scrivi_snapshot, tipi_colonne
+
+# Uno snapshot riletto deve restituire le stesse celle con lo stesso tipo Python,
+# come le aveva restituite get_all_records.
+
+MISTO = [1, 2.5, "abc", None, "007", 1.0, -3, "", "12:30"]
+
+
+def foglio():
+    n = len(MISTO)
+    return pd.DataFrame({
+        "misto": pd.Series(MISTO, dtype="object"),
+        "testo": pd.Series(["a", None, "b", "", "1", "x", "y", "z", "w"], dtype="object"),
+        "intero": range(n),
+        "decimale": [0.5 * i for i in range(n)],
+        "vero": [i % 2 == 0 for i in range(n)],
+        "data": pd.date_range("2025-01-01", periods=n),
+    })
+
+
+def test_colonne_miste_come_prima(tmp_path):
+    df = foglio()
+    assert tipi_colonne(df) == {"misto": "misto", "testo": "stringa", "intero": "int64", "decimale": "float64",
+                                "vero": "bool", "data": "datetime"}
+    percorso = str(tmp_path / "foglio.feather")
+    scrivi_snapshot(percorso, df)
+    letto = leggi_snapshot(percorso)
+
+    assert list(letto.columns) == list(df.columns)
+    # Numeri di nuovo numeri (int resta int), testo che sembra un numero resta testo
+    assert letto["misto"].tolist() == MISTO
+    assert [type(x) for x in letto["misto"]] == [type(x) for x in MISTO]
+    pd.testing.assert_frame_equal(letto, df)
+
+
+def test_solo_colonne_richieste(tmp_path):
+    percorso = str(tmp_path / "foglio.feather")
+    scrivi_snapshot(percorso, foglio())
+    letto = leggi_snapshot(percorso, colonne=["misto", "intero", "assente"])
+    assert list(letto.columns) == ["misto", "intero"]
+    assert [type(x) for x in letto["misto"]] == [type(x) for x in MISTO]
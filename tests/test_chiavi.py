@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.percorsi_originali import normalize
+from fitness_app.chiavi import ASSENTE, Dizionario, normalizza, normalizza_serie
+from fitness_app.dati_sintetici import genera_dati
+
+VALORI = [
+    "Back Squat", " back-squat_ ", "BACK  SQUAT", "Pull\tUp", "Ünï Äb", "", "  ",
+    None, np.nan, pd.NA, 12, 2.5, 1, 1.0, True, "1", 0, False,
+]
+
+
+def test_normalizzazione_come_la_vecchia():
+    # Stessa chiave della normalize di graficicoach.py, cella per cella
+    attese = [normalize(v) for v in VALORI]
+    assert normalizza_serie(pd.Series(VALORI, dtype="object")).tolist() == attese
+    assert [normalizza(v) for v in VALORI] == attese
+
+    grezzi = genera_dati(500, seme=2)
+    for nome, col in (("test", "esercizio"), ("test", "nome"), ("esercizi", "categoria")):
+        serie = grezzi[nome][col]
+        assert normalizza_serie(serie).tolist() == serie.apply(normalize).tolist()
+
+
+def test_normalizza_serie_mantiene_indice():
+    serie = pd.Series(["A b", None], index=[10, 3])
+    assert normalizza_serie(serie).to_dict() == {10: "ab", 3: ""}
+
+
+def test_id_stabili():
+    dizionario = Dizionario("esercizio")
+    primi = dizionario.codifica(pd.Series(["Squat", "Stacco", "squat", None, ""]))
+    assert primi.tolist() == [0, 1, 0, ASSENTE, ASSENTE]
+    assert primi.dtype == "int32"
+    # Le chiavi nuove si accodano, quelle già viste tengono l'id in qualunque ordine arrivino
+    secondi = dizionario.codifica(pd.Series(["Panca", "STACCO", "S-quat"]))
+    assert secondi.tolist() == [2, 1, 0]
+    assert dizionario.id(" stacco ") == 1 and dizionario.id("mai visto") == ASSENTE
+    assert dizionario.chiave(2) == "panca" and dizionario.chiave(99) == ""
+    assert len(dizionario) == 3
+    assert dizionario.codifica(pd.Series([], dtype="object")).tolist() == []
@@ -0,0 +1,103 @@
+import threading
+
+import pandas as pd
+import pytest
+from tenacity import wait_none
+
+from fitness_app.archivio import ArchivioLocale
+from fitness_app.coda_scritture import CodaScritture
+
+
+class RemotoInaffidabile(ArchivioLocale):
+    """
+    Remoto finto: le prime `fallimenti` scritture arrivano ma poi falliscono (come un timeout
+    dopo il successo), così la coda le ripete.
+    """
+
+    def __init__(self, percorso, fallimenti=0):
+        super().__init__(percorso)
+        self.fallimenti = fallimenti
+        self.chiamate = 0
+
+    def _dopo_scrittura(self):
+        self.chiamate += 1
+        if self.chiamate <= self.fallimenti:
+            raise ConnectionError("timeout")
+
+    def aggiungi(self, nome, righe_df):
+        super().aggiungi(nome, righe_df)
+        self._dopo_scrittura()
+
+    def upsert(self, nome, righe_df, chiavi):
+        super().upsert(nome, righe_df, chiavi)
+        self._dopo_scrittura()
+
+
+@pytest.fixture(autouse=True)
+def senza_attese(monkeypatch):
+    # Stessi tentativi di produzione, senza il backoff tra uno e l'altro
+    monkeypatch.setattr(CodaScritture._invia.retry, "wait", wait_none())
+
+
+def test_invio_ripetuto_non_duplica_le_righe(tmp_path):
+    remoto = RemotoInaffidabile(str(tmp_path / "remoto.sqlite"), fallimenti=2)
+    remoto.scrivi("test", pd.DataFrame({"nome": ["a"], "id_riga": ["r0"]}))
+    coda = CodaScritture(remoto, str(tmp_path / "coda.sqlite"))
+    coda.accoda("test", "aggiungi", pd.DataFrame({"nome": ["b", "c"]}))
+    assert coda.svuota(timeout=10)
+    assert remoto.chiamate == 3
+    letto = remoto.leggi("test")
+    assert sorted(letto["nome"]) == ["a", "b", "c"]
+    assert letto["id_riga"].is_unique
+
+
+def test_ripresa_dopo_tentativi_esauriti(tmp_path):
+    # Più fallimenti dei tentativi di un ciclo: l'operazione torna in attesa e riparte dopo
+    remoto = RemotoInaffidabile(str(tmp_path / "remoto.sqlite"), fallimenti=7)
+    remoto.scrivi("test", pd.DataFrame({"nome": ["a"], "id_riga": ["r0"]}))
+    coda = CodaScritture(remoto, str(tmp_path / "coda.sqlite"))
+    coda.accoda("test", "aggiungi", pd.DataFrame({"nome": ["b"]}))
+    assert coda.svuota(timeout=10)
+    assert coda.ultimo_errore is None
+    assert sorted(remoto.leggi("test")["nome"]) == ["a", "b"]
+    assert coda.applica_pendenti("test", remoto.leggi("test"))["nome"].tolist() == ["a", "b"]
+
+
+def test_accorpa_aggiunte_consecutive():
+    from fitness_app.coda_scritture import _df_in_json
+
+    operazioni = [
+        (1, "wod", "aggiungi", _df_in_json(pd.DataFrame({"nome": ["a"], "id_riga": ["r1"]})), None),
+        (2, "wod", "aggiungi", _df_in_json(pd.DataFrame({"nome": ["b"], "id_riga": ["r2"]})), None),
+        (3, "wod", "elimina_righe", _df_in_json(pd.DataFrame({"id_riga": ["r1"]})), None),
+        (4, "wod", "elimina_righe", _df_in_json(pd.DataFrame({"id_riga": ["r2"]})), None),
+    ]
+    gruppi = CodaScritture._accorpa(operazioni)
+    assert [(g[0], len(g[1]), g[3]) for g in gruppi] == [("aggiungi", 2, [1, 2]), ("elimina_righe", 2, [3, 4])]
+
+
+def test_scrivi_dopo_aggiunta_fallita(tmp_path):
+    # Sequenza: un'aggiunta è in invio, intanto si accoda una riscrittura completa (che toglie
+    # solo le operazioni in attesa), l'aggiunta fallisce e torna in attesa. Il giro dopo
+    # accorpa [aggiunta, riscrittura]: dal giornale devono sparire tutte e due.
+    entrata, prosegui = threading.Event(), threading.Event()
+
+    class RemotoBloccato(ArchivioLocale):
+        def aggiungi(self, nome, righe_df):
+            entrata.set()
+            prosegui.wait(5)
+            raise ConnectionError("rete giù")
+
+    remoto = RemotoBloccato(str(tmp_path / "remoto.sqlite"))
+    remoto.scrivi("benchmark", pd.DataFrame({"esercizio": ["squat"]}))
+    coda = CodaScritture(remoto, str(tmp_path / "coda.sqlite"))
+    coda.accoda("benchmark", "aggiungi", pd.DataFrame({"esercizio": ["panca"]}))
+    assert entrata.wait(5)
+    coda.accoda("benchmark", "scrivi", pd.DataFrame({"esercizio": ["squat", "stacco"]}))
+    prosegui.set()
+
+    # L'aggiunta esaurisce i tentativi e torna in attesa; il giro dopo la riscrittura la assorbe
+    assert coda.svuota(timeout=10)
+    assert coda.in_attesa() == 0
+    assert remoto.leggi("benchmark")["esercizio"].tolist() == ["squat", "stacco"]
+    assert coda.applica_pendenti("benchmark", remoto.leggi("benchmark"))["esercizio"].tolist() == ["squat", "stacco"]
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fitness_app.dataset import DatasetCondiviso, con_test_aggiunti, con_test_rimossi
+from fitness_app.dati_sintetici import genera_dati
+from fitness_app.preparazione import costruisci_viste, prepara_fogli
+from fitness_app.schema_dati import tipizza_test
+
+# Le viste aggiornate incrementalmente (inserimento ed eliminazione di test) devono
+# coincidere con quelle ricostruite da zero sullo stesso test_df.
+
+
+@pytest.fixture
+def grezzi():
+    return genera_dati(2000, seme=7)
+
+
+@pytest.fixture
+def dataset(grezzi):
+    pronti = prepara_fogli({nome: df.copy() for nome, df in grezzi.items()})
+    pronti.pop("avvisi")
+    dataset = DatasetCondiviso()
+    dataset.pubblica(**pronti, **costruisci_viste(pronti["test_df"], pronti["esercizi_df"], pronti["soglie_df"]))
+    return dataset
+
+
+def nuovi_test(grezzi, posizioni):
+    """Copie di test del foglio con id e date nuovi, come escono dal form di inserimento."""
+    nuovi = grezzi["test"].iloc[posizioni].copy()
+    nuovi["id_riga"] = [f"rnuovo{i}" for i in range(len(nuovi))]
+    nuovi["data"] = "2099-01-01"
+    return nuovi
+
+
+def verifica_viste(snapshot):
+    rif = costruisci_viste(snapshot.test_df, snapshot.esercizi_df, snapshot.soglie_df)
+
+    matrice, matrice_rif = snapshot.matrice_livelli, rif["matrice_livelli"]
+    n = min(matrice.somme.shape[0], matrice_rif.somme.shape[0])
+    assert np.allclose(matrice.somme[:n], matrice_rif.somme[:n])
+    assert np.array_equal(matrice.conteggi[:n], matrice_rif.conteggi[:n])
+    assert not matrice.conteggi[n:].any() and not matrice_rif.conteggi[n:].any()
+
+    for id_cat in snapshot.classifiche.categorie:
+        for tempo in (False, True):
+            pd.testing.assert_frame_equal(
+                snapshot.classifiche.classifica(id_cat, tempo=tempo), rif["classifiche"].classifica(id_cat, tempo=tempo))
+
+    ultimi, ultimi_rif = snapshot.ultimi_test_df.sort_index(), rif["ultimi_test_df"].sort_index()
+    pd.testing.assert_frame_equal(ultimi[ultimi_rif.columns], ultimi_rif, check_dtype=False, check_categorical=False)
+
+    for id_wod in rif["indice_wod"]._risultati:
+        pd.testing.assert_frame_equal(
+            snapshot.indice_wod.classifica(id_wod).reset_index(drop=True),
+            rif["indice_wod"].classifica(id_wod).reset_index(drop=True))
+
+    pd.testing.assert_frame_equal(snapshot.bilanciamento.tabella(), rif["bilanciamento"].tabella())
+
+
+def test_inserimento_come_ricostruzione(dataset, grezzi):
+    prima = dataset.corrente()
+    dopo = dataset.aggiorna(con_test_aggiunti(nuovi_test(grezzi, [5, 50, 500])))
+    assert len(dopo.test_df) == len(prima.test_df) + 3
+    # I test nuovi si accodano già tipizzati: stesso risultato che ritipizzando tutto
+    pd.testing.assert_frame_equal(dopo.test_df, tipizza_test(dopo.test_df))
+    verifica_viste(dopo)
+
+
+def test_eliminazione_come_ricostruzione(dataset, grezzi):
+    inserito = dataset.aggiorna(con_test_aggiunti(nuovi_test(grezzi, [5, 50])))
+    id_vecchi = list(inserito.test_df["id_riga"].iloc[[0, 10, 100]])
+    dopo = dataset.aggiorna(con_test_rimossi(["rnuovo0", "rnuovo1", *id_vecchi]))
+    assert len(dopo.test_df) == len(inserito.test_df) - 5
+    verifica_viste(dopo)
+
+
+def test_snapshot_precedente_intatto(dataset, grezzi):
+    prima = dataset.corrente()
+    somme, n_test = prima.matrice_livelli.somme.copy(), len(prima.test_df)
+    dataset.aggiorna(con_test_aggiunti(nuovi_test(grezzi, [5])))
+    assert len(prima.test_df) == n_test
+    assert np.array_equal(prima.matrice_livelli.somme, somme)
+
+
+def test_versioni_fogli(grezzi):
+    pronti = prepara_fogli({nome: df.copy() for nome, df in grezzi.items()})
+    pronti.pop("avvisi")
+    dataset = DatasetCondiviso()
+    dataset.pubblica(**pronti, **costruisci_viste(pronti["test_df"], pronti["esercizi_df"], pronti["soglie_df"]),
+                     versioni_fogli={"utenti": "1", "test": "1"})
+    assert not dataset.controllo_dovuto(60)
+    assert dataset.controllo_dovuto(0)
+    assert dataset.fogli_cambiati({"utenti": "1", "test": "1"}) == []
+    assert dataset.fogli_cambiati({"utenti": "1", "test": None}) == []
+    assert dataset.fogli_cambiati({"utenti": "2", "test": "1"}) == ["utenti"]
+
+    # Una scrittura propria registra la versione che ha prodotto: non sembra una modifica esterna
+    dataset.versione_scritta = lambda foglio: "2"
+    dataset.aggiorna(con_test_aggiunti(nuovi_test(grezzi, [5])))
+    assert dataset.corrente().versioni_fogli == {"utenti": "1", "test": "2"}
+    assert dataset.fogli_cambiati({"utenti": "1", "test": "2"}) == []
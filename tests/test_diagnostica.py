@@ -0,0 +1,71 @@
+import json
+import time
+
+import pytest
+
+from fitness_app.diagnostica import Diagnostica
+
+
+def test_span_annidati():
+    diagnostica = Diagnostica()
+    with diagnostica.span("pagina", pagina="profilo"):
+        with diagnostica.span("archivio.leggi.test", foglio="test") as dettagli:
+            time.sleep(0.01)
+            dettagli["righe"] = 42
+            dettagli["cache"] = "disco"
+        with pytest.raises(ValueError):
+            with diagnostica.span("grafico"):
+                raise ValueError("dati mancanti")
+
+    # Ogni span si registra quando si chiude: prima quelli interni, poi quello che li contiene
+    interno, grafico, esterno = diagnostica.eventi()
+    assert [interno["nome"], grafico["nome"], esterno["nome"]] == ["archivio.leggi.test", "grafico", "pagina"]
+    assert esterno["ms"] >= interno["ms"] + grafico["ms"]
+    assert interno["ms"] >= 10
+    assert interno["righe"] == 42 and interno["cache"] == "disco" and interno["foglio"] == "test"
+    # L'errore gestito dentro resta nello span interno
+    assert grafico["errore"] == "ValueError" and "errore" not in esterno
+
+    riepilogo = diagnostica.riepilogo().set_index("nome")
+    assert riepilogo.index[0] == "pagina"
+    assert riepilogo.loc["archivio.leggi.test", ["chiamate", "righe", "hit", "miss"]].tolist() == [1, 42, 1, 0]
+    assert riepilogo.loc["grafico", "errori"] == 1
+
+
+def test_errore_attraversa_tutti_gli_span():
+    diagnostica = Diagnostica()
+    with pytest.raises(KeyError):
+        with diagnostica.span("esterno"):
+            with diagnostica.span("interno"):
+                raise KeyError("foglio")
+    assert [(e["nome"], e["errore"]) for e in diagnostica.eventi()] == [("interno", "KeyError"), ("esterno", "KeyError")]
+
+
+def test_formato_jsonl(tmp_path):
+    file_jsonl = tmp_path / "diagnostica.jsonl"
+    diagnostica = Diagnostica(max_eventi=2, file_jsonl=str(file_jsonl))
+    diagnostica.registra("caricamento.prepara_fogli", 0.0123456, righe=10)
+    diagnostica.registra("archivio.leggi.utenti", 0.002, cache="memoria", foglio="utenti")
+    diagnostica.registra("pagina.città", 0.5, errore="RuntimeError")
+
+    # Un oggetto JSON per riga, nell'ordine delle misure; ms arrotondati al microsecondo
+    righe = file_jsonl.read_text(encoding="utf-8").splitlines()
+    eventi = [json.loads(riga) for riga in righe]
+    assert [e["nome"] for e in eventi] == ["caricamento.prepara_fogli", "archivio.leggi.utenti", "pagina.città"]
+    assert eventi[0]["ms"] == 12.346 and eventi[0]["righe"] == 10
+    assert set(eventi[0]) == {"ts", "nome", "ms", "righe"}
+    assert set(eventi[1]) == {"ts", "nome", "ms", "cache", "foglio"}
+    assert "città" in righe[2]  # niente escape dei caratteri accentati
+
+    # In memoria restano solo gli ultimi max_eventi; l'esportazione ha lo stesso formato del file
+    esportato = tmp_path / "esportato.jsonl"
+    testo = diagnostica.esporta_jsonl(str(esportato))
+    assert testo == esportato.read_text(encoding="utf-8") == "".join(riga + "\n" for riga in righe[1:])
+    assert diagnostica.riepilogo()["chiamate"].sum() == 3
+
+
+def test_file_non_scrivibile(tmp_path):
+    diagnostica = Diagnostica(file_jsonl=str(tmp_path / "manca" / "diagnostica.jsonl"))
+    diagnostica.registra("pagina", 0.1)
+    assert diagnostica.file_jsonl is None
+    assert len(diagnostica.eventi()) == 1
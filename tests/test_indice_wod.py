@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fitness_app.dati_sintetici import genera_dati
+from fitness_app.indice_wod import IndiceWod
+from fitness_app.preparazione import prepara_fogli
+
+ESERCIZI = pd.DataFrame({"id_esercizio": [7, 8], "tipo_valore": ["tempo", "reps"]})
+
+
+def risultati(*righe):
+    """test_df minimo da (id_esercizio, id_atleta, nome, genere, data, valore)."""
+    df = pd.DataFrame(righe, columns=["id_esercizio", "id_atleta", "nome", "genere", "data", "valore"])
+    df["data"] = pd.to_datetime(df["data"], format="ISO8601")
+    df["valore_num"] = pd.to_numeric(df["valore"], errors="coerce")
+    secondi = df["valore"].str.extract(r"^(\d+):(\d+)$").astype(float)
+    df["valore_sec"] = secondi[0] * 60 + secondi[1]
+    return df
+
+
+def test_estremi_della_finestra():
+    indice = IndiceWod.costruisci(risultati(
+        (7, 0, "anna", "Femmina", "2025-02-28 23:59", "3:00"),
+        (7, 1, "bruno", "Maschio", "2025-03-01", "4:00"),
+        (7, 2, "carla", "Femmina", "2025-03-05 18:30", "4:30"),
+        (7, 3, "dario", "Maschio", "2025-03-06", "2:00"),
+        (7, 4, "elena", "Femmina", None, "1:00"),
+    ), ESERCIZI)
+
+    # dal e al inclusi: la riga a mezzanotte del primo giorno e quella della sera dell'ultimo
+    assert indice.classifica(7, dal="2025-03-01", al="2025-03-05")["nome"].tolist() == ["bruno", "carla"]
+    assert indice.classifica(7, dal=pd.Timestamp("2025-03-01"))["nome"].tolist() == ["dario", "bruno", "carla"]
+    assert indice.classifica(7, al="2025-02-28")["nome"].tolist() == ["anna"]
+    assert indice.classifica(7, dal="2025-03-07").empty
+    # Senza data: solo nella classifica su tutto lo storico
+    assert indice.classifica(7)["nome"].tolist() == ["elena", "dario", "anna", "bruno", "carla"]
+
+
+def test_genere_e_miglior_risultato():
+    indice = IndiceWod.costruisci(risultati(
+        (8, 0, "anna", "Femmina", "2025-03-01", "20"),
+        (8, 1, "bruno", "Maschio", "2025-03-01", "30"),
+        (8, 0, "anna", "Femmina", "2025-03-02", "25"),
+        (8, 2, "carla", "Femmina", "2025-03-02", "25"),
+        (8, 3, "dario", "Maschio", "2025-03-03", "x"),
+    ), ESERCIZI)
+
+    donne = indice.classifica(8, genere="Femmina")
+    # Più reps è meglio; a parità vince chi l'ha ottenuto prima (anna e carla lo stesso giorno: ordine del foglio)
+    assert donne["nome"].tolist() == ["anna", "carla"]
+    assert donne["posizione"].tolist() == [1, 2]
+    assert donne["valore"].tolist() == ["25", "25"]
+    assert set(donne["genere"]) == {"Femmina"}
+    # Il valore non numerico non entra in classifica
+    assert indice.classifica(8, genere="Maschio")["nome"].tolist() == ["bruno"]
+    assert indice.classifica(8, genere="Femmina", dal="2025-03-01", al="2025-03-01")["valore"].tolist() == ["20"]
+    assert indice.classifica(99).empty
+
+
+def riferimento(test_df, tempo, id_wod, genere, dal, al):
+    """Classifica calcolata da zero sul foglio, senza indice né ricerca binaria."""
+    df = test_df[test_df["id_esercizio"] == id_wod].sort_values("data", kind="stable", na_position="last")
+    if dal is not None:
+        df = df[df["data"] >= pd.Timestamp(dal)]
+    if al is not None:
+        df = df[df["data"] < pd.Timestamp(al) + pd.Timedelta(days=1)]
+    if genere:
+        df = df[df["genere"] == genere]
+    punteggio = df["valore_sec"].astype("float64") if tempo else -df["valore_num"]
+    df = df.assign(punteggio=punteggio)[punteggio.notna()]
+    return df.sort_values(["punteggio", "data"], kind="stable").drop_duplicates("id_atleta")["valore"].tolist()
+
+
+@pytest.mark.parametrize("genere", [None, "Maschio", "Femmina"])
+def test_come_filtro_diretto(genere):
+    pronti = prepara_fogli(genera_dati(3000, seme=5))
+    test_df, esercizi_df = pronti["test_df"], pronti["esercizi_df"]
+    indice = IndiceWod.costruisci(test_df, esercizi_df)
+    tipi = dict(zip(esercizi_df["id_esercizio"], esercizi_df["tipo_valore"]))
+    date = np.sort(test_df["data"].dropna().unique())
+    # Estremi presi fra le date dei test: il caso in cui un errore di uno sulla ricerca binaria si vede
+    finestre = [(None, None), (date[100], None), (None, date[-100]), (date[50], date[50]), (date[10], date[-10])]
+    for id_wod in (0, 9):
+        for dal, al in finestre:
+            attesa = riferimento(test_df, tipi[id_wod] == "tempo", id_wod, genere, dal, al)
+            assert indice.classifica(id_wod, genere=genere, dal=dal, al=al)["valore"].tolist() == attesa
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from benchmarks.percorsi_originali import _livello_riga, normalize
+from fitness_app.dati_sintetici import genera_dati
+from fitness_app.livelli import LIVELLO_MAPPING, calcola_livelli, costruisci_tabella_soglie
+from fitness_app.preparazione import prepara_fogli
+
+# calcola_livelli (vettoriale) deve dare lo stesso livello del vecchio ciclo per test
+# dei radar di graficicoach.py, riga per riga.
+
+CASI_LIMITE = [
+    # Sotto tutte le soglie: tempo più lento della "base", reps e kg sotto la "base"
+    {"esercizio": "Fran", "valore": "59:00", "genere": "Maschio", "peso_corporeo": 80},
+    {"esercizio": "Run 5 km", "valore": "45:30", "genere": "Femmina", "peso_corporeo": 60},
+    {"esercizio": "Max Pull-up", "valore": "0", "genere": "Femmina", "peso_corporeo": 60},
+    {"esercizio": "Back Squat 1RM", "valore": "10", "genere": "Maschio", "peso_corporeo": 90},
+    # Minore è meglio: più veloce dell'elite, esattamente sulla soglia elite e su una intermedia
+    {"esercizio": "Grace", "valore": "0:59", "genere": "Maschio", "peso_corporeo": 80},
+    {"esercizio": "Fran", "valore": "2:30", "genere": "Maschio", "peso_corporeo": 80},
+    {"esercizio": "Row 2000 m", "valore": "8:46", "genere": "Femmina", "peso_corporeo": 60},
+    # Tempi non validi e valori non numerici
+    {"esercizio": "Fran", "valore": "abc", "genere": "Maschio", "peso_corporeo": 80},
+    {"esercizio": "Max Pull-up", "valore": "", "genere": "Maschio", "peso_corporeo": 80},
+    # Esercizio sconosciuto e genere senza benchmark
+    {"esercizio": "Esercizio inventato", "valore": "100", "genere": "Maschio", "peso_corporeo": 80},
+    {"esercizio": "Deadlift 1RM", "valore": "200", "genere": "Altro", "peso_corporeo": 80},
+]
+
+
+@pytest.fixture(scope="module")
+def fogli():
+    grezzi = genera_dati(1500, seme=3)
+    test = pd.concat([grezzi["test"], pd.DataFrame(CASI_LIMITE)], ignore_index=True)
+    return test, grezzi["benchmark"]
+
+
+def livelli_originali(test_df, benchmark_df):
+    test_df, benchmark_df = test_df.copy(), benchmark_df.copy()
+    test_df["esercizio_norm"] = test_df["esercizio"].apply(normalize)
+    benchmark_df["esercizio_norm"] = benchmark_df["esercizio"].apply(normalize)
+    return pd.Series(
+        [_livello_riga(row, benchmark_df, LIVELLO_MAPPING) for _, row in test_df.iterrows()],
+        index=test_df.index, dtype="int8")
+
+
+def test_come_percorso_originale(fogli):
+    test_df, benchmark_df = fogli
+    livelli = calcola_livelli(test_df, costruisci_tabella_soglie(benchmark_df))
+    pd.testing.assert_series_equal(
+        livelli["livello_num"], livelli_originali(test_df, benchmark_df), check_names=False)
+
+    # I dati sintetici coprono tutti i livelli, compreso "nessuna soglia raggiunta"
+    assert set(livelli["livello_num"]) == {0, 1, 2, 3, 4, 5}
+    casi = livelli.iloc[-len(CASI_LIMITE):]
+    assert casi["livello_num"].tolist() == [0, 0, 0, 0, 5, 5, 3, 0, 0, 0, 0]
+    assert casi["ha_benchmark"].tolist() == [True] * 9 + [False, False]
+
+
+def test_test_tipizzati_come_grezzi(fogli):
+    # Lo stesso calcolo sui test già tipizzati (valore_num, valore_sec, float32) di prepara_fogli
+    test_df, benchmark_df = fogli
+    grezzi = genera_dati(10, seme=3)
+    grezzi["test"], grezzi["benchmark"] = test_df.copy(), benchmark_df.copy()
+    pronti = prepara_fogli(grezzi)
+    tipizzati = pronti["test_df"]
+    attesi = calcola_livelli(test_df, costruisci_tabella_soglie(benchmark_df))
+    livelli = calcola_livelli(tipizzati, pronti["soglie_df"])
+    assert livelli["livello_num"].tolist() == attesi.loc[tipizzati.index, "livello_num"].tolist()
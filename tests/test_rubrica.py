@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pandas as pd
+
+from fitness_app.rubrica import accedi, rubrica
+
+
+def snapshot(*utenti):
+    return SimpleNamespace(utenti_df=pd.DataFrame(utenti, columns=["nome", "pin", "ruolo", "genere"]))
+
+
+class DatiFinti:
+    """dati_aggiornati finto: il controllo forzato trova `dopo` (il foglio utenti cambiato)."""
+
+    def __init__(self, prima, dopo=None):
+        self.prima, self.dopo = prima, dopo
+        self.chiamate = []
+
+    def __call__(self, forza_controllo=False, fogli=None):
+        self.chiamate.append((forza_controllo, fogli))
+        return self.dopo if forza_controllo and self.dopo is not None else self.prima
+
+
+def test_accesso_dopo_aggiornamento_forzato():
+    # Il coach ha appena aggiunto Giulia sul foglio: lo snapshot in memoria non la conosce ancora
+    dati = DatiFinti(snapshot(("Marco", "1234", "atleta", "Maschio")),
+                     snapshot(("Marco", "1234", "atleta", "Maschio"), ("Giulia ", 987, "Atleta", "Femmina")))
+    utente = accedi(dati, "giulia", " 987", "atleta")
+    assert utente == {"nome": "giulia", "pin": "987", "ruolo": "atleta", "genere": "Femmina"}
+    assert dati.chiamate == [(False, None), (True, ["utenti"])]
+
+
+def test_accesso_senza_ricontrollo():
+    dati = DatiFinti(snapshot(("Marco", "1234", "atleta", "Maschio")))
+    assert accedi(dati, " MARCO", "1234", "atleta")["nome"] == "marco"
+    assert dati.chiamate == [(False, None)]
+
+
+def test_credenziali_sbagliate():
+    # PIN sbagliato e foglio invariato: nessun secondo tentativo sullo stesso snapshot
+    dati = DatiFinti(snapshot(("Marco", "1234", "atleta", "Maschio")))
+    assert accedi(dati, "marco", "0000", "atleta") is None
+    assert dati.chiamate == [(False, None), (True, ["utenti"])]
+    # Ruolo diverso: il nome da solo non basta
+    assert accedi(dati, "marco", "1234", "coach") is None
+
+
+def test_rubrica_riusata_per_lo_stesso_foglio():
+    utenti_df = snapshot(("Marco", "1234", "atleta", "Maschio"), ("Sara", "1", "coach", "Femmina")).utenti_df
+    prima = rubrica(utenti_df)
+    assert rubrica(utenti_df)._accesso is prima._accesso
+    assert prima.atleti() == ["Marco"]
+    assert prima.utente("sara", ruolo="coach")["pin"] == "1"
+    assert prima.utente("sara") is None